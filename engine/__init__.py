@@ -2,3 +2,7 @@
 from .terrain_generator import TerrainGenerator
 from .species_generator import SpeciesGenerator
 from .state_manager import StateManager
+from .world import World
+from .pipeline import GenerationPipeline, parse_seeds
+from .rules import load_rules, validate_rules
+from .rule_watcher import RuleWatcher
@@ -0,0 +1,111 @@
+"""
+Star Carr Engine - Command line
+
+Builds worlds outside the server, e.g. at deploy time, so `uvicorn` only has
+to memory-map a ready snapshot instead of generating on startup:
+
+    python -m engine build --seed 42 --rules rules --out data
+    python -m engine build --seed 1-50 --out worlds --jobs 8    # worlds/seed-1 ... worlds/seed-50
+
+The snapshot is the .npy/.json set StateManager.save() writes, which
+load_existing() maps read-only. Several seeds are built in parallel in a
+process pool, each into its own seed-<n> directory under --out.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .pipeline import parse_seeds
+from .rules import load_rules, validate_rules
+from .state_manager import StateManager
+
+
+def build(rules_dir: str, seed: int, out: str, quiet: bool = False) -> dict:
+    """Generate one world and save its snapshot to out; returns stage timings."""
+    rules = load_rules(rules_dir)
+    stages = []
+
+    def progress(event):
+        if event.get('event') == 'stage':
+            stages.append((event['stage'], event['seconds']))
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        sm = StateManager(rules, data_dir=out, store=None)
+        world = sm.generate(seed, progress=progress)
+    return {'seed': seed, 'out': out, 'seconds': time.perf_counter() - t0, 'stages': stages,
+            'signs': len(world.signs), 'shape': list(world.shape), 'bytes': world.nbytes}
+
+
+def _print_stages(result: dict):
+    """Stage timings, grouped by kind (terrain, corridor, place, ...) with the slowest stage of each."""
+    kinds = {}
+    for stage, seconds in result['stages']:
+        kind = stage.split(':')[0]
+        total, n, slowest = kinds.get(kind, (0.0, 0, (stage, seconds)))
+        kinds[kind] = (total + seconds, n + 1, max(slowest, (stage, seconds), key=lambda s: s[1]))
+    print(f"  {'stage':14s} {'count':>5s} {'seconds':>8s}  slowest")
+    for kind, (total, n, (stage, seconds)) in kinds.items():
+        print(f"  {kind:14s} {n:5d} {total:8.3f}  {stage} {seconds:.3f}s")
+
+
+def _summary(result: dict) -> str:
+    rows, cols = result['shape']
+    return (f"seed {result['seed']}: {rows}x{cols}, {result['signs']} signs, "
+            f"{result['bytes'] / 1e6:.1f} MB in {result['seconds']:.2f}s → {result['out']}")
+
+
+def cmd_build(args):
+    errors = validate_rules(load_rules(args.rules))
+    if errors:
+        for e in errors:
+            print(f"  {e}")
+        sys.exit(f"Rules in {args.rules} are invalid")
+
+    seeds = parse_seeds(','.join(args.seed or ['42']))
+    if len(seeds) == 1:
+        result = build(args.rules, seeds[0], args.out)
+        _print_stages(result)
+        print(f"Built {_summary(result)}")
+        return
+
+    jobs = max(1, min(args.jobs, len(seeds)))
+    print(f"Building {len(seeds)} worlds with {jobs} processes ...")
+    t0 = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(build, args.rules, seed, os.path.join(args.out, f'seed-{seed}'), True): seed
+                   for seed in seeds}
+        for fut in as_completed(futures):
+            try:
+                print(f"  {_summary(fut.result())}")
+            except Exception as e:
+                failed += 1
+                print(f"  seed {futures[fut]}: FAILED: {e}")
+    print(f"Built {len(seeds) - failed}/{len(seeds)} worlds in {time.perf_counter() - t0:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m engine', description='Star Carr world engine')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    b = sub.add_parser('build', help='generate worlds and write their snapshots')
+    b.add_argument('--seed', action='append', help="seed, list or range, e.g. 42, '1-20' or '3,7' (repeatable)")
+    b.add_argument('--rules', default=os.environ.get('RULES_DIR', 'rules'), help='rules directory')
+    b.add_argument('--out', default='data', help='snapshot directory (parent of seed-<n> dirs for several seeds)')
+    b.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes for several seeds')
+    b.set_defaults(func=cmd_build)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Agents - Animal groups that move through the world by time of day
+
+Animals are placed once by the generator; `AgentLayer` takes each animal
+species' presence grid apart into groups (one per connected patch) held as
+flat NumPy arrays - position, species, group size, state - and moves them on
+every time-of-day step. A step is a few rounds of cost-weighted random walk:
+each group picks one of its 8 neighbours (or stays) with probability
+proportional to the species' attraction there, i.e. its terrain_weights times
+the corridor bias (game_trail, water_edge, ecotone) in species_init.yaml's
+`movement` section and its own corridor_bonus. Groups active at the new time
+of day (crepuscular at dawn and dusk, nocturnal at night, ...) walk further.
+The groups are then drawn back into presence grids, one scatter per species
+that has groups.
+
+Every round is a gather over all groups at once, so thousands of groups step
+in milliseconds.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+from scipy.ndimage import label
+
+from .world import World
+
+STATIC_CATEGORIES = ('tree', 'shrub', 'plant')
+CORRIDORS = ('water_edge', 'ecotone', 'game_trail')
+RESTING, ACTIVE = 0, 1
+
+# (dx, dy) of staying put and the 8 neighbours
+MOVES = np.array([(0, 0), (-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)], dtype=np.int32)
+
+
+def activity_times(w: World, sp_id: str) -> set:
+    """Times of day a species is active, from its activity tags (diurnal if it has none)."""
+    activity = (w.species_rules.get('movement') or {}).get('activity') or {}
+    tag_map = w.species_rules.get('tags') or {}
+    tags = set(w.species.get(sp_id, {}).get('tags') or [])
+    tags |= {tag for tag, members in tag_map.items() if sp_id in members}
+    times = set()
+    for tag in activity:
+        if tag in tags:
+            times.update(activity[tag])
+    return times or set(activity.get('diurnal', ['morning', 'midday', 'afternoon']))
+
+
+class AgentLayer:
+    def __init__(self, w: World, rng: np.random.Generator = None):
+        self.rng = rng or np.random.default_rng(w.seed)
+        self.cfg = w.species_rules.get('movement') or {}
+        self.key = (w.rules_digest, id(w.terrain))
+        self.shape = w.shape
+        self.species: List[str] = [sp for sp, d in w.species.items()
+                                   if d.get('category') not in STATIC_CATEGORIES and sp in w.species_presence]
+        self.active_at = [activity_times(w, sp) for sp in self.species]
+        self.spread = np.array([w.species[sp].get('distribution', {}).get('group_spread', 2) for sp in self.species],
+                               dtype=np.int32)
+        self._attraction(w)
+
+        # One entry per group
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.sp = np.empty(0, dtype=np.int16)
+        self.size = np.empty(0, dtype=np.int32)
+        self.state = np.empty(0, dtype=np.uint8)
+
+        # species → the grid last drawn from (or taken apart into) its groups,
+        # and the version of the world the last advance() was drawn into
+        self.grids: Dict[str, np.ndarray] = {}
+        self.version: int = None
+        self.sync(w)
+
+    def matches(self, w: World) -> bool:
+        """True if w has the terrain and rules these groups were built for."""
+        return self.key == (w.rules_digest, id(w.terrain))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _attraction(self, w: World):
+        """Per-cell terrain and corridor codes plus per-species weight tables.
+
+        A species' attraction at a cell is terrain_lut[sp, terrain] x
+        corridor_lut[sp, corridor bits], so memory is per cell, not per
+        species and cell. The grids are padded with a terrain code of weight
+        0, so moves off the edge need no bounds checks.
+        """
+        rows, cols = w.shape
+        bias = self.cfg.get('corridor_bias') or {}
+        edge = max(w.terrain_types, default=0) + 1
+        self.terrain = np.full((rows + 2, cols + 2), edge, dtype=np.int32)
+        self.terrain[1:-1, 1:-1] = w.terrain
+        self.corridor = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        for bit, corridor in enumerate(CORRIDORS):
+            mask = w.corridors.get(corridor)
+            if mask is not None:
+                self.corridor[1:-1, 1:-1] |= np.asarray(mask, dtype=np.uint8) << bit
+
+        self.terrain_lut = np.zeros((len(self.species), edge + 1), dtype=np.float32)
+        self.corridor_lut = np.ones((len(self.species), 1 << len(CORRIDORS)), dtype=np.float32)
+        codes = np.arange(1 << len(CORRIDORS))
+        for i, sp in enumerate(self.species):
+            dist = w.species[sp].get('distribution', {})
+            for name, weight in (dist.get('terrain_weights') or {}).items():
+                if name in w.terrain_ids:
+                    self.terrain_lut[i, w.terrain_ids[name]] = weight
+            bonus = dist.get('corridor_bonus') or {}
+            for bit, corridor in enumerate(CORRIDORS):
+                factor = bias.get(corridor, 1.0) * bonus.get(corridor, 1.0)
+                self.corridor_lut[i] *= np.where(codes & (1 << bit), factor, 1.0)
+
+    def weights(self, sp: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Attraction of species sp at cells (x, y); any shape, cells may be one off the grid."""
+        return self.terrain_lut[sp, self.terrain[y + 1, x + 1]] * self.corridor_lut[sp, self.corridor[y + 1, x + 1]]
+
+    def drawn_into(self, w: World):
+        """Record w as the world the last advance() was drawn into."""
+        self.version = w.version
+
+    def sync(self, w: World):
+        """Rebuild the groups of any species whose grid was changed by something else (e.g. a season tick)."""
+        if w.version == self.version:
+            # our own output, maybe re-mapped from a shared snapshot: same cells, new arrays
+            self.grids.update({sp: w.species_presence[sp] for sp in self.species})
+            return
+        stale = [i for i, sp in enumerate(self.species) if w.species_presence[sp] is not self.grids.get(sp)]
+        if not stale:
+            return
+        keep = ~np.isin(self.sp, stale)
+        parts = [(self.x[keep], self.y[keep], self.sp[keep], self.size[keep])]
+        for i in stale:
+            grid = w.species_presence[self.species[i]]
+            parts.append(self._groups(i, grid))
+            self.grids[self.species[i]] = grid
+        self.x, self.y, self.sp, self.size = (np.concatenate(p) for p in zip(*parts))
+        self.state = np.full(len(self.x), RESTING, dtype=np.uint8)
+
+    def _groups(self, i: int, grid: np.ndarray):
+        """One group per connected patch of a presence grid, at one of its cells, sized by its cell count."""
+        labels, n = label(np.asarray(grid) > 0, structure=np.ones((3, 3)))
+        if n == 0:
+            return (np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int16), np.empty(0, np.int32))
+        cells = np.flatnonzero(labels)
+        _, first, sizes = np.unique(labels.ravel()[cells], return_index=True, return_counts=True)
+        ys, xs = np.divmod(cells[first], self.shape[1])
+        return xs.astype(np.int32), ys.astype(np.int32), np.full(n, i, dtype=np.int16), sizes.astype(np.int32)
+
+    def step(self, time_of_day: str, steps: int = None):
+        """Walk every group for one time-of-day step."""
+        active = np.array([time_of_day in times for times in self.active_at], dtype=bool)
+        self.state = np.where(active[self.sp], ACTIVE, RESTING).astype(np.uint8)
+        moves = steps if steps is not None else self.cfg.get('steps', 6)
+        resting = self.cfg.get('resting_steps', 1)
+        for n in range(moves):
+            walkers = np.flatnonzero(self.state == ACTIVE) if n >= resting else np.arange(len(self.x))
+            if len(walkers):
+                self._walk(walkers)
+
+    def _walk(self, idx: np.ndarray):
+        """One round: each group moves to a neighbour (or stays) with probability ∝ attraction."""
+        x, y, sp = self.x[idx], self.y[idx], self.sp[idx]
+        nx = x[:, None] + MOVES[:, 0]
+        ny = y[:, None] + MOVES[:, 1]
+        weights = self.weights(sp[:, None], nx, ny)  # (groups, 9)
+        # sample each row by inverse CDF; groups with nowhere to go stay put
+        cdf = np.cumsum(weights, axis=1)
+        total = cdf[:, -1]
+        pick = (cdf < (self.rng.random(len(idx), dtype=np.float32) * total)[:, None]).sum(axis=1)
+        pick = np.where(total > 0, np.minimum(pick, 8), 0)
+        rows = np.arange(len(idx))
+        self.x[idx] = nx[rows, pick]
+        self.y[idx] = ny[rows, pick]
+
+    def rasterize(self) -> Dict[str, np.ndarray]:
+        """Presence grids of the moving species that have groups (the others stay empty).
+
+        A group covers a square around its position about as many cells as
+        it has members (at most its species' group_spread out), clipped to
+        cells the species can stand on.
+        """
+        rows, cols = self.shape
+        S = len(self.species)
+        reach = int(self.spread.max()) if S else 0
+        radius = np.minimum(self.spread[self.sp], (np.sqrt(self.size) / 2).astype(np.int32))
+        d = np.arange(-reach, reach + 1, dtype=np.int32)
+        dx, dy = (a.ravel() for a in np.meshgrid(d, d))
+        within = np.maximum(np.abs(dx), np.abs(dy))[None, :] <= radius[:, None]  # (groups, offsets)
+        g, o = np.nonzero(within)
+        x, y, sp = self.x[g] + dx[o], self.y[g] + dy[o], self.sp[g]
+        inside = (x >= 0) & (x < cols) & (y >= 0) & (y < rows)
+        x, y, sp = x[inside], y[inside], sp[inside]
+        standable = self.weights(sp, x, y) > 0
+        sp, cells = sp[standable], y[standable].astype(np.int64) * cols + x[standable]
+        order = np.argsort(sp, kind='stable')
+        bounds = np.searchsorted(sp[order], np.arange(S + 1))
+        grids = {}
+        for i in np.unique(self.sp):
+            grid = np.zeros(rows * cols, dtype=np.uint8)
+            grid[cells[order[bounds[i]:bounds[i + 1]]]] = 1
+            grids[self.species[i]] = grid.reshape(rows, cols)
+        return grids
+
+    def advance(self, w: World, time_of_day: str) -> Dict[str, np.ndarray]:
+        """Move the groups of world w on to time_of_day; returns the new presence grids."""
+        self.sync(w)
+        self.step(time_of_day)
+        grids = self.rasterize()
+        self.grids.update(grids)
+        return grids
+
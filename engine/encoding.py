@@ -0,0 +1,112 @@
+"""
+Encoding - Compact binary encodings for grid layers sent to the frontend
+"""
+
+import base64
+import gzip
+import numpy as np
+
+# One run = little-endian uint16 length followed by a uint8 value
+RLE_DTYPE = np.dtype([('length', '<u2'), ('value', 'u1')])
+
+
+def encode_raw(block: np.ndarray) -> bytes:
+    """Row-major uint8 bytes of a 2D block."""
+    return np.ascontiguousarray(block, dtype=np.uint8).tobytes()
+
+
+def encode_rle(block: np.ndarray) -> bytes:
+    """Row-wise run-length encoding; runs never cross a row boundary."""
+    block = np.ascontiguousarray(block, dtype=np.uint8)
+    if block.size == 0:
+        return b''
+    starts = np.ones(block.shape, dtype=bool)
+    starts[:, 1:] = block[:, 1:] != block[:, :-1]
+    idx = np.flatnonzero(starts)
+    runs = np.empty(len(idx), dtype=RLE_DTYPE)
+    runs['length'] = np.diff(np.append(idx, block.size))
+    runs['value'] = block.ravel()[idx]
+    return runs.tobytes()
+
+
+def decode_rle(data: bytes, shape) -> np.ndarray:
+    runs = np.frombuffer(data, dtype=RLE_DTYPE)
+    return np.repeat(runs['value'], runs['length']).reshape(shape)
+
+
+def encode_gzip(block: np.ndarray, level: int = 6) -> bytes:
+    """gzip-compressed raw bytes (sent with Content-Encoding: gzip)."""
+    return gzip.compress(encode_raw(block), compresslevel=level, mtime=0)
+
+
+# Rectangles are (min_x, min_y, max_x, max_y), max exclusive
+
+def clamp_rect(rect, shape):
+    rows, cols = shape
+    x0, y0, x1, y1 = rect
+    x0, y0 = min(max(0, x0), cols), min(max(0, y0), rows)
+    return x0, y0, max(x0, min(cols, x1)), max(y0, min(rows, y1))
+
+
+def viewport_delta(prev, new) -> list:
+    """Rectangles covering `new` minus `prev` (at most four strips)."""
+    px0, py0, px1, py1 = prev
+    nx0, ny0, nx1, ny1 = new
+    ix0, iy0, ix1, iy1 = max(px0, nx0), max(py0, ny0), min(px1, nx1), min(py1, ny1)
+    if ix0 >= ix1 or iy0 >= iy1:
+        return [new] if nx0 < nx1 and ny0 < ny1 else []
+
+    strips = [
+        (nx0, ny0, nx1, iy0),  # above the overlap
+        (nx0, iy1, nx1, ny1),  # below
+        (nx0, iy0, ix0, iy1),  # left
+        (ix1, iy0, nx1, iy1),  # right
+    ]
+    return [r for r in strips if r[0] < r[2] and r[1] < r[3]]
+
+
+def encode_strips(grid: np.ndarray, rects) -> bytes:
+    """uint16 strip count, then per strip uint16 x, y, width, height and its raw cells."""
+    parts = [np.array([len(rects)], dtype='<u2').tobytes()]
+    for x0, y0, x1, y1 in rects:
+        parts.append(np.array([x0, y0, x1 - x0, y1 - y0], dtype='<u2').tobytes())
+        parts.append(encode_raw(grid[y0:y1, x0:x1]))
+    return b''.join(parts)
+
+
+def _b64(arr: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode('ascii')
+
+
+def mask_bitmask(mask: np.ndarray) -> str:
+    """Row-major mask bit-packed MSB-first (np.packbits) and base64'd."""
+    return _b64(np.packbits(mask.ravel().astype(bool)))
+
+
+def mask_rle(mask: np.ndarray) -> str:
+    """Row-major mask as alternating run lengths (first run is False), uint32 LE, base64'd."""
+    flat = mask.ravel().astype(np.int8)
+    edges = np.flatnonzero(np.diff(flat)) + 1
+    bounds = np.concatenate(([0], edges, [flat.size]))
+    runs = np.diff(bounds)
+    if flat.size and flat[0]:
+        runs = np.concatenate(([0], runs))
+    return _b64(runs.astype('<u4'))
+
+
+def signs_columnar(signs, symbols: dict) -> dict:
+    """Signs as a type table plus base64 typed columns (uint8 type index, uint16 LE x/y)."""
+    types, index = [], {}
+    for s in signs:
+        if s['type'] not in index:
+            index[s['type']] = len(types)
+            sym = symbols.get(s['type'], {})
+            types.append({'type': s['type'], 'char': sym.get('char', '?'), 'color': sym.get('color', '#888'),
+                          'description': sym.get('description', '')})
+    return {
+        'types': types,
+        'count': len(signs),
+        'type_index': _b64(np.array([index[s['type']] for s in signs], dtype=np.uint8)),
+        'x': _b64(np.array([s['x'] for s in signs], dtype='<u2')),
+        'y': _b64(np.array([s['y'] for s in signs], dtype='<u2')),
+    }
@@ -0,0 +1,187 @@
+"""
+Jobs - Background world regeneration with stage-by-stage progress and cancellation
+
+Every StateManager has its own JobManager, so each hosted world runs at most
+one regeneration at a time. `Job.snapshots()` yields the job's state each
+time it changes, for streaming without polling.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from .pipeline import GenerationCancelled
+
+
+class JobConflict(Exception):
+    """Raised when a regeneration is requested while another is running."""
+
+    def __init__(self, job: 'Job'):
+        super().__init__(f"job {job.id} is already {job.status}")
+        self.job = job
+
+
+class Job:
+    ACTIVE = ('queued', 'running')
+
+    def __init__(self, seed: Optional[int], rules: Optional[dict], profile: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.seed = seed
+        self.rules = rules
+        self.profile = profile
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.stages: List[dict] = []
+        self.revision = 0  # bumped on every change, for streaming
+        self.cancel_event = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def active(self) -> bool:
+        return self.status in self.ACTIVE
+
+    def on_progress(self, event: dict):
+        with self._lock:
+            if event.get('event') == 'plan':
+                self.stages = [{'name': n, 'status': 'pending', 'seconds': None} for n in event['stages']]
+            elif event.get('event') == 'stage':
+                for st in self.stages:
+                    if st['name'] == event['stage']:
+                        st['status'] = event['status']
+                        st['seconds'] = round(event['seconds'], 4)
+                        break
+            self.revision += 1
+        self._notify()
+
+    def _set(self, **fields):
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+            self.revision += 1
+        self._notify()
+
+    def subscribe(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call callback() after every change; returns an unsubscribe function."""
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            callback()
+
+    async def snapshots(self) -> AsyncIterator[dict]:
+        """to_dict() now and after every change, until the job has finished."""
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        unsubscribe = self.subscribe(lambda: loop.call_soon_threadsafe(changed.set))
+        try:
+            revision = -1
+            while True:
+                changed.clear()
+                finished = self.finished is not None  # read first: the snapshot then includes the end
+                snapshot = self.to_dict()
+                if snapshot['revision'] != revision:
+                    revision = snapshot['revision']
+                    yield snapshot
+                if finished:
+                    return
+                await changed.wait()
+        finally:
+            unsubscribe()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            done = sum(1 for s in self.stages if s['status'] != 'pending')
+            end = self.finished or time.time()
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'seed': self.seed,
+                'profile': self.profile,
+                'error': self.error,
+                'created': self.created,
+                'elapsed': round(end - self.started, 3) if self.started else 0.0,
+                'progress': round(done / len(self.stages), 3) if self.stages else 0.0,
+                'stages': [dict(s) for s in self.stages],
+                'revision': self.revision,
+            }
+
+
+class JobManager:
+    def __init__(self, state, history: int = 20):
+        self.state = state
+        self._jobs: Dict[str, Job] = collections.OrderedDict()
+        self._history = history
+        self._active: Optional[Job] = None
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        """True while a job is queued or running."""
+        job = self._active
+        return job is not None and job.active
+
+    def submit(self, seed: int = None, rules: dict = None, profile: str = None) -> Job:
+        """Start a regeneration job; raises JobConflict if one is already running.
+
+        profile ('cpu' or 'alloc') runs this generation under the profiler.
+        """
+        with self._lock:
+            if self.busy:
+                raise JobConflict(self._active)
+            job = Job(seed, rules, profile)
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+
+        threading.Thread(target=self._run, args=(job,), name=f'job-{job.id}', daemon=True).start()
+        return job
+
+    def run(self, seed: int = None, rules: dict = None) -> Job:
+        """Submit once any active job has finished, then block until this one is done."""
+        while True:
+            try:
+                job = self.submit(seed, rules)
+                break
+            except JobConflict as e:
+                e.job.wait()
+        job.wait()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel_event.set()
+        return job
+
+    def _run(self, job: Job):
+        job._set(status='running', started=time.time())
+        try:
+            seed = job.seed if job.seed is not None else (self.state.world.seed if self.state.world else 42)
+            self.state.generate(seed, job.rules, progress=job.on_progress, cancel=job.cancel_event,
+                                profile=job.profile)
+            job._set(status='done')
+        except GenerationCancelled:
+            job._set(status='cancelled')
+        except Exception as e:
+            print(f"Regeneration job {job.id} failed: {e}")
+            job._set(status='failed', error=str(e))
+        finally:
+            job._set(finished=time.time())
+            job.rules = None
+            job._done.set()
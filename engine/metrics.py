@@ -0,0 +1,219 @@
+"""
+Metrics - Process-wide counters and histograms with Prometheus text output
+
+Generation stages, persistence and request handlers record into the module
+level `metrics` registry; GET /metrics renders it in the Prometheus text
+format. `log_event()` prints the same measurements as logfmt lines
+(`event=stage stage=terrain seconds=0.412 ...`) for log-based tooling.
+Existing stats dicts (caches, coalescing, Redis writes) are exported by
+collectors that run at scrape time.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 B .. 64 MB
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, n: int):
+        self.counts = [0] * n
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    def __init__(self, prefix: str = 'star_carr'):
+        self.prefix = prefix
+        self._meta: Dict[str, tuple] = {}  # name → (type, help, buckets)
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+        self._lock = threading.Lock()
+
+    # Declaration
+
+    def counter(self, name: str, help: str):
+        self._meta[name] = ('counter', help, None)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = TIME_BUCKETS):
+        self._meta[name] = ('histogram', help, tuple(buckets))
+        self._histograms.setdefault(name, {})
+
+    def collect(self, fn: Callable[[], Iterable[tuple]]):
+        """Register fn() → iterable of (name, type, help, [(labels, value), ...]), called per render."""
+        self._collectors.append(fn)
+
+    # Recording
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._meta[name][2]
+        key = _labels(labels)
+        i = bisect.bisect_left(buckets, value)
+        with self._lock:
+            h = self._histograms[name].get(key)
+            if h is None:
+                h = self._histograms[name][key] = _Histogram(len(buckets))
+            if i < len(buckets):
+                h.counts[i] += 1
+            h.sum += value
+            h.count += 1
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the duration of the with-block (also when it raises)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    # Exposition
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        out = []
+        with self._lock:
+            for name, (kind, help, buckets) in self._meta.items():
+                full = f'{self.prefix}_{name}'
+                out.append(f'# HELP {full} {help}')
+                out.append(f'# TYPE {full} {kind}')
+                if kind == 'counter':
+                    for labels, v in self._counters[name].items():
+                        out.append(f'{full}{_fmt_labels(labels)} {_fmt_value(v)}')
+                    continue
+                for labels, h in self._histograms[name].items():
+                    running = 0
+                    for le, n in zip(buckets, h.counts):
+                        running += n
+                        out.append(f'{full}_bucket{_fmt_labels(labels, (("le", _fmt_value(le)),))} {running}')
+                    out.append(f'{full}_bucket{_fmt_labels(labels, (("le", "+Inf"),))} {h.count}')
+                    out.append(f'{full}_sum{_fmt_labels(labels)} {_fmt_value(h.sum)}')
+                    out.append(f'{full}_count{_fmt_labels(labels)} {h.count}')
+
+        for fn in self._collectors:
+            try:
+                families = list(fn())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                full = f'{self.prefix}_{name}'
+                out.append(f'# HELP {full} {help}')
+                out.append(f'# TYPE {full} {kind}')
+                for labels, v in samples:
+                    out.append(f'{full}{_fmt_labels(_labels(labels))} {_fmt_value(v)}')
+        return '\n'.join(out) + '\n'
+
+    def reset(self):
+        with self._lock:
+            for series in (*self._counters.values(), *self._histograms.values()):
+                series.clear()
+
+
+def log_event(event: str, **fields):
+    """Print one logfmt line: event=<event> key=value ..."""
+    parts = [f'event={event}']
+    for k, v in fields.items():
+        if isinstance(v, float):
+            v = f'{v:.4f}'
+        v = str(v)
+        if not v or any(c in v for c in ' ="'):
+            v = '"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        parts.append(f'{k}={v}')
+    print(' '.join(parts), flush=True)
+
+
+metrics = Metrics()
+metrics.histogram('stage_seconds', 'Generation stage duration (status: computed or cached)')
+metrics.histogram('generation_seconds', 'Whole world generation, pipeline plus persistence')
+metrics.counter('generations_total', 'World generations run (status: ok or failed)')
+metrics.histogram('agent_step_seconds', 'Moving the animal groups on one time-of-day step')
+metrics.histogram('season_tick_seconds', 'One simulated month of SeasonEngine.tick by phase')
+metrics.histogram('persistence_seconds', 'Snapshot save/load duration by operation and target')
+metrics.histogram('persistence_bytes', 'Snapshot payload size by operation and target', SIZE_BUCKETS)
+metrics.histogram('request_seconds', 'HTTP request duration by handler')
+metrics.histogram('response_bytes', 'HTTP response body size by handler', SIZE_BUCKETS)
+metrics.counter('requests_total', 'HTTP requests by handler and status code')
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request_seconds/response_bytes/requests_total per handler.
+
+    The handler label is the matched endpoint's function name (e.g. observe,
+    terrain_batch). Requests slower than slow_seconds are also logged.
+    """
+
+    def __init__(self, app, slow_seconds: float = 0.5):
+        self.app = app
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status, size = 500, 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - t0
+            endpoint = scope.get('endpoint')
+            handler = ('unmatched' if endpoint is None
+                       else getattr(endpoint, '__name__', None) or type(endpoint).__name__.lower())
+            metrics.observe('request_seconds', seconds, handler=handler)
+            metrics.observe('response_bytes', size, handler=handler)
+            metrics.inc('requests_total', handler=handler, status=status)
+            if seconds >= self.slow_seconds:
+                log_event('slow_request', handler=handler, path=scope.get('path', ''), status=status,
+                          seconds=seconds, bytes=size)
+
+
+def record_persistence(op: str, target: str, nbytes: int, seconds: float):
+    """Record one snapshot save/load in the histograms and the log."""
+    metrics.observe('persistence_seconds', seconds, op=op, target=target)
+    metrics.observe('persistence_bytes', nbytes, op=op, target=target)
+    log_event('persistence', op=op, target=target, bytes=nbytes, seconds=seconds)
@@ -0,0 +1,278 @@
+"""
+Observer - Observations built from running tallies over the visibility disc
+
+An ObservationState holds per-terrain, per-species and per-sign tallies for
+the disc around (x, y). A one-cell move only touches the crescent of cells
+entering and leaving the disc, so `step()` updates the tallies from those
+alone, O(perimeter) rather than O(area). Conditional texts are memoized on
+the values of the context paths their conditions read.
+"""
+
+import collections
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Counter, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .world import World
+
+CATEGORY_ORDER = ['tree', 'shrub', 'plant', 'large_herbivore', 'medium_herbivore', 'predator', 'aquatic']
+TEXT_FIELDS = ['visual', 'tactile', 'smell', 'sound', 'habitat', 'season_note', 'uses']
+_PATH = re.compile(r'\b[A-Za-z_]\w*(?:\.\w+)*')  # context paths (plus harmless bare words)
+
+
+@lru_cache(maxsize=None)
+def disc(radius: int) -> Tuple[Tuple[int, int], ...]:
+    """(dx, dy) offsets within radius, row-major."""
+    r = radius
+    return tuple((dx, dy) for dy in range(-r, r + 1) for dx in range(-r, r + 1) if dx * dx + dy * dy <= r * r)
+
+
+@lru_cache(maxsize=None)
+def crescent(radius: int, mx: int, my: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets entering the disc (from the new centre) and leaving it (from the old) on a move of (mx, my)."""
+    offsets = disc(radius)
+    inside = set(offsets)
+    entering = [o for o in offsets if (o[0] + mx, o[1] + my) not in inside]
+    leaving = [o for o in offsets if (o[0] - mx, o[1] - my) not in inside]
+    return np.array(entering, dtype=np.int64).reshape(-1, 2), np.array(leaving, dtype=np.int64).reshape(-1, 2)
+
+
+@dataclass
+class ObservationState:
+    x: int
+    y: int
+    radius: int
+    world: World  # snapshot the tallies were built from
+    terrain_counts: Counter = field(default_factory=collections.Counter)
+    species_cells: Dict[str, Dict[Tuple[int, int], int]] = field(default_factory=dict)
+    species_states: Dict[str, Counter] = field(default_factory=dict)
+    signs: Dict[int, dict] = field(default_factory=dict)  # index in world.signs → sign
+    sign_counts: Counter = field(default_factory=collections.Counter)
+
+
+class Observer:
+    def __init__(self, state, memo_size: int = 4096):
+        self.state = state  # StateManager, for condition evaluation
+        self.memo_size = memo_size
+        self._texts: Dict[tuple, dict] = {}
+        self._paths: Dict[str, Optional[List[str]]] = {}
+        self._distance: Optional[set] = None
+        self._rules = None
+
+    # Tallies
+
+    def start(self, w: World, x: int, y: int, radius: int) -> ObservationState:
+        st = ObservationState(x, y, radius, w, species_cells={sp: {} for sp in w.species_presence},
+                              species_states={sp: collections.Counter() for sp in w.species_presence})
+        self._apply(st, np.array(disc(radius), dtype=np.int64).reshape(-1, 2), x, y, 1)
+        return st
+
+    def step(self, w: World, st: ObservationState, dx: int, dy: int) -> ObservationState:
+        """Move st by (dx, dy) in place; rebuilds from scratch if the layers changed or the move is long."""
+        x, y = st.x + dx, st.y + dy
+        same_layers = (w.terrain is st.world.terrain and w.signs is st.world.signs
+                       and w.species_presence.keys() == st.world.species_presence.keys()
+                       and all(w.species_presence[k] is a for k, a in st.world.species_presence.items()))
+        if not same_layers or max(abs(dx), abs(dy)) > 1:
+            return self.start(w, x, y, st.radius)
+
+        st.world = w  # time of day etc. may differ; the layers don't
+        if dx or dy:
+            entering, leaving = crescent(st.radius, dx, dy)
+            self._apply(st, leaving, st.x, st.y, -1)
+            self._apply(st, entering, x, y, 1)
+            st.x, st.y = x, y
+        return st
+
+    def _apply(self, st: ObservationState, offsets: np.ndarray, x: int, y: int, delta: int):
+        w = st.world
+        rows, cols = w.shape
+        xs, ys = offsets[:, 0] + x, offsets[:, 1] + y
+        keep = (xs >= 0) & (xs < cols) & (ys >= 0) & (ys < rows)
+        xs, ys = xs[keep], ys[keep]
+
+        for tid, n in zip(*np.unique(w.terrain[ys, xs], return_counts=True)):
+            self._count(st.terrain_counts, int(tid), delta * int(n))
+
+        for sp_id, presence in w.species_presence.items():
+            vals = presence[ys, xs]
+            hit = np.flatnonzero(vals > 0)
+            if not len(hit):
+                continue
+            cells, states = st.species_cells[sp_id], st.species_states[sp_id]
+            for i in hit:
+                cell, v = (int(xs[i]), int(ys[i])), int(vals[i])
+                if delta > 0:
+                    cells[cell] = v
+                else:
+                    cells.pop(cell, None)
+                self._count(states, v, delta)
+
+        by_cell = w.signs_by_cell
+        if by_cell:
+            for cell in zip(xs.tolist(), ys.tolist()):
+                for i, s in by_cell.get(cell, ()):
+                    if delta > 0:
+                        st.signs[i] = s
+                    else:
+                        st.signs.pop(i, None)
+                    self._count(st.sign_counts, s['type'], delta)
+
+    @staticmethod
+    def _count(counter: Counter, key, delta: int):
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+    # Output
+
+    def result(self, st: ObservationState) -> dict:
+        """Observation dict in the shape of StateManager.observe()."""
+        w, x, y = st.world, st.x, st.y
+        if self._rules is not w.rules:
+            self._rules, self._texts, self._paths, self._distance = w.rules, {}, {}, None
+
+        context = None
+        observations = []
+        for sp_id in w.species_presence:
+            cells = st.species_cells.get(sp_id)
+            if not cells:
+                continue
+            sp = w.species.get(sp_id, {})
+            max_state = max(st.species_states[sp_id])
+            if context is None:
+                context = self.context(st)
+            text = self._text(w, st, sp_id, sp.get('observation', {}), max_state, context)
+            observations.append({
+                'species_id': sp_id,
+                'common_name': sp.get('common', sp_id),
+                'latin_name': sp.get('latin', ''),
+                'category': sp.get('category', ''),
+                'count': len(cells),
+                'locations': [{'x': cx, 'y': cy} for cx, cy in sorted(cells, key=lambda c: (c[1], c[0]))],
+                'state': max_state,
+                'photo_url': f"/assets/species/{sp.get('photo')}" if sp.get('photo') else None,
+                **text,
+            })
+        observations.sort(key=lambda o: (CATEGORY_ORDER.index(o['category']) if o['category'] in CATEGORY_ORDER
+                                         else 99, o['common_name']))
+
+        visible_signs = []
+        for i in sorted(st.signs):
+            s = st.signs[i]
+            sym = w.symbols.get(s['type'], {})
+            visible_signs.append({
+                'type': s['type'], 'x': s['x'], 'y': s['y'],
+                'char': sym.get('char', '?'), 'color': sym.get('color', '#888'),
+                'description': sym.get('description', ''),
+            })
+
+        tid = int(w.terrain[y, x])
+        tt = w.terrain_types.get(tid, {})
+        return {
+            'location': {'x': x, 'y': y},
+            'current_terrain': {'id': tid, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')},
+            'visible_terrains': self._visible_terrains(st),
+            'observations': observations,
+            'signs': visible_signs,
+            'corridors': [n for n, m in w.corridors.items() if m is not None and m[y, x]],
+            'time_of_day': w.time_of_day,
+            'season': w.season,
+        }
+
+    def _visible_terrains(self, st: ObservationState) -> List[dict]:
+        """Terrains in first-seen (row-major) order; the scan stops once every tallied id is found."""
+        w = st.world
+        rows, cols = w.shape
+        order, wanted = [], set(st.terrain_counts)
+        for dx, dy in disc(st.radius):
+            if not wanted:
+                break
+            cx, cy = st.x + dx, st.y + dy
+            if 0 <= cy < rows and 0 <= cx < cols:
+                t = int(w.terrain[cy, cx])
+                if t in wanted:
+                    wanted.discard(t)
+                    tt = w.terrain_types.get(t, {})
+                    order.append({'id': t, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')})
+        return order
+
+    def context(self, st: ObservationState) -> dict:
+        """Condition context (as StateManager._build_context) from the tallies.
+
+        Species distances are only computed for species some condition reads.
+        """
+        w, x, y = st.world, st.x, st.y
+        distance_of = self._distance_species(w)
+        ctx = {
+            'species': {},
+            'sign': {t: {'present': True, 'count': n} for t, n in st.sign_counts.items()},
+            'terrain': {
+                'current': w.terrain_types.get(int(w.terrain[y, x]), {}).get('name', 'unknown'),
+                'is_ecotone': len(st.terrain_counts) > 1,
+            },
+            'time': {'of_day': w.time_of_day, 'season': w.season},
+            'corridor': {name: {'in': bool(m[y, x]) if m is not None else False} for name, m in w.corridors.items()},
+        }
+        for sp_id, cells in st.species_cells.items():
+            distance = 999
+            if cells and sp_id in distance_of:
+                distance = min(int(math.sqrt((cx - x) ** 2 + (cy - y) ** 2)) for cx, cy in cells)
+            ctx['species'][sp_id] = {
+                'present': bool(cells),
+                'count': len(cells),
+                'state': max(st.species_states[sp_id]) if cells else 0,
+                'distance': distance,
+            }
+        return ctx
+
+    def _distance_species(self, w: World) -> set:
+        if self._distance is None:
+            conds = [ct.get('condition', '') for sp in w.species.values()
+                     for ct in sp.get('observation', {}).get('conditional_texts', [])]
+            self._distance = {p.split('.')[1] for c in conds for p in _PATH.findall(c)
+                              if p.startswith('species.') and p.endswith('.distance')}
+        return self._distance
+
+    def _text(self, w: World, st: ObservationState, sp_id: str, obs: dict, max_state: int, context: dict) -> dict:
+        conditionals = obs.get('conditional_texts', [])
+        if not conditionals:
+            return {f: obs.get(f, '') for f in TEXT_FIELDS}
+
+        # Inputs are the values of every path the conditions read; None means
+        # some condition needs a different radius and can't be memoized.
+        if sp_id not in self._paths:
+            paths = set()
+            for ct in conditionals:
+                if ct.get('radius', st.radius) != st.radius:
+                    paths = None
+                    break
+                paths.update(_PATH.findall(ct.get('condition', '')))
+            self._paths[sp_id] = sorted(paths) if paths is not None else None
+
+        self_ctx = {'state': max_state}
+        key = None
+        if self._paths[sp_id] is not None:
+            key = (sp_id, st.radius, tuple(repr(self.state._get_val(p, context, self_ctx)) for p in self._paths[sp_id]))
+            text = self._texts.get(key)
+            if text is not None:
+                return text
+
+        text = {f: obs.get(f, '') for f in TEXT_FIELDS}
+        for ct in conditionals:
+            ct_radius = ct.get('radius', st.radius)
+            eval_ctx = context if ct_radius == st.radius else self.state._build_context(w, st.x, st.y, ct_radius)
+            if self.state._eval_condition(ct.get('condition', ''), eval_ctx, self_ctx):
+                fld = ct.get('append_to', '')
+                if fld in text:
+                    text[fld] += ' ' + ct.get('text', '')
+
+        if key is not None:
+            if len(self._texts) >= self.memo_size:
+                self._texts.clear()
+            self._texts[key] = text
+        return text
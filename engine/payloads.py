@@ -0,0 +1,92 @@
+"""
+Payloads - Pre-encoded response bodies built once per world version
+
+Entries are keyed on (version, name), or on (rules digest, name) for bodies
+derived from the rules alone, which then survive time changes and seasonal
+ticks. Only the most recent `versions` keys of each kind are kept;
+concurrent misses for the same key share one build through a SingleFlight.
+"""
+
+import collections
+import gzip
+import re
+import threading
+from typing import Callable, Dict, Tuple
+
+from .singleflight import SingleFlight
+
+
+def not_modified(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header value already names etag (so the answer is 304)."""
+    return etag in [t.strip() for t in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+
+class PayloadCache:
+    def __init__(self, versions: int = 2, flights: SingleFlight = None):
+        self.versions = versions
+        self.flights = flights or SingleFlight()
+        self.stats = {'hits': 0, 'built': 0}
+        self._entries: 'collections.OrderedDict[int, Dict[str, bytes]]' = collections.OrderedDict()
+        self._by_rules: 'collections.OrderedDict[str, Dict[str, bytes]]' = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, name: str, build: Callable[[], bytes], rules: str = None) -> bytes:
+        """Cached body for (version, name), calling build() on the first request.
+
+        With rules (a World.rules_digest) the body is keyed on (rules, name)
+        instead and shared by every version built from those rules.
+        """
+        entries, key = (self._entries, version) if rules is None else (self._by_rules, rules)
+        with self._lock:
+            body = entries.get(key, {}).get(name)
+            if body is not None:
+                self.stats['hits'] += 1
+                return body
+
+        def build_and_store() -> bytes:
+            body = build()
+            with self._lock:
+                if rules is None:
+                    self._store(version, name, body)
+                else:
+                    self._by_rules.setdefault(rules, {})[name] = body
+                    self._by_rules.move_to_end(rules)
+                    while len(self._by_rules) > self.versions:
+                        self._by_rules.popitem(last=False)
+                self.stats['built'] += 1
+            return body
+
+        kind = re.split(r'[-:]', name)[0]
+        return self.flights.do((f'payload:{kind}', key, name), build_and_store)
+
+    def encoded(self, version: int, name: str, build: Callable[[], bytes], accept_encoding: str = '',
+                rules: str = None) -> Tuple[str, Dict[str, str], Callable[[], bytes]]:
+        """(ETag, headers, body) for a JSON payload, gzip'd once for clients that accept it.
+
+        The ETag names the key the body is cached on (the version, or the
+        rules digest) and the encoding, so it changes exactly when the bytes do.
+        """
+        gz = 'gzip' in accept_encoding
+
+        def body() -> bytes:
+            if not gz:
+                return self.get(version, name, build, rules)
+            return self.get(version, f'{name}:gz', lambda: gzip.compress(
+                self.get(version, name, build, rules), compresslevel=6, mtime=0), rules)
+
+        headers = {'Vary': 'Accept-Encoding', **({'Content-Encoding': 'gzip'} if gz else {})}
+        etag = f'"{rules or version}-{name}{"-gz" if gz else ""}"'
+        return etag, headers, body
+
+    def _store(self, version: int, name: str, body: bytes):
+        if version not in self._entries and self._entries and version < next(reversed(self._entries)):
+            return  # a request still holding an older world; don't evict newer entries for it
+        self._entries.setdefault(version, {})[name] = body
+        self._entries.move_to_end(version)
+        while len(self._entries) > self.versions:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_rules.clear()
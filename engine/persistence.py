@@ -0,0 +1,206 @@
+"""
+Persistence - Async Redis store with write-behind saves
+
+The store runs its own asyncio loop on a daemon thread. Callers on any thread
+queue a save with `save(key, producer)` and return immediately; the loop
+coalesces queued saves per key (only the latest producer is serialized and
+written) and retries with backoff while Redis is unreachable.
+"""
+
+import asyncio
+import contextlib
+import fnmatch
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from .metrics import record_persistence
+
+Payload = Union[bytes, str]
+
+
+class MemoryRedis:
+    """In-process stand-in for redis.asyncio.Redis (get/set/delete/scan_iter/ping only)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data: Dict[str, bytes] = {}
+        self.writes = 0
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def ping(self) -> bool:
+        await self._delay()
+        return True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self._delay()
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Payload) -> bool:
+        await self._delay()
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        self.writes += 1
+        return True
+
+    async def delete(self, key: str) -> int:
+        await self._delay()
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    async def scan_iter(self, match: str = '*'):
+        await self._delay()
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode('utf-8')
+
+    async def aclose(self):
+        pass
+
+
+def _redis_client(url: str):
+    import redis.asyncio as aioredis
+    from redis.asyncio.retry import Retry
+    from redis.backoff import ExponentialBackoff
+
+    pool = aioredis.ConnectionPool.from_url(
+        url,
+        max_connections=int(os.environ.get('REDIS_MAX_CONNECTIONS', 8)),
+        health_check_interval=30,
+        socket_connect_timeout=5,
+        socket_timeout=10,
+        retry_on_timeout=True,
+        retry=Retry(ExponentialBackoff(cap=2.0), 3),
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+class RedisStore:
+    def __init__(self, client, flush_delay: float = 0.05, label: str = 'Redis'):
+        self.client = client
+        self.flush_delay = flush_delay  # coalescing window after the first queued save
+        self.label = label
+        self.healthy = True
+        self.stats = {'queued': 0, 'coalesced': 0, 'written': 0, 'failed': 0}
+
+        self._pending: Dict[str, Callable[[], Payload]] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._loop = asyncio.new_event_loop()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,), name='redis-store', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    @classmethod
+    def from_env(cls) -> Optional['RedisStore']:
+        """Store for UPSTASH_REDIS_URL/REDIS_URL (memory:// for the in-process stand-in), else None.
+
+        Nothing connects here; the pool opens connections on first use.
+        """
+        url = os.environ.get('UPSTASH_REDIS_URL') or os.environ.get('REDIS_URL')
+        if not url:
+            return None
+        if url.startswith('memory://'):
+            return cls(MemoryRedis(), label='memory')
+        return cls(_redis_client(url), label=url[:30] + '...')
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._writer())
+        ready.set()
+        self._loop.run_forever()
+
+    def _call(self, coro, timeout: float = 30.0):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    # Sync API (any thread)
+
+    def save(self, key: str, producer: Callable[[], Payload]):
+        """Queue a write-behind save. producer is called on the store thread at flush time."""
+        with self._lock:
+            if key in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[key] = producer
+            self.stats['queued'] += 1
+            self._idle.clear()
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    def load(self, key: str, timeout: float = 30.0) -> Optional[bytes]:
+        return self._call(self.client.get(key), timeout)
+
+    def keys(self, pattern: str, timeout: float = 10.0) -> List[str]:
+        """Keys matching a glob pattern (SCAN, so Redis isn't blocked on large keyspaces)."""
+        async def scan():
+            return [k.decode('utf-8') if isinstance(k, bytes) else k
+                    async for k in self.client.scan_iter(match=pattern)]
+        return self._call(scan(), timeout)
+
+    def ping(self, timeout: float = 5.0) -> bool:
+        try:
+            self.healthy = bool(self._call(self.client.ping(), timeout))
+        except Exception:
+            self.healthy = False
+        return self.healthy
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Block until every queued save has been written (or timeout)."""
+        return self._idle.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        self.flush(timeout)
+        self._call(self._shutdown(), timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _shutdown(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        await self.client.aclose()
+
+    # Writer task
+
+    async def _writer(self):
+        backoff = 0.5
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(self.flush_delay)
+
+            with self._lock:
+                batch, self._pending = self._pending, {}
+
+            failed = False
+            for key, producer in batch.items():
+                try:
+                    t0 = time.perf_counter()
+                    payload = producer()
+                    await self.client.set(key, payload)
+                    self.stats['written'] += 1
+                    self.healthy = True
+                    record_persistence('save', 'redis', len(payload), time.perf_counter() - t0)
+                except Exception as e:
+                    print(f"Redis save failed: {e}")
+                    self.stats['failed'] += 1
+                    self.healthy = False
+                    failed = True
+                    with self._lock:
+                        self._pending.setdefault(key, producer)  # keep newer saves if any arrived
+
+            with self._lock:
+                if self._pending:
+                    self._wake.set()
+                else:
+                    self._idle.set()
+
+            if failed:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            else:
+                backoff = 0.5
@@ -0,0 +1,301 @@
+"""
+Generation Pipeline - Dependency graph of generation stages with cached outputs
+
+terrain → corridor:* → place:* → effects → presence:* → signs:*
+
+Every stage is keyed on the rule fragment it reads plus the keys of the stages it
+depends on. Re-running with edited rules only recomputes stages whose key changed;
+everything else is reused from the previous run. Each stage seeds the RNG from
+(seed, stage name), so a reused output is identical to what a full rebuild
+would produce.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, Callable, Optional
+
+from .terrain_generator import TerrainGenerator
+from .species_generator import SpeciesGenerator
+from .profiling import Profiler
+
+
+class GenerationCancelled(Exception):
+    """Raised between stages when a running generation is cancelled."""
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(json.dumps(p, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+def parse_seeds(value: str) -> List[int]:
+    """Seeds from a command-line list of seeds and inclusive ranges, e.g. '1-50,77'."""
+    seeds = []
+    for part in value.split(','):
+        if '-' in part:
+            lo, hi = part.split('-')
+            seeds.extend(range(int(lo), int(hi) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def stage_seed(seed: int, name: str) -> int:
+    """Derive a per-stage RNG seed."""
+    return zlib.crc32(f'{seed}:{name}'.encode('utf-8'))
+
+
+@dataclass
+class Stage:
+    name: str
+    deps: List[str]
+    key: str
+    fn: Callable[[Dict[str, Any]], Any]
+    kind: str = ''
+
+
+class GenerationPipeline:
+    def __init__(self):
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()  # stages seed the global numpy RNG
+        self.last_run: Dict[str, str] = {}
+
+    def build_graph(self, rules: dict, seed: int) -> List[Stage]:
+        """Build stages in topological order for the given rules and seed."""
+        terrain_rules = rules.get('terrain', {})
+        species_rules = rules.get('species', {})
+
+        tgen = TerrainGenerator(terrain_rules)
+        sgen = SpeciesGenerator(species_rules, tgen.terrain_ids)
+        species = sgen.species
+        names = {k: v['name'] for k, v in tgen.terrain_types.items()}
+
+        stages: List[Stage] = []
+        keys: Dict[str, str] = {}
+
+        def add(name, kind, deps, fragment, fn):
+            key = _digest(seed, name, fragment, [keys[d] for d in deps])
+            keys[name] = key
+            stages.append(Stage(name, deps, key, fn, kind))
+
+        # Terrain
+        grid = terrain_rules.get('grid', {})
+        add('terrain', 'terrain', [], {
+            'grid': [grid.get('rows'), grid.get('cols')],
+            'terrain_types': names,
+            **{k: terrain_rules.get(k) for k in ('lake', 'spawn', 'default_terrain', 'grassland_patches')},
+        }, lambda out: tgen.generate_terrain())
+
+        # Corridors
+        corridor_rules = terrain_rules.get('corridors', {})
+        for cname in TerrainGenerator.CORRIDOR_ORDER:
+            if cname not in corridor_rules:
+                continue
+            cfg = {k: v for k, v in corridor_rules[cname].items() if k not in ('color', 'description')}
+            add(f'corridor:{cname}', 'corridor', ['terrain'], {'cfg': cfg, 'terrain_types': names},
+                lambda out, c=cname: tgen.generate_corridor(c, out['terrain']))
+
+        # Per-species placement (presence roll + placement)
+        order = sgen.placement_order()
+        for sp_id in order:
+            sp = species[sp_id]
+            dist = sp.get('distribution', {})
+            deps = ['terrain'] + [f'corridor:{c}' for c in dist.get('corridor_bonus', {}) if f'corridor:{c}' in keys]
+
+            def place(out, sp_id=sp_id, deps=deps):
+                corridors = {d.split(':', 1)[1]: out[d] for d in deps if d.startswith('corridor:')}
+                present = sgen.roll_presence(sp_id)
+                locs = sgen.place(sp_id, out['terrain'], corridors) if present else []
+                return {'present': present, 'locs': locs}
+
+            add(f'place:{sp_id}', 'place', deps,
+                {'distribution': dist, 'category': sp.get('category'), 'terrain_types': names}, place)
+
+        # Effects (exclusion/damage fields from human presence and source species)
+        sources = sgen.effect_sources()
+
+        def effects(out):
+            locations = {s: out[f'place:{s}']['locs'] for s in sources}
+            return sgen.process_effects(locations, out['terrain'])
+
+        add('effects', 'effects', ['terrain'] + [f'place:{s}' for s in sources], {
+            'human': species_rules.get('_human_presence', {}),
+            'tags': sgen.tags,
+            'categories': {s: d.get('category') for s, d in species.items()},
+            'effects': {s: [e for e in species[s].get('effects', []) if e.get('effect') != 'creates_sign'] for s in sources},
+            'terrain_types': names,
+        }, effects)
+
+        # Final presence per species (exclusion filtering + damage states)
+        targets = sgen.effect_targets()
+        empty = {'probability': {}, 'states': {}}
+        for sp_id in order:
+            deps = [f'place:{sp_id}'] + (['effects'] if sp_id in targets else [])
+
+            def presence(out, sp_id=sp_id, deps=deps):
+                modifiers = out['effects'] if 'effects' in deps else empty
+                locs = sgen.filter_locations(sp_id, out[f'place:{sp_id}']['locs'], modifiers)
+                return {'locs': locs, 'presence': sgen.build_presence(sp_id, locs, modifiers, out['terrain'].shape)}
+
+            state_defs = {d: sgen.state_defs.get(d) for d in targets.get(sp_id, [])}
+            add(f'presence:{sp_id}', 'presence', deps + ['terrain'], {'state_defs': state_defs}, presence)
+
+        # Signs per species
+        for sp_id in order:
+            sign_effects = [e for e in species[sp_id].get('effects', []) if e.get('effect') == 'creates_sign']
+            if not sign_effects:
+                continue
+            add(f'signs:{sp_id}', 'signs', ['terrain', f'presence:{sp_id}'],
+                {'effects': sign_effects, 'terrain_types': names},
+                lambda out, sp_id=sp_id: sgen.species_signs(sp_id, out[f'presence:{sp_id}']['locs'], out['terrain']))
+
+        return stages
+
+    def stage_outputs(self) -> Dict[str, Any]:
+        """Output of every stage of the last run, in run order."""
+        return {name: self._cache[name][1] for name in self.last_run}
+
+    def plan(self, rules: dict, seed: int) -> List[str]:
+        """Names of the stages a run with these rules would recompute."""
+        return [s.name for s in self.build_graph(rules, seed)
+                if self._cache.get(s.name, (None,))[0] != s.key]
+
+    def run(
+        self,
+        rules: dict,
+        seed: int,
+        progress: Optional[Callable[[dict], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """Run the graph, reusing cached stage outputs whose key is unchanged.
+
+        progress receives {'event': 'plan', 'stages': [...]} once, then
+        {'event': 'stage', 'stage', 'status', 'seconds'} after every stage.
+        cancelled is polled between stages; returning True raises GenerationCancelled.
+        """
+        with self._lock:
+            return self._run(rules, seed, progress or (lambda e: None), cancelled or (lambda: False))
+
+    def _run(self, rules: dict, seed: int, progress: Callable, cancelled: Callable) -> Dict[str, Any]:
+        stages = self.build_graph(rules, seed)
+        out: Dict[str, Any] = {}
+        self.last_run = {}
+        progress({'event': 'plan', 'stages': [s.name for s in stages]})
+
+        for stage in stages:
+            if cancelled():
+                raise GenerationCancelled(f"cancelled before {stage.name}")
+
+            t0 = time.perf_counter()
+            cached = self._cache.get(stage.name)
+            if cached and cached[0] == stage.key:
+                out[stage.name] = cached[1]
+                self.last_run[stage.name] = 'cached'
+            else:
+                np.random.seed(stage_seed(seed, stage.name))
+                out[stage.name] = stage.fn(out)
+                self._cache[stage.name] = (stage.key, out[stage.name])
+                self.last_run[stage.name] = 'computed'
+
+            progress({'event': 'stage', 'stage': stage.name, 'status': self.last_run[stage.name],
+                      'seconds': time.perf_counter() - t0})
+
+        # Drop stages that no longer exist in the rules
+        live = {s.name for s in stages}
+        for name in list(self._cache):
+            if name not in live:
+                del self._cache[name]
+
+        return self._assemble(stages, out, rules)
+
+    def _assemble(self, stages: List[Stage], out: Dict[str, Any], rules: dict) -> Dict[str, Any]:
+        corridors, presence, signs = {}, {}, []
+        rolled = {}
+        species = rules.get('species', {}).get('species', {})
+
+        for stage in stages:
+            name = stage.name.split(':', 1)[-1]
+            if stage.kind == 'corridor':
+                corridors[name] = out[stage.name]
+            elif stage.kind == 'place':
+                rolled[name] = out[stage.name]['present']
+            elif stage.kind == 'presence':
+                presence[name] = out[stage.name]['presence']
+            elif stage.kind == 'signs':
+                signs.extend(out[stage.name])
+
+        # Species outside the placement categories are never rolled
+        predator_presence = {sp_id: rolled.get(sp_id, True) for sp_id in species}
+        predator_presence['_human_presence'] = True
+
+        return {
+            'terrain': out['terrain'],
+            'corridors': corridors,
+            'presence': presence,
+            'signs': SpeciesGenerator.dedupe_signs(signs),
+            'predator_presence': predator_presence,
+        }
+
+
+_worker_pipeline = None
+
+
+def run_pipeline(rules: dict, seed: int, events=None, cancel=None, profile=None):
+    """Process-pool entry point. Each worker process keeps its own stage cache.
+
+    events/cancel are optional multiprocessing Manager Queue/Event proxies for
+    relaying progress and cancellation across the process boundary. profile,
+    if given, is (profiles directory, alloc) and the run is profiled here.
+    """
+    global _worker_pipeline
+    if _worker_pipeline is None:
+        _worker_pipeline = GenerationPipeline()
+    run = lambda: _worker_pipeline.run(
+        rules, seed,
+        progress=events.put if events is not None else None,
+        cancelled=cancel.is_set if cancel is not None else None,
+    )
+    if profile is None:
+        result = run()
+    else:
+        directory, alloc = profile
+        with Profiler(directory).profile(f'pipeline-{seed}', alloc=alloc):
+            result = run()
+    return result, dict(_worker_pipeline.last_run)
+
+
+class GenerationPool(Executor):
+    """A one-process pool for run_pipeline, started on the first submit.
+
+    Every worker of a multi-worker server gets one, but only the worker that
+    actually generates (and so publishes the shared snapshot) spawns the
+    process; the rest just attach to what it publishes.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
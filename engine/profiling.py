@@ -0,0 +1,204 @@
+"""
+Profiling - Opt-in cProfile/tracemalloc reports for generation and requests
+
+`Profiler.profile(name)` runs a block under cProfile (and tracemalloc when
+alloc=True) and writes `<id>.txt` (top functions by cumulative and own time,
+top allocation sites) plus `<id>.prof` (raw stats for snakeviz/pstats) into
+the profiles directory. Nothing here is installed unless profiling is switched
+on, so disabled hooks cost nothing on the request path.
+
+Sync FastAPI endpoints run in a worker thread and cProfile only sees the
+thread it was enabled on, so requests are profiled by `profiled_endpoint()`,
+which wraps the endpoint call itself; `ProfilingMiddleware` only decides which
+requests to profile (sampled, or ?profile=cpu|alloc) and passes that down in
+a context variable.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import functools
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+from urllib.parse import parse_qs
+
+PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9]+\.[0-9]+-[A-Za-z0-9_.-]+$')
+MODES = ('cpu', 'alloc')
+
+# (profiler, profile id, mode) for the request being handled, set by the middleware
+_request: contextvars.ContextVar = contextvars.ContextVar('profile_request', default=None)
+
+
+class Profiler:
+    def __init__(self, directory: str = 'data/profiles', generate: Optional[str] = None,
+                 keep: int = 50, top: int = 40):
+        self.dir = directory
+        self.generate = generate  # None, 'cpu' or 'alloc': profile every world generation
+        self.keep = keep
+        self.top = top
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def new_id(self, name: str) -> str:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')[:60] or 'profile'
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.{seq}-{safe}"
+
+    @contextlib.contextmanager
+    def profile(self, name: str, alloc: bool = False, profile_id: str = None):
+        """Profile the with-block and write its report; yields the profile id."""
+        profile_id = profile_id or self.new_id(name)
+        # tracemalloc is process-wide; if another profile is tracing, this one goes without
+        trace = alloc and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()  # one frame per allocation: enough for per-line sites, far cheaper
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            yield profile_id
+        finally:
+            prof.disable()
+            seconds = time.perf_counter() - t0
+            snapshot = peak = None
+            if trace:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            try:
+                self._write(profile_id, name, seconds, prof, snapshot, peak, alloc and not trace)
+            except OSError as e:
+                print(f"Profile write failed: {e}")
+
+    def _write(self, profile_id: str, name: str, seconds: float, prof: cProfile.Profile,
+               snapshot, peak: Optional[int], alloc_skipped: bool):
+        os.makedirs(self.dir, exist_ok=True)
+        prof.dump_stats(os.path.join(self.dir, f'{profile_id}.prof'))
+
+        out = io.StringIO()
+        out.write(f"{name}  pid {os.getpid()}  {seconds:.3f}s wall\n\n")
+        stats = pstats.Stats(prof, stream=out).strip_dirs()
+        out.write(f"== Top {self.top} functions by cumulative time ==\n")
+        stats.sort_stats('cumulative').print_stats(self.top)
+        out.write(f"== Top {self.top} functions by own time ==\n")
+        stats.sort_stats('tottime').print_stats(self.top)
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            out.write(f"== Top {self.top} allocation sites (peak {peak / 1024:.0f} KB) ==\n")
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                out.write(f"{stat.size / 1024:10.1f} KB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+        elif alloc_skipped:
+            out.write("(allocation tracing skipped: another profile was already tracing)\n")
+
+        tmp = os.path.join(self.dir, f'{profile_id}.txt.tmp')
+        with open(tmp, 'w') as f:
+            f.write(out.getvalue())
+        os.replace(tmp, os.path.join(self.dir, f'{profile_id}.txt'))
+        self._prune()
+
+    def _prune(self):
+        reports = sorted(f for f in os.listdir(self.dir) if f.endswith('.txt'))
+        for old in reports[:max(0, len(reports) - self.keep)]:
+            for ext in ('.txt', '.prof'):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.dir, old[:-4] + ext))
+
+    def list(self) -> List[dict]:
+        """Reports on disk, newest first."""
+        if not os.path.isdir(self.dir):
+            return []
+        result = []
+        for f in sorted(os.listdir(self.dir), reverse=True):
+            if not f.endswith('.txt') or not PROFILE_ID.match(f[:-4]):
+                continue
+            st = os.stat(os.path.join(self.dir, f))
+            result.append({'id': f[:-4], 'name': f[:-4].split('-', 2)[2], 'created': st.st_mtime,
+                           'bytes': st.st_size})
+        return result
+
+    def path(self, profile_id: str, ext: str = 'txt') -> Optional[str]:
+        """File for a report id, or None if the id is malformed or unknown."""
+        if not PROFILE_ID.match(profile_id) or ext not in ('txt', 'prof'):
+            return None
+        path = os.path.join(self.dir, f'{profile_id}.{ext}')
+        return path if os.path.exists(path) else None
+
+
+def profiled_endpoint(call: Callable, name: str) -> Callable:
+    """Wrap a sync endpoint so it runs under the profile the middleware requested, if any."""
+    @functools.wraps(call)
+    def profiled(*args, **kwargs):
+        req = _request.get()
+        if req is None:
+            return call(*args, **kwargs)
+        profiler, profile_id, mode = req
+        with profiler.profile(name, alloc=mode == 'alloc', profile_id=profile_id):
+            return call(*args, **kwargs)
+    return profiled
+
+
+def admin_authorized(token: Optional[str], given: Optional[str]) -> bool:
+    """True if given (an X-Admin-Token header) matches token; always False when no token is configured."""
+    return bool(token) and given is not None and hmac.compare_digest(given.encode(), token.encode())
+
+
+class ProfilingMiddleware:
+    """Marks a fraction `sample` of HTTP requests (and, if `query`, any with
+    ?profile=cpu|alloc sent with the admin token) for profiling. Only
+    endpoints wrapped by profiled_endpoint() produce a report; its id is
+    returned in X-Profile-Id.
+    """
+
+    def __init__(self, app, profiler: Profiler, sample: float = 0.0, query: bool = False,
+                 token: Optional[str] = None):
+        self.app = app
+        self.profiler = profiler
+        self.sample = sample
+        self.query = query
+        self.token = token
+
+    def _admin(self, scope) -> bool:
+        given = dict(scope.get('headers') or []).get(b'x-admin-token')
+        return admin_authorized(self.token, given.decode('latin-1') if given is not None else None)
+
+    def _mode(self, scope) -> Optional[str]:
+        if self.query and b'profile=' in scope.get('query_string', b'') and self._admin(scope):
+            value = parse_qs(scope['query_string'].decode('latin-1')).get('profile', [''])[0]
+            return 'alloc' if value == 'alloc' else 'cpu'
+        if self.sample and random.random() < self.sample:
+            return 'cpu'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        mode = self._mode(scope) if scope['type'] == 'http' else None
+        if mode is None:
+            return await self.app(scope, receive, send)
+
+        profile_id = self.profiler.new_id(scope.get('path', 'request').strip('/').replace('/', '_'))
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start' and self.profiler.path(profile_id):
+                message = {**message, 'headers': [*message.get('headers', []),
+                                                  (b'x-profile-id', profile_id.encode('ascii'))]}
+            await send(message)
+
+        token = _request.set((self.profiler, profile_id, mode))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request.reset(token)
@@ -0,0 +1,171 @@
+"""
+Registry - Many independent worlds keyed by id, resident under a memory budget
+
+Each world has its own StateManager with a snapshot directory under
+`<data_dir>/worlds/<id>/` and its own Redis key. Worlds load lazily on first
+access; when the resident worlds exceed the memory budget the least recently
+used ones are written to their snapshot and dropped, so an idle world costs
+only disk.
+"""
+
+import collections
+import os
+import re
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from .state_manager import StateManager
+
+WORLD_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class WorldStats:
+    def __init__(self):
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.last_access = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.loads
+        return round(self.hits / total, 4) if total else 0.0
+
+
+class WorldRegistry:
+    DEFAULT = 'default'
+
+    def __init__(self, rules: dict, data_dir: str = 'data', executor: Executor = None, store=None,
+                 memory_bytes: int = 256 << 20, default: StateManager = None, profiler=None):
+        self.rules = rules
+        self.dir = os.path.join(data_dir, 'worlds')
+        self.executor = executor
+        self.store = store
+        self.memory_bytes = memory_bytes
+        self.profiler = profiler
+        self._resident: 'collections.OrderedDict[str, StateManager]' = collections.OrderedDict()
+        self._stats: Dict[str, WorldStats] = collections.defaultdict(WorldStats)
+        self._loading: Dict[str, threading.Lock] = collections.defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self._pinned = set()
+        if default is not None:
+            self._resident[self.DEFAULT] = default
+            self._pinned.add(self.DEFAULT)
+            self._touch(self.DEFAULT, default, hit=False)  # loaded at startup, served through get() after
+
+    def _manager(self, world_id: str) -> StateManager:
+        return StateManager(self.rules, data_dir=os.path.join(self.dir, world_id), executor=self.executor,
+                            store=self.store, redis_key=f'{StateManager.REDIS_KEY}:{world_id}', profiler=self.profiler)
+
+    def get(self, world_id: str, create: bool = False, seed: int = 42) -> StateManager:
+        """Resident manager for world_id, loading its snapshot on a miss.
+
+        Raises KeyError if the world has no snapshot and create is False, and
+        ValueError for ids that aren't safe directory names.
+        """
+        if not WORLD_ID.match(world_id):
+            raise ValueError(f"Invalid world id '{world_id}'")
+        with self._lock:
+            sm = self._resident.get(world_id)
+            if sm is not None:
+                return self._touch(world_id, sm, hit=True)
+
+        with self._loading[world_id]:
+            with self._lock:
+                sm = self._resident.get(world_id)
+                if sm is not None:
+                    return self._touch(world_id, sm, hit=True)
+
+            sm = self._manager(world_id)
+            t0 = time.perf_counter()
+            if not sm.load_existing():
+                if not create:
+                    raise KeyError(world_id)
+                sm.generate(seed)
+            print(f"World '{world_id}' resident ({sm.world.nbytes // 1024} KB, {time.perf_counter() - t0:.2f}s)")
+
+            with self._lock:
+                self._resident[world_id] = sm
+                self._touch(world_id, sm, hit=False)
+                evicted = self._evict(keep=world_id)
+        for wid, old in evicted:
+            old.save()
+            print(f"World '{wid}' evicted to disk")
+        return sm
+
+    def _touch(self, world_id: str, sm: StateManager, hit: bool) -> StateManager:
+        st = self._stats[world_id]
+        if hit:
+            st.hits += 1
+        else:
+            st.loads += 1
+        st.last_access = time.time()
+        self._resident.move_to_end(world_id)
+        return sm
+
+    def _evict(self, keep: str) -> List[tuple]:
+        """Drop LRU unpinned worlds until within budget (caller holds _lock).
+        
+        Worlds with open sessions or a running regeneration stay resident: a
+        session or job holds its manager, and a second manager loaded for the
+        same world would diverge from it.
+        """
+        evicted = []
+        for wid in list(self._resident):
+            if self.resident_bytes() <= self.memory_bytes:
+                break
+            sm = self._resident[wid]
+            if wid == keep or wid in self._pinned or sm.subscribed or sm.jobs.busy:
+                continue
+            evicted.append((wid, self._resident.pop(wid)))
+            self._stats[wid].evictions += 1
+        return evicted
+
+    def resident(self) -> List[tuple]:
+        """(world_id, manager) for every resident world."""
+        with self._lock:
+            return list(self._resident.items())
+
+    def resident_bytes(self) -> int:
+        return sum(sm.world.nbytes for sm in self._resident.values() if sm.world is not None)
+
+    def known(self) -> List[str]:
+        """Resident worlds plus those with a snapshot on disk or in the store."""
+        ids = set(os.listdir(self.dir) if os.path.isdir(self.dir) else [])
+        if self.store is not None:
+            prefix = f'{StateManager.REDIS_KEY}:'
+            try:
+                ids.update(k[len(prefix):] for k in self.store.keys(prefix + '*'))
+            except Exception as e:
+                print(f"Listing worlds in Redis failed: {e}")
+        with self._lock:
+            return sorted(set(self._resident) | {w for w in ids if WORLD_ID.match(w)})
+
+    def stats(self, world_id: str) -> dict:
+        with self._lock:
+            sm = self._resident.get(world_id)
+            st = self._stats.get(world_id) or WorldStats()
+            w = sm.world if sm is not None else None
+            return {
+                'id': world_id,
+                'resident': w is not None,
+                'resident_bytes': w.nbytes if w is not None else 0,
+                'version': w.version if w is not None else None,
+                'seed': w.seed if w is not None else None,
+                'hits': st.hits,
+                'loads': st.loads,
+                'evictions': st.evictions,
+                'hit_rate': st.hit_rate,
+                'last_access': st.last_access or None,
+            }
+
+    def summary(self) -> dict:
+        worlds = [self.stats(w) for w in self.known()]
+        with self._lock:
+            return {'memory_budget': self.memory_bytes, 'resident_bytes': self.resident_bytes(), 'worlds': worlds}
+
+    def set_rules(self, rules: dict):
+        """Rules used for worlds loaded or created from now on."""
+        self.rules = rules
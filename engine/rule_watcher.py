@@ -0,0 +1,78 @@
+"""
+Rule Watcher - Polls rule files and hands validated rule changes to a callback
+"""
+
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+from .rules import rule_paths, load_rules, validate_rules
+
+
+class RuleWatcher:
+    def __init__(self, rules_dir: str, on_change: Callable[[dict], None], interval: float = 2.0):
+        self.rules_dir = rules_dir
+        self.on_change = on_change
+        self.interval = interval
+        self._mtimes: Dict[str, float] = {}
+        self._hashes: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.poll()  # baseline: the rules already loaded don't count as a change
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='rule-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Rule reload failed: {e}")
+
+    def poll(self) -> bool:
+        """Refresh mtimes/hashes; True if any file's content changed, or a file appeared or went away.
+
+        Files are only re-read when their mtime moved, so a touch alone never
+        counts as a change.
+        """
+        hashes: Dict[str, str] = {}
+        mtimes: Dict[str, float] = {}
+        for path in rule_paths(self.rules_dir).values():
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue  # missing (optional files may come and go)
+            mtimes[path] = mtime
+            if self._mtimes.get(path) == mtime and path in self._hashes:
+                hashes[path] = self._hashes[path]
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    hashes[path] = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                mtimes.pop(path)
+        changed = hashes != self._hashes
+        self._mtimes, self._hashes = mtimes, hashes
+        return changed
+
+    def check(self) -> bool:
+        """Reload and validate rules if they changed; True if on_change was called."""
+        if not self.poll():
+            return False
+
+        rules = load_rules(self.rules_dir)
+        errors = validate_rules(rules)
+        if errors:
+            print(f"Rules changed but invalid, keeping current world: {'; '.join(errors)}")
+            return False
+
+        print("Rules changed, regenerating world...")
+        self.on_change(rules)
+        return True
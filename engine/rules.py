@@ -0,0 +1,143 @@
+"""
+Rules - Loading and validation of the designer-editable YAML rule files
+"""
+
+import os
+import yaml
+from typing import Dict, List
+
+RULE_FILES = {'terrain': 'terrain_init.yaml', 'species': 'species_init.yaml', 'seasons': 'seasons.yaml'}
+OPTIONAL_RULES = {'seasons'}  # loaded as {} when the file doesn't exist
+
+# Terrain names the generators look up directly
+REQUIRED_TERRAIN = ['deep_water', 'shallow_water', 'grassland', 'platform']
+
+TIMES_OF_DAY = ['dawn', 'morning', 'midday', 'afternoon', 'dusk', 'night']
+
+
+def rule_paths(rules_dir: str = 'rules') -> Dict[str, str]:
+    return {k: os.path.join(rules_dir, f) for k, f in RULE_FILES.items()}
+
+
+def load_rules(rules_dir: str = 'rules') -> dict:
+    """Load the rule files into the {'terrain': ..., 'species': ..., 'seasons': ...} dict."""
+    rules = {}
+    for key, path in rule_paths(rules_dir).items():
+        if key in OPTIONAL_RULES and not os.path.exists(path):
+            rules[key] = {}
+            continue
+        with open(path) as f:
+            rules[key] = yaml.safe_load(f) or {}
+    return rules
+
+
+def validate_rules(rules: dict) -> List[str]:
+    """Return a list of problems that would break generation (empty if valid)."""
+    errors = []
+    terrain = rules.get('terrain') or {}
+    species_rules = rules.get('species') or {}
+
+    grid = terrain.get('grid') or {}
+    for k in ('rows', 'cols'):
+        if not isinstance(grid.get(k), int) or grid.get(k) <= 0:
+            errors.append(f"grid.{k} must be a positive integer")
+
+    types = terrain.get('terrain_types') or {}
+    names = set()
+    for k, v in types.items():
+        if not isinstance(v, dict) or 'name' not in v or 'color' not in v:
+            errors.append(f"terrain_types.{k} needs name and color")
+        else:
+            names.add(v['name'])
+    for name in REQUIRED_TERRAIN:
+        if name not in names:
+            errors.append(f"terrain_types is missing '{name}'")
+
+    def check(name, where):
+        if name not in names:
+            errors.append(f"{where}: unknown terrain '{name}'")
+
+    lake = terrain.get('lake')
+    if not lake:
+        errors.append("lake is required")
+    else:
+        for i, zone in enumerate(lake.get('zones', [])):
+            t = zone.get('terrain')
+            for n in (t if isinstance(t, list) else [t]):
+                check(n, f"lake.zones[{i}]")
+
+    default = terrain.get('default_terrain') or {}
+    for n in default.get('options', []):
+        check(n, 'default_terrain')
+    if abs(sum(default.get('weights', [])) - 1.0) > 1e-6:
+        errors.append("default_terrain.weights must sum to 1")
+
+    spawn = terrain.get('spawn') or {}
+    if not (0 <= spawn.get('x', -1) < grid.get('cols', 0) and 0 <= spawn.get('y', -1) < grid.get('rows', 0)):
+        errors.append("spawn must lie inside the grid")
+
+    corridors = terrain.get('corridors') or {}
+    for n in corridors.get('water_edge', {}).get('source_terrain', []):
+        check(n, 'corridors.water_edge')
+    endpoints = corridors.get('game_trail', {}).get('endpoints')
+    if 'game_trail' in corridors and not endpoints:
+        errors.append("corridors.game_trail needs endpoints")
+    for side in ('from', 'to'):
+        for n in (endpoints or {}).get(side, []):
+            check(n, f'corridors.game_trail.endpoints.{side}')
+
+    state_defs = species_rules.get('state_definitions') or {}
+    for sp_id, sp in (species_rules.get('species') or {}).items():
+        dist = sp.get('distribution') or {}
+        for k in ('group_size', 'stand_radius', 'trees_per_stand', 'stems_per_clump'):
+            v = dist.get(k, (dist.get('clustering') or {}).get(k))
+            if v is not None and (not isinstance(v, list) or len(v) != 2):
+                errors.append(f"species.{sp_id}: {k} must be [min, max]")
+        for eff in sp.get('effects', []):
+            sd = (eff.get('params') or {}).get('state_definition')
+            if eff.get('effect') == 'damages' and sd not in state_defs:
+                errors.append(f"species.{sp_id}: unknown state_definition '{sd}'")
+
+    movement = species_rules.get('movement') or {}
+    for corridor in movement.get('corridor_bias') or {}:
+        if corridor not in ('water_edge', 'ecotone', 'game_trail'):
+            errors.append(f"movement.corridor_bias: unknown corridor '{corridor}'")
+    for tag, times in (movement.get('activity') or {}).items():
+        for t in times or []:
+            if t not in TIMES_OF_DAY:
+                errors.append(f"movement.activity.{tag}: unknown time of day '{t}'")
+
+    errors.extend(_validate_seasons(rules.get('seasons') or {}, species_rules))
+    return errors
+
+
+def _validate_seasons(seasons: dict, species_rules: dict) -> List[str]:
+    errors = []
+    species = species_rules.get('species') or {}
+    state_defs = species_rules.get('state_definitions') or {}
+
+    months = seasons.get('months') or {}
+    for m, info in months.items():
+        if not (isinstance(m, int) and 1 <= m <= 12):
+            errors.append(f"seasons.months: {m} is not a month number (1-12)")
+        elif not isinstance(info, dict) or 'name' not in info or 'season' not in info:
+            errors.append(f"seasons.months.{m} needs name and season")
+    start = seasons.get('start_month', 4)
+    if not (isinstance(start, int) and 1 <= start <= 12):
+        errors.append("seasons.start_month must be a month number (1-12)")
+
+    for sp_id in seasons.get('species') or {}:
+        if sp_id not in species:
+            errors.append(f"seasons.species: unknown species '{sp_id}'")
+    for sp_id in seasons.get('damage') or {}:
+        if not any(e.get('effect') == 'damages' for e in species.get(sp_id, {}).get('effects', [])):
+            errors.append(f"seasons.damage: species '{sp_id}' has no damages effect")
+    for sd, states in (seasons.get('recovery') or {}).items():
+        known = (state_defs.get(sd) or {}).get('states')
+        if known is None:
+            errors.append(f"seasons.recovery: unknown state_definition '{sd}'")
+            continue
+        for state, rule in (states or {}).items():
+            if state not in known or (rule or {}).get('to', 1) not in known:
+                errors.append(f"seasons.recovery.{sd}.{state}: unknown state")
+    return errors
@@ -0,0 +1,305 @@
+"""
+Seasons - Monthly simulation of presence, damage states and signs
+
+`SeasonEngine.tick(world)` moves a World on by one month as described in
+rules/seasons.yaml and returns the new snapshot with the names of the layers
+it changed. Every update is a whole-array operation: influence fields are a
+distance transform of the source species' presence rather than per-cell
+loops, and each rule is one random draw over the grid. Layers a month leaves
+alone are carried over by reference, so anything keyed on array identity
+(observation states, session diffs) stays valid for them.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.ndimage import binary_dilation, distance_transform_edt
+
+from .metrics import log_event
+from .world import World
+
+DEFAULT_MONTHS = {
+    1: ('January', 'winter'), 2: ('February', 'winter'), 3: ('March', 'spring'),
+    4: ('April', 'spring'), 5: ('May', 'spring'), 6: ('June', 'summer'),
+    7: ('July', 'summer'), 8: ('August', 'summer'), 9: ('September', 'autumn'),
+    10: ('October', 'autumn'), 11: ('November', 'autumn'), 12: ('December', 'winter'),
+}
+NEIGHBOURS = np.ones((3, 3), dtype=bool)
+
+
+def calendar(seasons: dict) -> Dict[int, dict]:
+    """month number → {'name', 'season'}, from seasons.yaml over the defaults."""
+    months = {m: {'name': name, 'season': season} for m, (name, season) in DEFAULT_MONTHS.items()}
+    for m, info in (seasons.get('months') or {}).items():
+        months[int(m)] = {**months.get(int(m), {}), **(info or {})}
+    return months
+
+
+def start_month(rules: dict) -> Tuple[int, str]:
+    """(month, season) a newly generated world starts in."""
+    seasons = rules.get('seasons') or {}
+    month = int(seasons.get('start_month', 4))
+    return month, calendar(seasons)[month]['season']
+
+
+def monthly(value, month: int, season: str) -> float:
+    """A seasons.yaml rate for this month: a number, or a map by month, season or default."""
+    if value is None:
+        return 0.0
+    if not isinstance(value, dict):
+        return float(value)
+    for key in (month, str(month), season, 'default'):
+        if key in value:
+            return float(value[key])
+    return 0.0
+
+
+def _targets(species_rules: dict, spec: dict) -> List[str]:
+    """Species an effect's `targets` ({tag: ...} and/or {category: ...}) refer to."""
+    targets = list((species_rules.get('tags') or {}).get(spec.get('tag'), []))
+    if 'category' in spec:
+        cats = spec['category'] if isinstance(spec['category'], list) else [spec['category']]
+        targets += [sp for sp, d in species_rules.get('species', {}).items() if d.get('category') in cats]
+    return targets
+
+
+class SeasonEngine:
+    def __init__(self):
+        # (rules digest, terrain array id) → species → suitability in [0, 1]
+        self._habitat: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    def habitat(self, w: World, sp_id: str) -> np.ndarray:
+        """Suitability of each cell for a species: terrain_weights x corridor_bonus, scaled to max 1."""
+        key = (w.rules_digest, id(w.terrain))
+        if key not in self._habitat:
+            self._habitat = {key: {}}  # only the current world's fields are kept
+        fields = self._habitat[key]
+        if sp_id not in fields:
+            dist = w.species.get(sp_id, {}).get('distribution', {})
+            lut = np.zeros(max(w.terrain_types, default=0) + 1, dtype=np.float32)
+            for name, weight in (dist.get('terrain_weights') or {}).items():
+                if name in w.terrain_ids:
+                    lut[w.terrain_ids[name]] = weight
+            field = lut[w.terrain]
+            for corridor, bonus in (dist.get('corridor_bonus') or {}).items():
+                mask = w.corridors.get(corridor)
+                if mask is not None:
+                    field = np.where(mask, field * bonus, field)
+            top = field.max()
+            fields[sp_id] = field / top if top > 0 else field
+        return fields[sp_id]
+
+    def tick(self, w: World, rng: np.random.Generator = None) -> Tuple[World, List[str], Dict[str, float]]:
+        """One month on: (new world, changed layer names, seconds per phase)."""
+        rng = rng or np.random.default_rng()
+        cfg = w.rules.get('seasons') or {}
+        months = calendar(cfg)
+        month = w.month % 12 + 1
+        season = months[month]['season']
+        at = lambda value: monthly(value, month, season)
+
+        presence = dict(w.species_presence)
+        changed: List[str] = []
+        timings: Dict[str, float] = {}
+        distances: Dict[str, np.ndarray] = {}
+
+        def distance(sp_id: str) -> np.ndarray:
+            """Cells to the nearest occupied cell of sp_id (this month's presence)."""
+            if sp_id not in distances:
+                distances[sp_id] = distance_transform_edt(presence[sp_id] == 0)
+            return distances[sp_id]
+
+        def update(sp_id: str, arr: np.ndarray):
+            presence[sp_id] = arr
+            distances.pop(sp_id, None)
+            if f'presence:{sp_id}' not in changed:
+                changed.append(f'presence:{sp_id}')
+
+        t0 = time.perf_counter()
+        for sp_id, sp_cfg in (cfg.get('species') or {}).items():
+            if sp_id in presence:
+                arr = self._presence_step(w, sp_id, presence[sp_id], sp_cfg or {}, at, rng)
+                if arr is not None:
+                    update(sp_id, arr)
+        timings['presence'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        self._damage(w, cfg, presence, distance, update, at, rng)
+        self._recovery(w, cfg, presence, update, at, rng)
+        timings['states'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        signs = self._signs(w, cfg, presence, distance, at, rng)
+        if signs is not w.signs:
+            changed.append('signs')
+        timings['signs'] = time.perf_counter() - t0
+
+        world = w.with_changes(month=month, season=season, species_presence=presence, signs=signs)
+        return world, changed, timings
+
+    # Phases
+
+    def _presence_step(self, w: World, sp_id: str, arr: np.ndarray, sp_cfg: dict, at: Callable,
+                       rng: np.random.Generator) -> Optional[np.ndarray]:
+        die_back, spread, establish = at(sp_cfg.get('die_back')), at(sp_cfg.get('spread')), at(sp_cfg.get('establish'))
+        if not (die_back or spread or establish):
+            return None
+
+        occupied = arr > 0
+        lost = occupied & (rng.random(arr.shape, dtype=np.float32) < die_back) if die_back else None
+        gained = None
+        if spread or establish:
+            chance = np.full(arr.shape, establish, dtype=np.float32)
+            if spread and occupied.any():
+                chance += spread * binary_dilation(occupied, NEIGHBOURS)
+            gained = ~occupied & (rng.random(arr.shape, dtype=np.float32) < chance * self.habitat(w, sp_id))
+
+        if (lost is None or not lost.any()) and (gained is None or not gained.any()):
+            return None
+        out = np.array(arr)
+        if lost is not None:
+            out[lost] = 0
+        if gained is not None:
+            out[gained] = 1
+        return out
+
+    def _damage(self, w: World, cfg: dict, presence: dict, distance: Callable, update: Callable, at: Callable,
+                rng: np.random.Generator):
+        """Advance damage states within reach of each source species' `damages` effects."""
+        state_defs = w.species_rules.get('state_definitions') or {}
+        for src, rate_cfg in (cfg.get('damage') or {}).items():
+            rate = at(rate_cfg)
+            if not rate or src not in presence or not presence[src].any():
+                continue
+            for eff in w.species.get(src, {}).get('effects', []):
+                if eff.get('effect') != 'damages':
+                    continue
+                params = eff.get('params', {})
+                radius = max(1, params.get('radius', 5))
+                states = (state_defs.get(params.get('state_definition')) or {}).get('states') or {}
+                if not states:
+                    continue
+                top = max(int(s) for s in states)
+                influence = np.clip(1 - distance(src) / radius, 0, None) * (params.get('probability', 0.5) * rate)
+                for t in _targets(w.species_rules, eff.get('targets', {})):
+                    arr = presence.get(t)
+                    if arr is None:
+                        continue
+                    hit = (arr > 0) & (arr < top) & (rng.random(arr.shape, dtype=np.float32) < influence)
+                    if hit.any():
+                        out = np.array(arr)
+                        out[hit] += 1
+                        update(t, out)
+
+    def _recovery(self, w: World, cfg: dict, presence: dict, update: Callable, at: Callable,
+                  rng: np.random.Generator):
+        recovery = cfg.get('recovery') or {}
+        if not recovery:
+            return
+        defs_of: Dict[str, set] = {}  # species → state definitions its damage comes from
+        for src, d in w.species.items():
+            for eff in d.get('effects', []):
+                if eff.get('effect') == 'damages':
+                    for t in _targets(w.species_rules, eff.get('targets', {})):
+                        defs_of.setdefault(t, set()).add(eff.get('params', {}).get('state_definition'))
+
+        for sp_id, defs in defs_of.items():
+            arr = presence.get(sp_id)
+            if arr is None:
+                continue
+            out = None
+            for d in defs:
+                for state, rule in (recovery.get(d) or {}).items():
+                    rate = at(rule.get('rate'))
+                    if not rate:
+                        continue
+                    hit = (arr == int(state)) & (rng.random(arr.shape, dtype=np.float32) < rate)
+                    if hit.any():
+                        out = np.array(arr) if out is None else out
+                        out[hit] = int(rule.get('to', 1))
+            if out is not None:
+                update(sp_id, out)
+
+    def _signs(self, w: World, cfg: dict, presence: dict, distance: Callable, at: Callable,
+               rng: np.random.Generator) -> tuple:
+        """Decay existing signs and roll new ones around this month's presence."""
+        sign_cfg = cfg.get('signs') or {}
+        decay = sign_cfg.get('decay') or {}
+        species_cfg = cfg.get('species') or {}
+        rows, cols = w.shape
+
+        kept = list(w.signs)
+        if kept and decay:
+            types = sorted({s['type'] for s in kept})
+            rates = np.array([at(decay.get(t, decay.get('default'))) for t in types])
+            codes = np.searchsorted(types, [s['type'] for s in kept])
+            survive = rng.random(len(kept)) >= rates[codes]
+            if not survive.all():
+                kept = [s for s, k in zip(kept, survive) if k]
+
+        occupied: Dict[str, np.ndarray] = {}  # sign type → cells that already have one
+
+        def taken(sign_type: str) -> np.ndarray:
+            if sign_type not in occupied:
+                grid = np.zeros((rows, cols), dtype=bool)
+                xy = [(s['x'], s['y']) for s in kept if s['type'] == sign_type]
+                if xy:
+                    xs, ys = np.array(xy).T
+                    grid[ys, xs] = True
+                occupied[sign_type] = grid
+            return occupied[sign_type]
+
+        added = []
+        for sp_id, arr in presence.items():
+            effects = [e for e in w.species.get(sp_id, {}).get('effects', []) if e.get('effect') == 'creates_sign']
+            if not effects or not arr.any():
+                continue
+            sp_cfg = species_cfg.get(sp_id) or {}
+            rate = at(sp_cfg['sign_rate'] if 'sign_rate' in sp_cfg else sign_cfg.get('rate'))
+            if not rate:
+                continue
+            d = distance(sp_id)
+            for eff in effects:
+                params = eff.get('params', {})
+                radius = params.get('radius', 2)
+                chance = np.where(d <= radius, params.get('probability', 0.3) * rate * (1 - d / (radius + 1)), 0)
+                tfilter = params.get('terrain_filter')
+                if tfilter:
+                    chance = np.where(np.isin(w.terrain, [w.terrain_ids.get(t, -1) for t in tfilter]), chance, 0)
+                grid = taken(eff['sign'])
+                new = (rng.random((rows, cols)) < chance) & ~grid
+                ys, xs = np.nonzero(new)
+                grid[ys, xs] = True
+                added.extend({'type': eff['sign'], 'x': int(x), 'y': int(y)} for x, y in zip(xs, ys))
+
+        if not added and len(kept) == len(w.signs):
+            return w.signs
+        return tuple(kept + added)
+
+
+class SeasonClock:
+    """Advances a StateManager by a month every `interval` seconds on a daemon thread."""
+
+    def __init__(self, state, interval: float):
+        self.state = state
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='season-clock', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                # workers sharing a world skip the tick if another advanced it within the interval
+                self.state.advance_month(min_interval=self.interval / 2)
+            except Exception as e:
+                log_event('season', status='failed', error=repr(e))
@@ -0,0 +1,146 @@
+"""
+Session - Per-connection player state for the WebSocket channel
+
+A Session holds the player's position plus the viewport, observations and
+signs it last sent, and answers each move with only what changed: newly
+exposed terrain strips, species entries that appeared, changed or left, and
+signs that came into or went out of view.
+
+Bad messages get a `{'type': 'error'}` reply rather than closing the
+channel, and a regenerated world that no longer contains the player moves
+them to the nearest cell that it does.
+"""
+
+import base64
+from typing import Dict, Optional, Tuple
+
+from .encoding import clamp_rect, encode_strips, viewport_delta
+from .world import World
+
+
+def error(detail: str) -> dict:
+    return {'type': 'error', 'detail': detail}
+
+
+class Session:
+    def __init__(self, state, x: int, y: int, view_radius: int = 25):
+        self.state = state
+        self.x, self.y = x, y
+        self.view_radius = view_radius
+        self.rect: Optional[Tuple[int, int, int, int]] = None
+        self.observations: Dict[str, dict] = {}
+        self.signs: Dict[tuple, dict] = {}
+        self._terrain = None  # terrain array the client's cells came from
+        self._key = None      # (version, x, y) of the last observation
+        self._obs = None      # ObservationState slid along with each move
+
+    @property
+    def started(self) -> bool:
+        return self.rect is not None
+
+    def handle(self, msg: dict) -> Optional[dict]:
+        """Apply one client message ('start', 'move' or 'time'); returns the reply (or None)."""
+        if not isinstance(msg, dict):
+            return error('Messages must be JSON objects')
+        kind = msg.get('type')
+        try:
+            if kind == 'start':
+                return self.start(int(msg.get('x', self.x)), int(msg.get('y', self.y)),
+                                  max(1, min(100, int(msg.get('view_radius', self.view_radius)))))
+            if not self.started:
+                return error("Send 'start' first")
+            if kind == 'move':
+                return self.move(int(msg.get('dx', 0)), int(msg.get('dy', 0)))
+        except (TypeError, ValueError):
+            return error(f"Bad '{kind}' message: coordinates must be integers")
+        if kind == 'time':
+            self.state.set_time(msg.get('time_of_day', ''))  # the swap notifies every session, this one included
+            return None
+        return error(f"Unknown message type '{kind}'")
+
+    def start(self, x: int, y: int, view_radius: int) -> dict:
+        """(Re)start at (x, y), moved onto the map if need be; the reply carries the full viewport and observation."""
+        rows, cols = self.state.world.shape
+        self.x, self.y = min(max(x, 0), cols - 1), min(max(y, 0), rows - 1)
+        self.view_radius = view_radius
+        self.rect = self._key = self._obs = None
+        return self.update('start')
+
+    def move(self, dx: int, dy: int) -> Optional[dict]:
+        """Step by (dx, dy); None if that leaves the map."""
+        rows, cols = self.state.world.shape
+        x, y = self.x + dx, self.y + dy
+        if not (0 <= x < cols and 0 <= y < rows):
+            return None
+        self.x, self.y = x, y
+        return self.update('move', dx, dy)
+
+    def update(self, reason: str, dx: int = 0, dy: int = 0) -> Optional[dict]:
+        """Diff against what the client has; None if nothing changed."""
+        w = self.state.world
+        if self._key == (w.version, self.x, self.y):
+            return None
+        rows, cols = w.shape
+        if not (0 <= self.x < cols and 0 <= self.y < rows):
+            # a regeneration shrank the map under the player
+            self.x, self.y = min(self.x, cols - 1), min(self.y, rows - 1)
+            self._obs, dx, dy = None, 0, 0
+        observation = self._observation_diff(w, dx, dy, reset=reason == 'start')
+        if observation is None:
+            return error('Out of bounds')
+        self._key = (w.version, self.x, self.y)
+
+        r = self.view_radius
+        rect = clamp_rect((self.x - r, self.y - r, self.x + r + 1, self.y + r + 1), w.shape)
+        full = self.rect is None or w.terrain is not self._terrain
+        strips = [rect] if full else viewport_delta(self.rect, rect)
+        self.rect, self._terrain = rect, w.terrain
+
+        return {
+            'type': 'update',
+            'reason': reason,
+            'version': w.version,
+            'x': self.x,
+            'y': self.y,
+            'time_of_day': w.time_of_day,
+            'season': w.season,
+            'terrain': {
+                'rect': list(rect),
+                'full': full,
+                'strips': base64.b64encode(encode_strips(w.terrain, strips)).decode('ascii'),
+            },
+            'observation': observation,
+        }
+
+    def _observation_diff(self, w: World, dx: int, dy: int, reset: bool) -> Optional[dict]:
+        if self._obs is None:
+            obs, self._obs = self.state.observe_step(None, 0, 0, x=self.x, y=self.y, world=w)
+        else:
+            obs, self._obs = self.state.observe_step(self._obs, dx, dy, world=w)
+        if 'error' in obs:
+            return None
+        if reset:
+            self.observations, self.signs = {}, {}
+
+        current = {o['species_id']: o for o in obs['observations']}
+        upsert = [o for sp_id, o in current.items() if self.observations.get(sp_id) != o]
+        remove = [sp_id for sp_id in self.observations if sp_id not in current]
+        self.observations = current
+
+        signs = {(s['type'], s['x'], s['y']): s for s in obs['signs']}
+        signs_add = [s for k, s in signs.items() if k not in self.signs]
+        signs_remove = [list(k) for k in self.signs if k not in signs]
+        self.signs = signs
+
+        return {
+            'reset': reset,
+            'location': obs['location'],
+            'current_terrain': obs['current_terrain'],
+            'visible_terrains': obs['visible_terrains'],
+            'corridors': obs['corridors'],
+            'order': list(current),
+            'upsert': upsert,
+            'remove': remove,
+            'signs_add': signs_add,
+            'signs_remove': signs_remove,
+        }
@@ -0,0 +1,112 @@
+"""
+Shared - One world snapshot shared read-only by several worker processes
+
+Snapshots are published as directories of .npy files under
+`<data_dir>/shared/<name>/`; workers np.load them with mmap_mode='r', so the
+pages live once in the OS page cache however many workers attach. A small
+CURRENT pointer file (replaced atomically) names the live snapshot and
+carries the time of day. An exclusive flock on `generate.lock` makes sure
+only one process generates or publishes at a time.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import threading
+from typing import Callable, Optional
+
+
+class SharedWorld:
+    def __init__(self, data_dir: str = 'data', interval: float = 1.0, keep: int = 3):
+        self.dir = os.path.join(data_dir, 'shared')
+        self.interval = interval
+        self.keep = keep  # published snapshots kept on disk; older ones may still be mapped by slow workers
+        self._pointer = os.path.join(self.dir, 'CURRENT')
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(self.dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Exclusive cross-process generation lock (blocks until acquired)."""
+        with open(os.path.join(self.dir, 'generate.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def path(self, snapshot: str) -> str:
+        return os.path.join(self.dir, snapshot)
+
+    def read_pointer(self) -> Optional[dict]:
+        try:
+            with open(self._pointer) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_pointer(self, pointer: dict):
+        tmp = f'{self._pointer}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(pointer, f)
+        os.replace(tmp, self._pointer)
+
+    def publish(self, name: str, write: Callable[[str], None], pointer: dict, base: str = None):
+        """Write a snapshot with write(dir), then point CURRENT at it (caller holds the lock).
+
+        With base, that snapshot's files are hard-linked in first, so write
+        only has to replace the files that changed; the rest stay the same
+        inodes (and pages) as before.
+        """
+        tmp = self.path(f'{name}.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        if base is not None:
+            os.makedirs(tmp)
+            for entry in os.scandir(self.path(base)):
+                os.link(entry.path, os.path.join(tmp, entry.name))
+        write(tmp)
+        shutil.rmtree(self.path(name), ignore_errors=True)
+        os.rename(tmp, self.path(name))
+        self.write_pointer({**pointer, 'snapshot': name})
+        self._prune(name)
+
+    def _prune(self, current: str):
+        snapshots = sorted((e for e in os.scandir(self.dir) if e.is_dir() and e.name != current),
+                           key=lambda e: e.stat().st_mtime)
+        for old in snapshots[:max(0, len(snapshots) - (self.keep - 1))]:
+            shutil.rmtree(old.path, ignore_errors=True)
+
+    # Change notification for workers that didn't publish
+
+    def start(self, on_change: Callable[[dict], None]):
+        if self._thread is None:
+            self._mtime = self._pointer_mtime()
+            self._thread = threading.Thread(target=self._run, args=(on_change,), name='shared-world', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _pointer_mtime(self):
+        try:
+            return os.stat(self._pointer).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self, on_change: Callable[[dict], None]):
+        while not self._stop.wait(self.interval):
+            mtime = self._pointer_mtime()
+            if mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            pointer = self.read_pointer()
+            if pointer is None:
+                continue
+            try:
+                on_change(pointer)
+            except Exception as e:
+                print(f"Shared world refresh failed: {e}")
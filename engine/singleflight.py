@@ -0,0 +1,64 @@
+"""
+SingleFlight - Concurrent identical calls share one in-flight computation
+
+Keys are tuples whose first element names the operation (used for stats);
+callers include the world version so a new world never joins an old flight.
+"""
+
+import collections
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._calls = collections.Counter()
+        self._coalesced = collections.Counter()
+
+    def do(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        """fn() unless an identical call is running, in which case wait for and share its result."""
+        name = key[0]
+        with self._lock:
+            self._calls[name] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self._coalesced[name] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = collections.Counter(k[0] for k in self._flights)
+            return {name: {'calls': self._calls[name], 'coalesced': self._coalesced[name],
+                           'in_flight': in_flight[name]} for name in sorted(self._calls)}
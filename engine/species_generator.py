@@ -7,6 +7,8 @@ from typing import Dict, List, Tuple, Any
 
 
 class SpeciesGenerator:
+    PLACEMENT_ORDER = [['predator'], ['large_herbivore', 'medium_herbivore'], ['aquatic'], ['tree', 'shrub', 'plant']]
+    
     def __init__(self, rules: dict, terrain_ids: dict):
         self.rules = rules
         self.terrain_ids = terrain_ids
@@ -25,24 +27,19 @@ class SpeciesGenerator:
         if seed is not None:
             np.random.seed(seed)
         
-        rows, cols = terrain.shape
-        
         # Roll predator presence
         predator_presence = self._roll_predators()
         
         # Place species (predators first)
         locations = {}
-        for category in [['predator'], ['large_herbivore', 'medium_herbivore'], ['aquatic'], ['tree', 'shrub', 'plant']]:
-            for sp_id, sp_data in self.species.items():
-                if sp_data.get('category') not in category:
-                    continue
-                if not predator_presence.get(sp_id, True):
-                    locations[sp_id] = []
-                    continue
-                locations[sp_id] = self._place_species(sp_id, sp_data, terrain, corridors)
+        for sp_id in self.placement_order():
+            if not predator_presence.get(sp_id, True):
+                locations[sp_id] = []
+                continue
+            locations[sp_id] = self._place_species(sp_id, self.species[sp_id], terrain, corridors)
         
         # Process effects (exclusion zones, damage)
-        modifiers = self._process_effects(locations, terrain)
+        modifiers = self.process_effects(locations, terrain)
         
         # Apply modifiers
         locations = self._apply_modifiers(locations, modifiers)
@@ -50,16 +47,7 @@ class SpeciesGenerator:
         # Generate presence arrays
         presence = {}
         for sp_id, locs in locations.items():
-            arr = np.zeros((rows, cols), dtype=np.uint8)
-            for x, y in locs:
-                if 0 <= y < rows and 0 <= x < cols:
-                    arr[y, x] = 1
-            
-            # Apply damage states
-            if sp_id in modifiers.get('states', {}):
-                arr = self._apply_states(arr, modifiers['states'][sp_id])
-            
-            presence[sp_id] = arr
+            presence[sp_id] = self.build_presence(sp_id, locs, modifiers, terrain.shape)
         
         # Generate signs
         signs = self._generate_signs(locations, terrain)
@@ -71,15 +59,68 @@ class SpeciesGenerator:
             'signs': signs,
         }
     
+    def placement_order(self) -> List[str]:
+        """Species ids in placement order (predators first, vegetation last)."""
+        order = []
+        for category in self.PLACEMENT_ORDER:
+            for sp_id, sp_data in self.species.items():
+                if sp_data.get('category') in category:
+                    order.append(sp_id)
+        return order
+    
+    def roll_presence(self, sp_id: str) -> bool:
+        """Roll whether a species with presence_probability is in the world."""
+        prob = self.species[sp_id].get('distribution', {}).get('presence_probability')
+        if prob is None:
+            return True
+        present = np.random.random() < prob
+        print(f"  {sp_id}: {'PRESENT' if present else 'absent'}")
+        return present
+    
+    def place(self, sp_id: str, terrain: np.ndarray, corridors: Dict[str, np.ndarray]) -> List[Tuple[int, int]]:
+        """Place a single species."""
+        return self._place_species(sp_id, self.species[sp_id], terrain, corridors)
+    
+    def build_presence(self, sp_id: str, locs: List, modifiers: Dict, shape: Tuple[int, int]) -> np.ndarray:
+        """Rasterize locations into a presence array and apply damage states."""
+        rows, cols = shape
+        arr = np.zeros((rows, cols), dtype=np.uint8)
+        for x, y in locs:
+            if 0 <= y < rows and 0 <= x < cols:
+                arr[y, x] = 1
+        
+        # Apply damage states
+        if sp_id in modifiers.get('states', {}):
+            arr = self._apply_states(arr, modifiers['states'][sp_id])
+        
+        return arr
+    
+    def effect_sources(self) -> List[str]:
+        """Species whose effects modify other species (excludes/damages)."""
+        return [sp_id for sp_id in self.placement_order()
+                if any(e.get('effect') in ('excludes', 'damages') for e in self.species[sp_id].get('effects', []))]
+    
+    def effect_targets(self) -> Dict[str, List[str]]:
+        """Map target species → state definitions applied to it (None for exclusion only)."""
+        targets = {}
+        effects = list(self.rules.get('_human_presence', {}).get('effects', []))
+        for sp_id in self.effect_sources():
+            effects.extend(self.species[sp_id].get('effects', []))
+        
+        for eff in effects:
+            if eff.get('effect') not in ('excludes', 'damages'):
+                continue
+            state_def = eff.get('params', {}).get('state_definition') if eff.get('effect') == 'damages' else None
+            for t in self._get_targets(eff.get('targets', {})):
+                targets.setdefault(t, [])
+                if state_def and state_def not in targets[t]:
+                    targets[t].append(state_def)
+        return targets
+    
     def _roll_predators(self) -> dict:
         presence = {}
-        for sp_id, sp_data in self.species.items():
-            prob = sp_data.get('distribution', {}).get('presence_probability')
-            if prob is not None:
-                presence[sp_id] = np.random.random() < prob
-                print(f"  {sp_id}: {'PRESENT' if presence[sp_id] else 'absent'}")
-            else:
-                presence[sp_id] = True
+        for sp_id in self.species:
+            presence[sp_id] = self.roll_presence(sp_id)
         
         # Human always present
         presence['_human_presence'] = True
@@ -222,7 +263,7 @@ class SpeciesGenerator:
         
         return locs
     
-    def _process_effects(self, locations: Dict, terrain: np.ndarray) -> Dict:
+    def process_effects(self, locations: Dict, terrain: np.ndarray) -> Dict:
         rows, cols = terrain.shape
         modifiers = {'probability': {}, 'states': {}}
         
@@ -304,24 +345,22 @@ class SpeciesGenerator:
         return field
     
     def _apply_modifiers(self, locations: Dict, modifiers: Dict) -> Dict:
-        new_locs = {}
+        return {sp_id: self.filter_locations(sp_id, locs, modifiers) for sp_id, locs in locations.items()}
+    
+    def filter_locations(self, sp_id: str, locs: List, modifiers: Dict) -> List:
+        """Thin out a species' locations by its exclusion probability field."""
+        if sp_id not in modifiers['probability'] or not locs:
+            return locs
         
-        for sp_id, locs in locations.items():
-            if sp_id not in modifiers['probability'] or not locs:
-                new_locs[sp_id] = locs
-                continue
-            
-            mod = modifiers['probability'][sp_id]
-            filtered = []
-            for x, y in locs:
-                if 0 <= y < mod.shape[0] and 0 <= x < mod.shape[1]:
-                    if np.random.random() < mod[y, x]:
-                        filtered.append((x, y))
-                else:
+        mod = modifiers['probability'][sp_id]
+        filtered = []
+        for x, y in locs:
+            if 0 <= y < mod.shape[0] and 0 <= x < mod.shape[1]:
+                if np.random.random() < mod[y, x]:
                     filtered.append((x, y))
-            new_locs[sp_id] = filtered
-        
-        return new_locs
+            else:
+                filtered.append((x, y))
+        return filtered
     
     def _apply_states(self, presence: np.ndarray, state_info: dict) -> np.ndarray:
         influence = state_info['influence']
@@ -352,43 +391,51 @@ class SpeciesGenerator:
         return result
     
     def _generate_signs(self, locations: Dict, terrain: np.ndarray) -> List[dict]:
+        signs = []
+        for sp_id, locs in locations.items():
+            signs.extend(self.species_signs(sp_id, locs, terrain))
+        return self.dedupe_signs(signs)
+    
+    def species_signs(self, sp_id: str, locs: List, terrain: np.ndarray) -> List[dict]:
+        """Roll the creates_sign effects of one species around its locations."""
         signs = []
         rows, cols = terrain.shape
+        if not locs:
+            return signs
         
-        for sp_id, locs in locations.items():
-            if not locs:
+        sp_data = self.species.get(sp_id, {})
+        for eff in sp_data.get('effects', []):
+            if eff.get('effect') != 'creates_sign':
                 continue
             
-            sp_data = self.species.get(sp_id, {})
-            for eff in sp_data.get('effects', []):
-                if eff.get('effect') != 'creates_sign':
-                    continue
-                
-                sign_type = eff.get('sign')
-                params = eff.get('params', {})
-                radius = params.get('radius', 2)
-                prob = params.get('probability', 0.3)
-                tfilter = params.get('terrain_filter')
-                
-                tids = [self.terrain_ids.get(t, -1) for t in tfilter] if tfilter else None
-                
-                for x, y in locs:
-                    for dy in range(-radius, radius + 1):
-                        for dx in range(-radius, radius + 1):
-                            if dx*dx + dy*dy > radius*radius:
-                                continue
-                            ny, nx = y + dy, x + dx
-                            if not (0 <= ny < rows and 0 <= nx < cols):
-                                continue
-                            if tids and terrain[ny, nx] not in tids:
-                                continue
-                            
-                            dist = np.sqrt(dx*dx + dy*dy)
-                            local_p = prob * (1 - dist / (radius + 1))
-                            if np.random.random() < local_p:
-                                signs.append({'type': sign_type, 'x': int(nx), 'y': int(ny)})
-        
-        # Dedupe
+            sign_type = eff.get('sign')
+            params = eff.get('params', {})
+            radius = params.get('radius', 2)
+            prob = params.get('probability', 0.3)
+            tfilter = params.get('terrain_filter')
+            
+            tids = [self.terrain_ids.get(t, -1) for t in tfilter] if tfilter else None
+            
+            for x, y in locs:
+                for dy in range(-radius, radius + 1):
+                    for dx in range(-radius, radius + 1):
+                        if dx*dx + dy*dy > radius*radius:
+                            continue
+                        ny, nx = y + dy, x + dx
+                        if not (0 <= ny < rows and 0 <= nx < cols):
+                            continue
+                        if tids and terrain[ny, nx] not in tids:
+                            continue
+                        
+                        dist = np.sqrt(dx*dx + dy*dy)
+                        local_p = prob * (1 - dist / (radius + 1))
+                        if np.random.random() < local_p:
+                            signs.append({'type': sign_type, 'x': int(nx), 'y': int(ny)})
+        
+        return signs
+    
+    @staticmethod
+    def dedupe_signs(signs: List[dict]) -> List[dict]:
         seen = set()
         unique = []
         for s in signs:
@@ -8,19 +8,29 @@ import json
 import os
 import re
 import base64
-from typing import Dict, Any, Optional, List
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Tuple
 
-# Redis client (optional - falls back to local files)
-redis_client = None
-try:
-    import redis
-    redis_url = os.environ.get('UPSTASH_REDIS_URL') or os.environ.get('REDIS_URL')
-    if redis_url:
-        redis_client = redis.from_url(redis_url)
-        redis_client.ping()
-        print(f"Redis connected: {redis_url[:30]}...")
-except Exception as e:
-    print(f"Redis not available: {e}, using local files")
+from .encoding import mask_bitmask, mask_rle, signs_columnar
+from .metrics import log_event, metrics, record_persistence
+from .observer import Observer, ObservationState
+from .payloads import PayloadCache
+from .pipeline import GenerationPipeline, run_pipeline
+from .profiling import Profiler
+from .rules import TIMES_OF_DAY
+from .agents import AgentLayer
+from .jobs import JobManager
+from .seasons import SeasonEngine, calendar, start_month
+from .persistence import RedisStore
+from .shared import SharedWorld
+from .singleflight import SingleFlight
+from .world import World, rules_digest
+
+_UNSET = object()
 
 
 def np_to_b64(arr: np.ndarray) -> str:
@@ -33,314 +43,613 @@ def b64_to_np(s: str, dtype, shape) -> np.ndarray:
     return np.frombuffer(base64.b64decode(s), dtype=dtype).reshape(shape)
 
 
+def _write_file(path: str, write: Callable, binary: bool = False):
+    """write(f) to a temporary file, then rename it over path."""
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb' if binary else 'w') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
 class StateManager:
     REDIS_KEY = 'star_carr:world'
     
-    def __init__(self, rules: dict, data_dir: str = 'data'):
+    def __init__(self, rules: dict, data_dir: str = 'data', executor: Executor = None, store=_UNSET,
+                 redis_key: str = None, shared: SharedWorld = None, profiler: Profiler = None):
         self.rules = rules
         self.data_dir = data_dir
-        self.redis = redis_client
-        self.terrain_rules = rules.get('terrain', {})
-        self.species_rules = rules.get('species', {})
-        
-        # Runtime state
-        self.terrain = None
-        self.corridors = {}
-        self.species_presence = {}
-        self.signs = []
-        self.predator_presence = {}
-        self.time_of_day = 'midday'
-        self.season = 'spring'
-        
-        # Build lookups
-        self.terrain_types = {int(k): v for k, v in self.terrain_rules.get('terrain_types', {}).items()}
-        self.terrain_ids = {v['name']: int(k) for k, v in self.terrain_types.items()}
-        self.symbols = self.species_rules.get('symbols', {})
-        self.species = self.species_rules.get('species', {})
+        # Write-behind Redis store (optional - falls back to local files)
+        self.redis: Optional[RedisStore] = RedisStore.from_env() if store is _UNSET else store
+        self.redis_key = redis_key or self.REDIS_KEY
+        self.pipeline = GenerationPipeline()
+        self.executor = executor  # process pool for generation; None runs in-process
+        self.profiler = profiler  # profiles generation when profiler.generate is set
+        self.last_run: Dict[str, str] = {}
+        
+        # The current World snapshot. Readers grab this reference once; writers
+        # build a new World and swap it under _write_lock.
+        self.world: Optional[World] = None
+        self._write_lock = threading.Lock()
+        self._mp_manager = None
+        
+        # Multi-worker mode: worlds are published to / attached from a shared
+        # memory-mapped snapshot instead of living privately in this process
+        self.shared = shared
+        self._snapshot: Optional[str] = None
+        self._listeners: List[Callable[[World], None]] = []
+        
+        # Concurrent identical reads share one computation; encoded response
+        # bodies are built once per world version
+        self.flights = SingleFlight()
+        self.payloads = PayloadCache(flights=self.flights)
+        self.observer = Observer(self)
+        self.seasons = SeasonEngine()
+        self.agents: Optional[AgentLayer] = None  # animal groups, built on the first time step
+        self._season_lock = threading.Lock()
+        self.jobs = JobManager(self)  # regeneration jobs for this world, one at a time
+        
+        # Layers waiting to be saved behind the request that changed them
+        self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='save-behind')
+        self._unsaved: set = set()
+        self._unsaved_lock = threading.Lock()
+    
+    # Read-through accessors for the current snapshot
+    terrain = property(lambda self: self.world.terrain)
+    corridors = property(lambda self: self.world.corridors)
+    species_presence = property(lambda self: self.world.species_presence)
+    signs = property(lambda self: self.world.signs)
+    predator_presence = property(lambda self: self.world.predator_presence)
+    time_of_day = property(lambda self: self.world.time_of_day)
+    season = property(lambda self: self.world.season)
+    month = property(lambda self: self.world.month)
+    seed = property(lambda self: self.world.seed)
+    terrain_types = property(lambda self: self.world.terrain_types)
+    terrain_ids = property(lambda self: self.world.terrain_ids)
+    symbols = property(lambda self: self.world.symbols)
+    species = property(lambda self: self.world.species)
+    
+    def set_rules(self, rules: dict):
+        """Replace the rules used by the next load or generate()."""
+        self.rules = rules
+    
+    def _swap(self, world: World, keep_time: bool = False):
+        with self._write_lock:
+            if keep_time and self.world is not None:
+                world = world.with_changes(time_of_day=self.world.time_of_day, season=self.world.season,
+                                           month=self.world.month)
+            self.world = world
+        self._notify(world)
+        return world
+    
+    def subscribe(self, callback: Callable[[World], None]) -> Callable[[], None]:
+        """Call callback(world) after every swap; returns an unsubscribe function."""
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+    
+    @property
+    def subscribed(self) -> bool:
+        """True while anything (e.g. an open session) is subscribed to world changes."""
+        return bool(self._listeners)
+    
+    def _notify(self, world: World):
+        for callback in list(self._listeners):
+            try:
+                callback(world)
+            except Exception as e:
+                log_event('listener', status='failed', error=repr(e))
     
     def load_or_generate(self, seed: int = 42):
         """Load from Redis, then local files, or generate new world."""
-        if self.redis and self._load_from_redis():
-            return
-        if os.path.exists(f'{self.data_dir}/terrain.npy'):
-            self.load()
-            # Sync to Redis if available
-            if self.redis:
-                self._save_to_redis()
-        else:
+        if self.shared is not None:
+            return self._load_or_generate_shared(seed)
+        if not self.load_existing():
             self.generate(seed)
     
-    def generate(self, seed: int = 42):
-        """Generate new world."""
-        from .terrain_generator import TerrainGenerator
-        from .species_generator import SpeciesGenerator
-        
-        print("Generating world...")
-        
-        tgen = TerrainGenerator(self.terrain_rules)
-        self.terrain, self.corridors = tgen.generate(seed)
+    def _load_or_generate_shared(self, seed: int):
+        """Attach to the published snapshot; the first process to get the lock creates it."""
+        with self.shared.lock():
+            pointer = self.shared.read_pointer()
+            if pointer is None:
+                if not self.load_existing():
+                    self._generate(seed)
+                pointer = self._publish(self.world)
+            self._attach(pointer)
+        self.shared.start(self._on_shared_change)
+    
+    def _publish(self, world: World, layers: List[str] = None) -> dict:
+        """Write world as a shared snapshot (caller holds the shared lock).
+        
+        With layers (as for save()), world is the attached snapshot with only
+        those layers changed: the rest of the snapshot is hard-linked, and
+        workers attached to it load just the changed files.
+        """
+        base = self._snapshot if layers is not None else None
+        layers = layers if base is not None else None
+        
+        def write(path):
+            self.save(world, data_dir=path, layers=layers)
+            if base is None:
+                with open(f'{path}/rules.json', 'w') as f:
+                    json.dump(world.rules, f)
+        
+        pointer = {'seed': world.seed, 'rules': world.rules_digest, 'version': world.version,
+                   'time_of_day': world.time_of_day, 'season': world.season, 'month': world.month,
+                   'advanced_at': time.time()}
+        if base is not None:
+            pointer.update(base=base, layers=layers)
+        self.shared.publish(str(world.version), write, pointer, base=base)
+        return self.shared.read_pointer()
+    
+    def _attach(self, pointer: dict) -> World:
+        """Map a published snapshot read-only and make it the current world."""
+        path = self.shared.path(pointer['snapshot'])
+        if pointer.get('base') is not None and pointer['base'] == self._snapshot:
+            world = self._swap(self._from_pointer(self._load_layers(self.world, path, pointer['layers']), pointer))
+        else:
+            with open(f'{path}/rules.json') as f:
+                self.rules = json.load(f)
+            world = self._swap(self._from_pointer(self.load(data_dir=path, mmap=True), pointer))
+        self._snapshot = pointer['snapshot']
+        return world
+    
+    @staticmethod
+    def _load_layers(world: World, path: str, layers: List[str]) -> World:
+        """world with the given layers memory-mapped from the snapshot at path; the other arrays are kept."""
+        presence = dict(world.species_presence)
+        for layer in layers:
+            if layer.startswith('presence:'):
+                sp_id = layer[len('presence:'):]
+                presence[sp_id] = np.load(f'{path}/species_{sp_id}.npy', mmap_mode='r')
+        changes = {'species_presence': presence}
+        if 'signs' in layers:
+            with open(f'{path}/signs.json') as f:
+                changes['signs'] = json.load(f)
+        return world.with_changes(**changes)
+    
+    @staticmethod
+    def _from_pointer(world: World, pointer: dict) -> World:
+        # Every worker uses the pointer's version so ETags and deltas agree across processes
+        return world.with_changes(version=pointer['version'], time_of_day=pointer['time_of_day'],
+                                  season=pointer['season'], month=pointer.get('month', world.month))
+    
+    def _on_shared_change(self, pointer: dict):
+        """Follow a pointer change made by another worker.
+
+        This runs without the shared lock (which a generating worker holds for
+        the whole generation), so a snapshot can be pruned while it is being
+        mapped; the attach then moves on to whatever the pointer names now.
+        """
+        while True:
+            w = self.world
+            try:
+                if pointer['snapshot'] != self._snapshot:
+                    self._attach(pointer)
+                elif pointer['version'] != w.version:
+                    self._swap(self._from_pointer(w, pointer))
+                return
+            except FileNotFoundError:
+                latest = self.shared.read_pointer()
+                if latest is None or latest['snapshot'] == pointer['snapshot']:
+                    raise
+                log_event('shared', status='pruned', snapshot=pointer['snapshot'], retry=latest['snapshot'])
+                pointer = latest
+    
+    def has_snapshot(self) -> bool:
+        return os.path.exists(f'{self.data_dir}/terrain.npy')
+    
+    @staticmethod
+    def _read_meta(data_dir: str) -> dict:
+        if not os.path.exists(f'{data_dir}/meta.json'):
+            return {}
+        with open(f'{data_dir}/meta.json') as f:
+            return json.load(f)
+    
+    def load_existing(self) -> bool:
+        """Load from Redis, then local files; False if neither has a world.
         
-        sgen = SpeciesGenerator(self.species_rules, tgen.terrain_ids)
-        result = sgen.generate(self.terrain, self.corridors, seed)
+        Local files are memory-mapped, so a snapshot prebuilt with
+        `python -m engine build` is served without copying it into memory.
+        A snapshot recorded as built from different rules is ignored.
+        """
+        if self.redis and self._load_from_redis():
+            return True
+        if not self.has_snapshot():
+            return False
+        built_for = self._read_meta(self.data_dir).get('rules_digest')
+        if built_for is not None and built_for != rules_digest(self.rules):
+            log_event('persistence', op='load', target='files', status='skipped', reason='other rules',
+                      path=self.data_dir)
+            return False
+        self.load(mmap=True)
+        # Sync to Redis if available
+        if self.redis:
+            self._save_to_redis()
+        return True
+    
+    def generate(self, seed: int = 42, rules: dict = None, progress: Callable[[dict], None] = None,
+                 cancel: threading.Event = None, profile: str = None) -> World:
+        """Generate new world, reusing pipeline stages unaffected by rule changes.
+        
+        progress receives the pipeline's plan/stage events (plus a final
+        'persistence' stage); setting cancel aborts between stages with
+        GenerationCancelled and leaves the current world in place.
+        profile ('cpu' or 'alloc') profiles this run even if the profiler
+        isn't set to profile every generation.
+        
+        In shared mode this holds the cross-process generation lock, and if
+        another worker has already published a world for the same rules and
+        seed (generation is deterministic) that snapshot is attached instead.
+        """
+        if self.shared is None:
+            return self._generate(seed, rules, progress, cancel, profile)
+        
+        rules = rules if rules is not None else self.rules
+        emit = progress or (lambda e: None)
+        with self.shared.lock():
+            pointer = self.shared.read_pointer()
+            if pointer and pointer['seed'] == seed and pointer['rules'] == rules_digest(rules):
+                t0 = time.perf_counter()
+                emit({'event': 'plan', 'stages': ['attach']})
+                world = self._attach(pointer)
+                emit({'event': 'stage', 'stage': 'attach', 'status': 'cached', 'seconds': time.perf_counter() - t0})
+                return world
+            world = self._generate(seed, rules, progress, cancel, profile)
+            self._attach(self._publish(world))
+            return self.world
+    
+    def _generate(self, seed: int = 42, rules: dict = None, progress: Callable[[dict], None] = None,
+                  cancel: threading.Event = None, profile: str = None) -> World:
+        profile = profile or (self.profiler.generate if self.profiler is not None else None)
+        if profile is None or self.profiler is None:
+            return self._generate_world(seed, rules, progress, cancel)
+        with self.profiler.profile(f'generate-{seed}', alloc=profile == 'alloc'):
+            return self._generate_world(seed, rules, progress, cancel, profile)
+    
+    def _generate_world(self, seed: int, rules: dict, progress: Callable[[dict], None],
+                        cancel: Optional[threading.Event], profile: str = None) -> World:
+        rules = rules if rules is not None else self.rules
+        emit = progress or (lambda e: None)
+        log_event('generation', status='started', seed=seed)
+        t_start = time.perf_counter()
+        
+        def relay(event):
+            if event.get('event') == 'plan':
+                event = {**event, 'stages': list(event['stages']) + ['persistence']}
+            elif event.get('event') == 'stage':
+                self._record_stage(event)
+            emit(event)
         
-        self.species_presence = result['presence']
-        self.signs = result['signs']
-        self.predator_presence = result['predator_presence']
+        try:
+            world = self._run_generation(seed, rules, relay, cancel, profile)
+        except BaseException:
+            metrics.inc('generations_total', status='failed')
+            raise
         
-        print(f"Generated {len(self.signs)} signs")
-        self.save()
+        t0 = time.perf_counter()
+        if self.shared is None:
+            self.save(world)  # shared mode publishes a snapshot instead
         
         # Also save to Redis
         if self.redis:
             self._save_to_redis()
+        relay({'event': 'stage', 'stage': 'persistence', 'status': 'computed', 'seconds': time.perf_counter() - t0})
+        
+        seconds = time.perf_counter() - t_start
+        metrics.observe('generation_seconds', seconds)
+        metrics.inc('generations_total', status='ok')
+        log_event('generation', status='ok', seed=seed, signs=len(world.signs),
+                  rebuilt=sum(1 for v in self.last_run.values() if v == 'computed'), stages=len(self.last_run),
+                  seconds=seconds)
+        return world
     
-    def save(self):
-        """Save state to files."""
-        os.makedirs(self.data_dir, exist_ok=True)
-        
-        np.save(f'{self.data_dir}/terrain.npy', self.terrain)
-        
-        # Corridors as bitfield
-        bits = np.zeros_like(self.terrain, dtype=np.uint8)
-        for i, name in enumerate(['water_edge', 'ecotone', 'game_trail']):
-            if name in self.corridors:
-                bits |= (self.corridors[name].astype(np.uint8) << i)
-        np.save(f'{self.data_dir}/corridors.npy', bits)
+    @staticmethod
+    def _record_stage(event: dict):
+        stage, status, seconds = event['stage'], event['status'], event['seconds']
+        metrics.observe('stage_seconds', seconds, stage=stage, kind=stage.split(':')[0], status=status)
+        log_event('stage', stage=stage, status=status, seconds=seconds)
+    
+    def _run_generation(self, seed: int, rules: dict, relay: Callable, cancel: threading.Event = None,
+                        profile: str = None) -> World:
+        if self.executor is not None:
+            result, self.last_run = self._run_in_executor(rules, seed, relay, cancel, profile)
+        else:
+            result = self.pipeline.run(rules, seed, progress=relay, cancelled=cancel.is_set if cancel else None)
+            self.last_run = dict(self.pipeline.last_run)
+        
+        world = World(
+            rules=rules,
+            terrain=result['terrain'],
+            corridors=result['corridors'],
+            species_presence=result['presence'],
+            signs=result['signs'],
+            predator_presence=result['predator_presence'],
+            seed=seed,
+            **dict(zip(('month', 'season'), start_month(rules))),
+        )
+        self.rules = rules
+        return self._swap(world, keep_time=True)
+    
+    def _run_in_executor(self, rules: dict, seed: int, progress: Callable, cancel: Optional[threading.Event],
+                         profile: str = None):
+        """Run the pipeline in the process pool, relaying progress and cancellation."""
+        if self._mp_manager is None:
+            self._mp_manager = multiprocessing.Manager()
+        events, stop = self._mp_manager.Queue(), self._mp_manager.Event()
+        
+        # A profiled run is profiled in the worker too, which writes its own report
+        worker_profile = (self.profiler.dir, profile == 'alloc') if profile else None
+        fut = self.executor.submit(run_pipeline, rules, seed, events, stop, worker_profile)
+        while True:
+            if cancel is not None and cancel.is_set():
+                stop.set()
+            try:
+                progress(events.get(timeout=0.1))
+            except queue.Empty:
+                if fut.done():
+                    break
+        return fut.result()
+    
+    def save(self, world: World = None, data_dir: str = None, layers: List[str] = None):
+        """Save state to files.
+        
+        Each file is written under a temporary name and renamed into place, so
+        a world memory-mapped from the previous snapshot keeps its old files.
+        layers (as named by SeasonEngine.tick, e.g. 'presence:beaver', 'signs')
+        writes only those files plus meta.json over an existing snapshot.
+        """
+        w = world or self.world
+        data_dir = data_dir or self.data_dir
+        t0 = time.perf_counter()
+        os.makedirs(data_dir, exist_ok=True)
+        
+        def npy(name, arr):
+            _write_file(f'{data_dir}/{name}', lambda f: np.save(f, arr), binary=True)
+        
+        def js(name, obj):
+            _write_file(f'{data_dir}/{name}', lambda f: json.dump(obj, f))
+        
+        full = layers is None
+        if full:
+            npy('terrain.npy', w.terrain)
+            
+            # One bool file per corridor, so workers memory-map the masks
+            # instead of each unpacking its own copy
+            for name, mask in w.corridors.items():
+                npy(f'corridor_{name}.npy', np.asarray(mask, dtype=bool))
+            if os.path.exists(f'{data_dir}/corridors.npy'):
+                os.remove(f'{data_dir}/corridors.npy')
         
         # Species
-        for sp_id, arr in self.species_presence.items():
-            np.save(f'{self.data_dir}/species_{sp_id}.npy', arr)
-        
-        with open(f'{self.data_dir}/signs.json', 'w') as f:
-            json.dump(self.signs, f)
-        
-        with open(f'{self.data_dir}/predators.json', 'w') as f:
-            json.dump(self.predator_presence, f)
+        for sp_id, arr in w.species_presence.items():
+            if full or f'presence:{sp_id}' in layers:
+                npy(f'species_{sp_id}.npy', arr)
+        
+        if full or 'signs' in layers:
+            js('signs.json', list(w.signs))
+        if full:
+            js('predators.json', dict(w.predator_presence))
+        js('meta.json', {'seed': w.seed, 'time_of_day': w.time_of_day, 'season': w.season, 'month': w.month,
+                         'rules_digest': w.rules_digest})
+        record_persistence('save', 'files' if full else 'layers', w.nbytes, time.perf_counter() - t0)
     
-    def load(self):
-        """Load state from files."""
-        print("Loading existing world...")
-        
-        self.terrain = np.load(f'{self.data_dir}/terrain.npy')
-        
-        if os.path.exists(f'{self.data_dir}/corridors.npy'):
-            bits = np.load(f'{self.data_dir}/corridors.npy')
+    def _save_behind(self, layers: List[str]):
+        """Save layers of the current world on the save-behind thread.
+        
+        Layers queued while a save is waiting join it, so a burst of changes
+        is one write of each file, taken from the latest world.
+        """
+        with self._unsaved_lock:
+            queued = bool(self._unsaved)
+            self._unsaved.update(layers)
+        if not queued:
+            self._saver.submit(self._save_unsaved)
+    
+    def _save_unsaved(self):
+        with self._unsaved_lock:
+            layers, self._unsaved = sorted(self._unsaved), set()
+        try:
+            self.save(self.world, layers=layers)
+        except Exception as e:
+            log_event('persistence', op='save', target='files', status='failed', layers=','.join(layers),
+                      error=repr(e))
+    
+    def flush_saves(self, timeout: float = None):
+        """Wait until layers queued by _save_behind are on disk."""
+        self._saver.submit(lambda: None).result(timeout)
+    
+    def load(self, data_dir: str = None, mmap: bool = False) -> World:
+        """Load state from files (memory-mapped read-only if mmap)."""
+        data_dir = data_dir or self.data_dir
+        mmap_mode = 'r' if mmap else None
+        t0 = time.perf_counter()
+        
+        terrain = np.load(f'{data_dir}/terrain.npy', mmap_mode=mmap_mode)
+        
+        corridors = {}
+        for f in os.listdir(data_dir):
+            if f.startswith('corridor_') and f.endswith('.npy'):
+                corridors[f[9:-4]] = np.load(f'{data_dir}/{f}', mmap_mode=mmap_mode)
+        if not corridors and os.path.exists(f'{data_dir}/corridors.npy'):
+            # Snapshots from before per-corridor files kept them as a bitfield
+            bits = np.load(f'{data_dir}/corridors.npy')
             for i, name in enumerate(['water_edge', 'ecotone', 'game_trail']):
-                self.corridors[name] = (bits & (1 << i)) > 0
+                corridors[name] = (bits & (1 << i)) > 0
         
-        for f in os.listdir(self.data_dir):
+        species_presence = {}
+        for f in os.listdir(data_dir):
             if f.startswith('species_') and f.endswith('.npy'):
                 sp_id = f[8:-4]
-                self.species_presence[sp_id] = np.load(f'{self.data_dir}/{f}')
+                species_presence[sp_id] = np.load(f'{data_dir}/{f}', mmap_mode=mmap_mode)
+        
+        signs = []
+        if os.path.exists(f'{data_dir}/signs.json'):
+            with open(f'{data_dir}/signs.json') as f:
+                signs = json.load(f)
+        
+        predator_presence = {}
+        if os.path.exists(f'{data_dir}/predators.json'):
+            with open(f'{data_dir}/predators.json') as f:
+                predator_presence = json.load(f)
+        
+        meta = self._read_meta(data_dir)
+        meta.pop('rules_digest', None)
+        
+        world = self._swap(World(
+            rules=self.rules,
+            terrain=terrain,
+            corridors=corridors,
+            species_presence=species_presence,
+            signs=signs,
+            predator_presence=predator_presence,
+            **meta,
+        ))
+        log_event('loaded', target='mmap' if mmap else 'files', shape='x'.join(map(str, world.shape)),
+                  signs=len(world.signs))
+        record_persistence('load', 'mmap' if mmap else 'files', world.nbytes, time.perf_counter() - t0)
+        return world
+    
+    def _save_to_redis(self):
+        """Queue a write-behind save of the world to Redis; never blocks on the network.
         
-        if os.path.exists(f'{self.data_dir}/signs.json'):
-            with open(f'{self.data_dir}/signs.json') as f:
-                self.signs = json.load(f)
+        The payload is built from whatever world is current at flush time, so
+        bursts of saves (e.g. repeated time changes) collapse into one write.
+        """
+        self.redis.save(self.redis_key, lambda: self._redis_payload(self.world))
+    
+    def _redis_payload(self, w: World) -> str:
+        rows, cols = w.terrain.shape
+        
+        data = {
+            'shape': [rows, cols],
+            'terrain': np_to_b64(w.terrain),
+            'corridors': {},
+            'species': {},
+            'signs': list(w.signs),
+            'predator_presence': dict(w.predator_presence),
+            'time_of_day': w.time_of_day,
+            'season': w.season,
+            'month': w.month,
+            'seed': w.seed,
+            'rules_digest': w.rules_digest,
+        }
         
-        if os.path.exists(f'{self.data_dir}/predators.json'):
-            with open(f'{self.data_dir}/predators.json') as f:
-                self.predator_presence = json.load(f)
+        # Corridors
+        for name, mask in w.corridors.items():
+            if mask is not None:
+                data['corridors'][name] = np_to_b64(mask.astype(np.uint8))
         
-        print(f"Loaded: {self.terrain.shape}, {len(self.signs)} signs")
-    
-    def _save_to_redis(self):
-        """Save full world state to Redis."""
-        try:
-            rows, cols = self.terrain.shape
-            
-            data = {
-                'shape': [rows, cols],
-                'terrain': np_to_b64(self.terrain),
-                'corridors': {},
-                'species': {},
-                'signs': self.signs,
-                'predator_presence': self.predator_presence,
-                'time_of_day': self.time_of_day,
-                'season': self.season,
-            }
-            
-            # Corridors
-            for name, mask in self.corridors.items():
-                if mask is not None:
-                    data['corridors'][name] = np_to_b64(mask.astype(np.uint8))
-            
-            # Species
-            for sp_id, arr in self.species_presence.items():
-                if arr is not None:
-                    data['species'][sp_id] = np_to_b64(arr)
-            
-            self.redis.set(self.REDIS_KEY, json.dumps(data))
-            print(f"Saved to Redis ({len(json.dumps(data)) // 1024} KB)")
-            return True
-        except Exception as e:
-            print(f"Redis save failed: {e}")
-            return False
+        # Species
+        for sp_id, arr in w.species_presence.items():
+            if arr is not None:
+                data['species'][sp_id] = np_to_b64(arr)
+        
+        return json.dumps(data)
     
     def _load_from_redis(self) -> bool:
-        """Load full world state from Redis."""
+        """Load full world state from Redis, unless it was built from other rules."""
         try:
-            raw = self.redis.get(self.REDIS_KEY)
+            t0 = time.perf_counter()
+            raw = self.redis.load(self.redis_key)
             if not raw:
-                print("No data in Redis")
+                log_event('persistence', op='load', target='redis', status='empty', key=self.redis_key)
                 return False
             
             data = json.loads(raw)
+            built_for = data.get('rules_digest')
+            if built_for is not None and built_for != rules_digest(self.rules):
+                log_event('persistence', op='load', target='redis', status='skipped', reason='other rules',
+                          key=self.redis_key)
+                return False
             rows, cols = data['shape']
             
-            self.terrain = b64_to_np(data['terrain'], np.uint8, (rows, cols))
-            
-            self.corridors = {}
-            for name, b64 in data.get('corridors', {}).items():
-                self.corridors[name] = b64_to_np(b64, np.uint8, (rows, cols)).astype(bool)
-            
-            self.species_presence = {}
-            for sp_id, b64 in data.get('species', {}).items():
-                self.species_presence[sp_id] = b64_to_np(b64, np.uint8, (rows, cols))
+            world = self._swap(World(
+                rules=self.rules,
+                terrain=b64_to_np(data['terrain'], np.uint8, (rows, cols)),
+                corridors={name: b64_to_np(b64, np.uint8, (rows, cols)).astype(bool)
+                           for name, b64 in data.get('corridors', {}).items()},
+                species_presence={sp_id: b64_to_np(b64, np.uint8, (rows, cols))
+                                  for sp_id, b64 in data.get('species', {}).items()},
+                signs=data.get('signs', []),
+                predator_presence=data.get('predator_presence', {}),
+                time_of_day=data.get('time_of_day', 'midday'),
+                season=data.get('season', 'spring'),
+                month=data.get('month', 4),
+                seed=data.get('seed', 42),
+            ))
             
-            self.signs = data.get('signs', [])
-            self.predator_presence = data.get('predator_presence', {})
-            self.time_of_day = data.get('time_of_day', 'midday')
-            self.season = data.get('season', 'spring')
-            
-            print(f"Loaded from Redis: {rows}x{cols}, {len(self.signs)} signs")
+            log_event('loaded', target='redis', shape=f'{rows}x{cols}', signs=len(world.signs))
+            record_persistence('load', 'redis', len(raw), time.perf_counter() - t0)
             
             # Also save locally as cache
-            self.save()
+            self.save(world)
             return True
         except Exception as e:
-            print(f"Redis load failed: {e}")
+            log_event('persistence', op='load', target='redis', status='failed', error=repr(e))
             return False
     
-    def get_config(self) -> dict:
+    def get_config(self, world: World = None) -> dict:
         """Return config for frontend."""
-        grid = self.terrain_rules.get('grid', {})
-        spawn = self.terrain_rules.get('spawn', {})
+        w = world or self.world
+        grid = w.terrain_rules.get('grid', {})
+        spawn = w.terrain_rules.get('spawn', {})
         
         return {
             'grid_cols': grid.get('cols', 200),
             'grid_rows': grid.get('rows', 250),
             'spawn_x': spawn.get('x', 20),
             'spawn_y': spawn.get('y', 42),
-            'visibility_radius': self.terrain_rules.get('visibility_radius', 3),
-            'terrain_types': {str(k): {'name': v['name'], 'color': v['color']} for k, v in self.terrain_types.items()},
-            'predator_presence': self.predator_presence,
-            'time_of_day': self.time_of_day,
-            'season': self.season,
-            'symbols': self.symbols,
+            'visibility_radius': w.visibility_radius,
+            'terrain_types': {str(k): {'name': v['name'], 'color': v['color']} for k, v in w.terrain_types.items()},
+            'predator_presence': dict(w.predator_presence),
+            'time_of_day': w.time_of_day,
+            'season': w.season,
+            'month': w.month,
+            'symbols': w.symbols,
         }
     
-    def observe(self, x: int, y: int, radius: int = None) -> dict:
+    def observe(self, x: int, y: int, radius: int = None, world: World = None) -> dict:
         """Get observations at location."""
-        cfg = self.get_config()
-        radius = radius or cfg['visibility_radius']
-        rows, cols = self.terrain.shape
+        w = world or self.world
+        radius = radius or w.visibility_radius
+        rows, cols = w.shape
         
         if not (0 <= x < cols and 0 <= y < rows):
             return {'error': 'Out of bounds'}
         
-        context = self._build_context(x, y, radius)
-        
-        # Current terrain
-        tid = int(self.terrain[y, x])
-        
-        # Visible terrains
-        visible_terrains = []
-        seen = set()
-        for dy in range(-radius, radius + 1):
-            for dx in range(-radius, radius + 1):
-                if dx*dx + dy*dy > radius*radius:
-                    continue
-                cy, cx = y + dy, x + dx
-                if 0 <= cy < rows and 0 <= cx < cols:
-                    t = int(self.terrain[cy, cx])
-                    if t not in seen:
-                        seen.add(t)
-                        tt = self.terrain_types.get(t, {})
-                        visible_terrains.append({'id': t, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')})
-        
-        # Species observations
-        observations = []
-        for sp_id, presence in self.species_presence.items():
-            cells, max_state = [], 0
-            for dy in range(-radius, radius + 1):
-                for dx in range(-radius, radius + 1):
-                    if dx*dx + dy*dy > radius*radius:
-                        continue
-                    cy, cx = y + dy, x + dx
-                    if 0 <= cy < rows and 0 <= cx < cols and presence[cy, cx] > 0:
-                        cells.append({'x': cx, 'y': cy})
-                        max_state = max(max_state, int(presence[cy, cx]))
-            
-            if not cells:
-                continue
-            
-            sp = self.species.get(sp_id, {})
-            obs = sp.get('observation', {})
-            
-            # Build observation text with conditionals
-            text = {f: obs.get(f, '') for f in ['visual', 'tactile', 'smell', 'sound', 'habitat', 'season_note', 'uses']}
-            
-            self_ctx = {'state': max_state}
-            for ct in obs.get('conditional_texts', []):
-                cond = ct.get('condition', '')
-                ct_radius = ct.get('radius', radius)
-                eval_ctx = context if ct_radius == radius else self._build_context(x, y, ct_radius)
-                
-                if self._eval_condition(cond, eval_ctx, self_ctx):
-                    field = ct.get('append_to', '')
-                    if field in text:
-                        text[field] += ' ' + ct.get('text', '')
-            
-            observations.append({
-                'species_id': sp_id,
-                'common_name': sp.get('common', sp_id),
-                'latin_name': sp.get('latin', ''),
-                'category': sp.get('category', ''),
-                'count': len(cells),
-                'locations': cells,
-                'state': max_state,
-                'photo_url': f"/assets/species/{sp.get('photo')}" if sp.get('photo') else None,
-                **text,
-            })
-        
-        # Sort
-        order = ['tree', 'shrub', 'plant', 'large_herbivore', 'medium_herbivore', 'predator', 'aquatic']
-        observations.sort(key=lambda o: (order.index(o['category']) if o['category'] in order else 99, o['common_name']))
-        
-        # Signs
-        visible_signs = []
-        for s in self.signs:
-            if (s['x'] - x)**2 + (s['y'] - y)**2 <= radius*radius:
-                sym = self.symbols.get(s['type'], {})
-                visible_signs.append({
-                    'type': s['type'], 'x': s['x'], 'y': s['y'],
-                    'char': sym.get('char', '?'), 'color': sym.get('color', '#888'),
-                    'description': sym.get('description', ''),
-                })
-        
-        # Corridors
-        corridors_here = [n for n, m in self.corridors.items() if m is not None and m[y, x]]
+        return self.observer.result(self.observer.start(w, x, y, radius))
+    
+    def observe_step(self, prev: Optional[ObservationState], dx: int, dy: int, x: int = None, y: int = None,
+                     radius: int = None, world: World = None) -> Tuple[dict, Optional[ObservationState]]:
+        """Observation after moving prev's position by (dx, dy).
+        
+        Only the cells entering and leaving the visibility disc are read; prev
+        is updated in place and returned with the result. Without prev, a new
+        state is started at (x, y). Out-of-bounds moves return an error and
+        leave prev untouched.
+        """
+        w = world or self.world
+        rows, cols = w.shape
+        if prev is None:
+            nx, ny = x, y
+        else:
+            nx, ny = prev.x + dx, prev.y + dy
+        if nx is None or not (0 <= nx < cols and 0 <= ny < rows):
+            return {'error': 'Out of bounds'}, prev
         
-        tt = self.terrain_types.get(tid, {})
-        return {
-            'location': {'x': x, 'y': y},
-            'current_terrain': {'id': tid, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')},
-            'visible_terrains': visible_terrains,
-            'observations': observations,
-            'signs': visible_signs,
-            'corridors': corridors_here,
-            'time_of_day': self.time_of_day,
-            'season': self.season,
-        }
+        if prev is None:
+            st = self.observer.start(w, nx, ny, radius or w.visibility_radius)
+        else:
+            st = self.observer.step(w, prev, dx, dy)
+        return self.observer.result(st), st
     
-    def _build_context(self, x: int, y: int, radius: int) -> dict:
+    def _build_context(self, w: World, x: int, y: int, radius: int) -> dict:
         """Build context for condition evaluation."""
-        rows, cols = self.terrain.shape
+        rows, cols = w.terrain.shape
         ctx = {'species': {}, 'sign': {}, 'terrain': {}, 'time': {}, 'corridor': {}}
         
         # Terrain
-        tid = int(self.terrain[y, x])
-        ctx['terrain']['current'] = self.terrain_types.get(tid, {}).get('name', 'unknown')
+        tid = int(w.terrain[y, x])
+        ctx['terrain']['current'] = w.terrain_types.get(tid, {}).get('name', 'unknown')
         
         nearby = set()
         for dy in range(-radius, radius + 1):
@@ -348,19 +657,19 @@ class StateManager:
                 if dx*dx + dy*dy <= radius*radius:
                     cy, cx = y + dy, x + dx
                     if 0 <= cy < rows and 0 <= cx < cols:
-                        nearby.add(int(self.terrain[cy, cx]))
+                        nearby.add(int(w.terrain[cy, cx]))
         ctx['terrain']['is_ecotone'] = len(nearby) > 1
         
         # Time
-        ctx['time']['of_day'] = self.time_of_day
-        ctx['time']['season'] = self.season
+        ctx['time']['of_day'] = w.time_of_day
+        ctx['time']['season'] = w.season
         
         # Corridors
-        for name, mask in self.corridors.items():
+        for name, mask in w.corridors.items():
             ctx['corridor'][name] = {'in': bool(mask[y, x]) if mask is not None else False}
         
         # Species
-        for sp_id, presence in self.species_presence.items():
+        for sp_id, presence in w.species_presence.items():
             cells, max_state, min_dist = 0, 0, 999
             for dy in range(-radius, radius + 1):
                 for dx in range(-radius, radius + 1):
@@ -380,7 +689,7 @@ class StateManager:
             }
         
         # Signs
-        for s in self.signs:
+        for s in w.signs:
             if (s['x'] - x)**2 + (s['y'] - y)**2 <= radius*radius:
                 t = s['type']
                 if t not in ctx['sign']:
@@ -458,42 +767,162 @@ class StateManager:
         return s.strip('"\'')
     
     def set_time(self, time_of_day: str):
-        valid = ['dawn', 'morning', 'midday', 'afternoon', 'dusk', 'night']
-        if time_of_day in valid:
-            self.time_of_day = time_of_day
+        """Change the time of day, moving the animals on if the rules enable `movement`.
+        
+        Moved animals are saved behind the request and Redis is write-behind,
+        so this returns once the new world is in place. Setting the current
+        time of day again changes nothing.
+        """
+        if time_of_day in TIMES_OF_DAY:
+            if self.shared is not None:
+                return self._set_time_shared(time_of_day)
+            with self._write_lock:
+                if time_of_day == self.world.time_of_day:
+                    return
+                moved = self._move_animals(self.world, time_of_day)
+                changes = {'species_presence': {**self.world.species_presence, **moved}} if moved else {}
+                self.world = world = self.world.with_changes(time_of_day=time_of_day, **changes)
+                if moved:
+                    self.agents.drawn_into(world)
+            self._notify(world)
+            if moved:
+                self._save_behind([f'presence:{sp}' for sp in moved])
             # Persist to Redis
             if self.redis:
-                try:
-                    raw = self.redis.get(self.REDIS_KEY)
-                    if raw:
-                        data = json.loads(raw)
-                        data['time_of_day'] = time_of_day
-                        self.redis.set(self.REDIS_KEY, json.dumps(data))
-                except:
-                    pass
-    
-    def get_corridors(self) -> dict:
-        """Return all corridors for god mode."""
+                self._save_to_redis()
+    
+    def _set_time_shared(self, time_of_day: str):
+        with self.shared.lock():
+            pointer = self.shared.read_pointer()
+            if pointer and pointer['snapshot'] != self._snapshot:
+                self._attach(pointer)
+            if time_of_day == (pointer['time_of_day'] if pointer else self.world.time_of_day):
+                return
+            moved = self._move_animals(self.world, time_of_day)
+            if moved:
+                # new animal positions are a new snapshot for every worker, sharing all the other files
+                world = self.world.with_changes(time_of_day=time_of_day,
+                                                species_presence={**self.world.species_presence, **moved})
+                self.agents.drawn_into(self._attach(self._publish(world, [f'presence:{sp}' for sp in moved])))
+            else:
+                with self._write_lock:
+                    self.world = world = self.world.with_changes(time_of_day=time_of_day)
+                self._notify(world)
+                if pointer and pointer['snapshot'] == self._snapshot:
+                    self.shared.write_pointer({**pointer, 'time_of_day': time_of_day, 'version': world.version})
+        if self.redis:
+            self._save_to_redis()
+    
+    def _move_animals(self, w: World, time_of_day: str) -> Dict[str, np.ndarray]:
+        """New presence grids of the animals walked on to time_of_day ({} if nothing moves)."""
+        if not (w.species_rules.get('movement') or {}).get('enabled'):
+            return {}
+        t0 = time.perf_counter()
+        if self.agents is None or not self.agents.matches(w):
+            self.agents = AgentLayer(w)
+        moved = self.agents.advance(w, time_of_day)
+        metrics.observe('agent_step_seconds', time.perf_counter() - t0)
+        return moved
+    
+    def advance_month(self, months: int = 1, min_interval: float = None) -> Optional[dict]:
+        """Run the season simulation forward by some months (see engine/seasons.py).
+        
+        Only the layers a month changed get new arrays and are saved; the rest
+        of the world is carried over. A regeneration that lands while the
+        months are being simulated wins, and the ticks are dropped.
+        
+        In shared mode the result is published as a new snapshot, and
+        min_interval skips the tick if any worker advanced the shared world
+        that recently (so one clock per worker still means one month).
+        Returns None if nothing was advanced.
+        """
+        with self._season_lock:
+            if self.shared is None:
+                return self._advance(months)
+            with self.shared.lock():
+                pointer = self.shared.read_pointer()
+                if min_interval and pointer and time.time() - pointer.get('advanced_at', 0) < min_interval:
+                    return None
+                if pointer and pointer['snapshot'] != self._snapshot:
+                    self._attach(pointer)
+                return self._advance(months)
+    
+    def _advance(self, months: int) -> Optional[dict]:
+        start = world = self.world
+        t0 = time.perf_counter()
+        changed: List[str] = []
+        for _ in range(months):
+            world, layers, timings = self.seasons.tick(world)
+            changed += [layer for layer in layers if layer not in changed]
+            for phase, seconds in timings.items():
+                metrics.observe('season_tick_seconds', seconds, phase=phase)
+        seconds = time.perf_counter() - t0
+        
+        if self.shared is not None:
+            self._attach(self._publish(world, changed))
+            world = self.world
+        else:
+            with self._write_lock:
+                current = self.world
+                if current.rules is not start.rules or current.terrain is not start.terrain:
+                    log_event('season', status='superseded', months=months)
+                    return None
+                # keep animals that moved meanwhile unless the months changed them too
+                presence = {**current.species_presence,
+                            **{k: v for k, v in world.species_presence.items() if f'presence:{k}' in changed}}
+                self.world = world = world.with_changes(time_of_day=current.time_of_day, species_presence=presence)
+            self._notify(world)
+            self.save(world, layers=changed)
+        if self.redis:
+            self._save_to_redis()
+        
+        log_event('season', status='ok', month=world.month, season=world.season, months=months,
+                  changed=len(changed), seconds=seconds)
+        return {**self.get_game_state(world), 'version': world.version, 'changed': changed,
+                'seconds': round(seconds, 4)}
+    
+    def get_game_state(self, world: World = None) -> dict:
+        """Current month and season."""
+        w = world or self.world
+        return {'month': w.month, 'month_name': calendar(w.rules.get('seasons') or {})[w.month]['name'],
+                'season': w.season, 'time_of_day': w.time_of_day}
+    
+    CORRIDOR_FORMATS = ('json', 'bitmask', 'rle')
+    SIGN_FORMATS = ('json', 'columnar')
+
+    def get_corridors(self, format: str = 'json', world: World = None) -> dict:
+        """Return all corridors for god mode.
+        
+        format=json lists [x, y] cells; bitmask/rle encode each row-major mask
+        (see engine.encoding) alongside the grid width and height.
+        """
+        w = world or self.world
         result = {}
-        cfg = self.terrain_rules.get('corridors', {})
-        for name, mask in self.corridors.items():
+        cfg = w.terrain_rules.get('corridors', {})
+        rows, cols = w.shape
+        for name, mask in w.corridors.items():
             if mask is None:
                 continue
-            cells = np.argwhere(mask)
-            result[name] = {
-                'cells': [[int(x), int(y)] for y, x in cells],
-                'color': cfg.get(name, {}).get('color', '#888'),
-                'count': len(cells),
-            }
+            entry = {'color': cfg.get(name, {}).get('color', '#888'), 'count': int(np.count_nonzero(mask))}
+            if format == 'bitmask':
+                entry.update(encoding='bitmask', width=cols, height=rows, data=mask_bitmask(mask))
+            elif format == 'rle':
+                entry.update(encoding='rle', width=cols, height=rows, data=mask_rle(mask))
+            else:
+                entry['cells'] = [[int(x), int(y)] for y, x in np.argwhere(mask)]
+            result[name] = entry
         return result
     
-    def get_all_signs(self) -> list:
-        """Return all signs for god mode."""
+    def get_all_signs(self, format: str = 'json', world: World = None):
+        """Return all signs for god mode, grouped by type (json) or as typed columns (columnar)."""
+        w = world or self.world
+        if format == 'columnar':
+            return signs_columnar(w.signs, w.symbols)
         by_type = {}
-        for s in self.signs:
+        for s in w.signs:
             t = s['type']
             if t not in by_type:
-                sym = self.symbols.get(t, {})
+                sym = w.symbols.get(t, {})
                 by_type[t] = {
                     'type': t, 'char': sym.get('char', '?'),
                     'color': sym.get('color', '#888'),
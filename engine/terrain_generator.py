@@ -9,6 +9,8 @@ from typing import Dict, Tuple, List
 
 
 class TerrainGenerator:
+    CORRIDOR_ORDER = ['water_edge', 'ecotone', 'game_trail']
+    
     def __init__(self, rules: dict):
         self.rules = rules
         self.grid = rules['grid']
@@ -24,12 +26,13 @@ class TerrainGenerator:
         if seed is not None:
             np.random.seed(seed)
         
-        terrain = self._generate_terrain()
+        terrain = self.generate_terrain()
         corridors = self._generate_corridors(terrain)
         
         return terrain, corridors
     
-    def _generate_terrain(self) -> np.ndarray:
+    def generate_terrain(self) -> np.ndarray:
+        """Generate the terrain array (lake zones, platform, grassland patches)."""
         terrain = np.zeros((self.rows, self.cols), dtype=np.uint8)
         lake = self.rules['lake']
         
@@ -92,17 +95,23 @@ class TerrainGenerator:
         corridors = {}
         corridor_rules = self.rules.get('corridors', {})
         
-        if 'water_edge' in corridor_rules:
-            corridors['water_edge'] = self._gen_water_edge(terrain, corridor_rules['water_edge'])
-        
-        if 'ecotone' in corridor_rules:
-            corridors['ecotone'] = self._gen_ecotone(terrain, corridor_rules['ecotone'])
-        
-        if 'game_trail' in corridor_rules:
-            corridors['game_trail'] = self._gen_game_trails(terrain, corridor_rules['game_trail'])
+        for name in self.CORRIDOR_ORDER:
+            if name in corridor_rules:
+                corridors[name] = self.generate_corridor(name, terrain)
         
         return corridors
     
+    def generate_corridor(self, name: str, terrain: np.ndarray) -> np.ndarray:
+        """Generate a single corridor mask from its rule block."""
+        cfg = self.rules.get('corridors', {})[name]
+        if name == 'water_edge':
+            return self._gen_water_edge(terrain, cfg)
+        if name == 'ecotone':
+            return self._gen_ecotone(terrain, cfg)
+        if name == 'game_trail':
+            return self._gen_game_trails(terrain, cfg)
+        raise ValueError(f"Unknown corridor: {name}")
+    
     def _gen_water_edge(self, terrain: np.ndarray, cfg: dict) -> np.ndarray:
         width = cfg.get('width', 3)
         water_ids = [self.terrain_ids[t] for t in cfg.get('source_terrain', ['deep_water', 'shallow_water'])]
@@ -0,0 +1,238 @@
+"""
+Tiles - Pre-rendered PNG tile pyramid of the terrain with optional overlays
+
+Zoom `max_zoom` shows TILE_CELLS cells per tile edge (CELL_PX pixels per cell);
+each lower zoom doubles the cells per tile, down to zoom 0 where one tile
+covers the whole map. Tiles are rendered lazily and cached in memory and on
+disk, both LRU-evicted, keyed on a digest of the layers they draw (terrain,
+plus corridors and/or signs for overlays, with their colours). Time of day
+changes and season ticks that leave those layers alone keep every tile.
+
+The game client draws its own cells from /api/session; the pyramid serves
+map viewers such as Leaflet, via the URL template from /api/tiles.
+"""
+
+import collections
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+from typing import Optional, Tuple
+
+from .world import World
+
+TILE_PX = 256
+CELL_PX = 8
+TILE_CELLS = TILE_PX // CELL_PX
+OVERLAYS = ('corridors', 'signs')
+
+
+def parse_color(hex_color: str) -> Tuple[int, int, int, int]:
+    """'#rrggbb' or '#rrggbbaa' → RGBA tuple."""
+    h = (hex_color or '#888888').lstrip('#')
+    if len(h) == 3:
+        h = ''.join(c * 2 for c in h)
+    r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+    a = int(h[6:8], 16) if len(h) >= 8 else 255
+    return r, g, b, a
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (h, w, 4) uint8 array as PNG."""
+    h, w, _ = rgba.shape
+    raw = np.zeros((h, w * 4 + 1), dtype=np.uint8)  # filter byte 0 per scanline
+    raw[:, 1:] = rgba.reshape(h, w * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+
+def max_zoom(shape: Tuple[int, int]) -> int:
+    return max(0, math.ceil(math.log2(max(shape) / TILE_CELLS)))
+
+
+class TileCache:
+    def __init__(self, data_dir: str = 'data', memory_bytes: int = 32 << 20, disk_bytes: int = 256 << 20):
+        self.dir = os.path.join(data_dir, 'tiles')
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'rendered': 0}
+        self._mem: 'collections.OrderedDict[tuple, bytes]' = collections.OrderedDict()
+        self._mem_size = 0
+        self._disk: 'collections.OrderedDict[str, int]' = collections.OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        # id(layer) → (layer, digest); holding the layer keeps its id from being reused
+        self._digests: 'collections.OrderedDict[int, tuple]' = collections.OrderedDict()
+        self._scan_disk()
+
+    def _layer_digest(self, layer, data) -> str:
+        """Digest of one layer object, computed once while it stays among the recently used."""
+        with self._lock:
+            hit = self._digests.get(id(layer))
+            if hit is not None and hit[0] is layer:
+                self._digests.move_to_end(id(layer))
+                return hit[1]
+        h = hashlib.sha1()
+        for part in data():
+            h.update(part)
+        digest = h.hexdigest()
+        with self._lock:
+            self._digests[id(layer)] = (layer, digest)
+            while len(self._digests) > 64:
+                self._digests.popitem(last=False)
+        return digest
+
+    def digest(self, world: World, overlays: Tuple[str, ...] = ()) -> str:
+        """Key of everything a tile with these overlays draws; equal digests render equal tiles."""
+        def grid(arr):
+            return lambda: [str(arr.shape).encode(), np.ascontiguousarray(arr).tobytes()]
+
+        colors = {tid: tt.get('color') for tid, tt in world.terrain_types.items()}
+        parts = [self._layer_digest(world.terrain, grid(world.terrain)), json.dumps(colors, sort_keys=True)]
+        if 'corridors' in overlays:
+            for name in sorted(world.corridors):
+                parts.append(self._layer_digest(world.corridors[name], grid(world.corridors[name])))
+            colors = {n: c.get('color') for n, c in world.terrain_rules.get('corridors', {}).items()}
+            parts.append(json.dumps(colors, sort_keys=True))
+        if 'signs' in overlays:
+            signs = world.signs
+            parts.append(self._layer_digest(signs, lambda: [json.dumps(list(signs)).encode()]))
+            parts.append(json.dumps({t: s.get('color') for t, s in world.symbols.items()}, sort_keys=True))
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+    def _scan_disk(self):
+        if not os.path.isdir(self.dir):
+            return
+        entries = []
+        for root, _, files in os.walk(self.dir):
+            for f in files:
+                path = os.path.join(root, f)
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(entries):
+            self._disk[path] = size
+            self._disk_size += size
+
+    def _path(self, key: tuple) -> str:
+        digest, overlays, z, x, y = key
+        return os.path.join(self.dir, digest, overlays or 'base', str(z), str(x), f'{y}.png')
+
+    def get(self, world: World, z: int, x: int, y: int, overlays: Tuple[str, ...] = ()) -> Optional[bytes]:
+        """PNG bytes for a tile, or None if the tile lies outside the pyramid."""
+        zmax = max_zoom(world.shape)
+        span = TILE_CELLS << (zmax - z) if 0 <= z <= zmax else 0
+        rows, cols = world.shape
+        if not span or x < 0 or y < 0 or x * span >= cols or y * span >= rows:
+            return None
+
+        key = (self.digest(world, overlays), '+'.join(sorted(overlays)), z, x, y)
+        with self._lock:
+            png = self._mem.get(key)
+            if png is not None:
+                self._mem.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return png
+
+        path = self._path(key)
+        png = self._read_disk(path)
+        if png is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            png = encode_png(render_tile(world, z, x, y, overlays))
+            self.stats['rendered'] += 1
+            self._write_disk(path, png)
+
+        with self._lock:
+            if key not in self._mem:
+                self._mem[key] = png
+                self._mem_size += len(png)
+            while self._mem_size > self.memory_bytes and self._mem:
+                _, old = self._mem.popitem(last=False)
+                self._mem_size -= len(old)
+        return png
+
+    def _read_disk(self, path: str) -> Optional[bytes]:
+        with self._lock:
+            if path not in self._disk:
+                return None
+            self._disk.move_to_end(path)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, path: str, png: bytes):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(png)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Tile cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._disk_size += len(png) - self._disk.pop(path, 0)
+            self._disk[path] = len(png)
+            evict = []
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                old, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def render_tile(world: World, z: int, x: int, y: int, overlays: Tuple[str, ...] = ()) -> np.ndarray:
+    """Render one tile as an (TILE_PX, TILE_PX, 4) RGBA array (nearest-neighbour)."""
+    rows, cols = world.shape
+    span = TILE_CELLS << (max_zoom(world.shape) - z)
+
+    # Cell index under each pixel row/column
+    offs = np.arange(TILE_PX) * span // TILE_PX
+    ys, xs = y * span + offs, x * span + offs
+    valid = (ys < rows)[:, None] & (xs < cols)[None, :]
+    ys, xs = np.minimum(ys, rows - 1), np.minimum(xs, cols - 1)
+
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    for tid, tt in world.terrain_types.items():
+        lut[tid] = parse_color(tt.get('color'))
+    img = lut[world.terrain[ys[:, None], xs[None, :]]]
+
+    if 'corridors' in overlays:
+        corridor_rules = world.terrain_rules.get('corridors', {})
+        for name, mask in world.corridors.items():
+            r, g, b, a = parse_color(corridor_rules.get(name, {}).get('color', '#88888880'))
+            hit = mask[ys[:, None], xs[None, :]]
+            alpha = a / 255.0
+            img[hit, :3] = (img[hit, :3] * (1 - alpha) + np.array([r, g, b]) * alpha).astype(np.uint8)
+
+    if 'signs' in overlays and world.signs:
+        px = max(1, TILE_PX // span)  # pixels per cell at this zoom
+        dot = max(1, px // 2)
+        for s in world.signs:
+            cx, cy = s['x'] - x * span, s['y'] - y * span
+            if not (0 <= cx < span and 0 <= cy < span):
+                continue
+            r, g, b, _ = parse_color(world.symbols.get(s['type'], {}).get('color', '#888888'))
+            x0 = cx * TILE_PX // span + (px - dot) // 2
+            y0 = cy * TILE_PX // span + (px - dot) // 2
+            img[y0:y0 + dot, x0:x0 + dot] = (r, g, b, 255)
+
+    img[~valid] = 0
+    return img
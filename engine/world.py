@@ -0,0 +1,135 @@
+"""
+World - Immutable snapshot of a generated world plus the rules it was built from
+
+A World is never modified after construction: arrays are read-only and the maps
+are read-only views. Changing anything (time of day, a month passing, a regenerated layer) means
+building a new World with `with_changes()` and swapping the reference.
+"""
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple, Any
+
+_version_lock = threading.Lock()
+_last_version = 0
+
+
+def next_version() -> int:
+    """Monotonic world version, unique across restarts (microsecond clock)."""
+    global _last_version
+    with _version_lock:
+        _last_version = max(_last_version + 1, time.time_ns() // 1000)
+        return _last_version
+
+
+def rules_digest(rules: dict) -> str:
+    """Short content hash of a rules dict."""
+    try:
+        text = json.dumps(rules, sort_keys=True, default=str)
+    except TypeError:
+        # maps mixing int and str keys (seasons.yaml rates) can't be sorted as they are
+        text = json.dumps(_str_keys(rules), sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _str_keys(obj):
+    if isinstance(obj, dict):
+        return {str(k): _str_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_str_keys(v) for v in obj]
+    return obj
+
+
+def _freeze(arr: np.ndarray) -> np.ndarray:
+    if arr is not None and arr.flags.writeable:
+        arr.flags.writeable = False
+    return arr
+
+
+@dataclass(frozen=True, eq=False)
+class World:
+    rules: dict
+    terrain: np.ndarray
+    corridors: Mapping[str, np.ndarray]
+    species_presence: Mapping[str, np.ndarray]
+    signs: Tuple[dict, ...]
+    predator_presence: Mapping[str, bool]
+    time_of_day: str = 'midday'
+    season: str = 'spring'
+    month: int = 4
+    seed: int = 42
+    version: int = field(default_factory=next_version)
+
+    def __post_init__(self):
+        _freeze(self.terrain)
+        for arr in itertools.chain(self.corridors.values(), self.species_presence.values()):
+            _freeze(arr)
+        object.__setattr__(self, 'corridors', MappingProxyType(dict(self.corridors)))
+        object.__setattr__(self, 'species_presence', MappingProxyType(dict(self.species_presence)))
+        object.__setattr__(self, 'predator_presence', MappingProxyType(dict(self.predator_presence)))
+        object.__setattr__(self, 'signs', tuple(self.signs))
+
+    def with_changes(self, **changes: Any) -> 'World':
+        """New snapshot with some fields replaced and a fresh version."""
+        return dataclasses.replace(self, **{'version': next_version(), **changes})
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.terrain.shape
+
+    @cached_property
+    def nbytes(self) -> int:
+        """Approximate resident size of the grid layers."""
+        arrays = itertools.chain([self.terrain], self.corridors.values(), self.species_presence.values())
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    # Rule lookups travel with the world so readers never pair new arrays with old rules
+
+    @cached_property
+    def terrain_rules(self) -> dict:
+        return self.rules.get('terrain', {})
+
+    @cached_property
+    def species_rules(self) -> dict:
+        return self.rules.get('species', {})
+
+    @cached_property
+    def terrain_types(self) -> Dict[int, dict]:
+        return {int(k): v for k, v in self.terrain_rules.get('terrain_types', {}).items()}
+
+    @cached_property
+    def terrain_ids(self) -> Dict[str, int]:
+        return {v['name']: k for k, v in self.terrain_types.items()}
+
+    @cached_property
+    def symbols(self) -> dict:
+        return self.species_rules.get('symbols', {})
+
+    @cached_property
+    def species(self) -> dict:
+        return self.species_rules.get('species', {})
+
+    @cached_property
+    def visibility_radius(self) -> int:
+        return self.terrain_rules.get('visibility_radius', 3)
+
+    @cached_property
+    def rules_digest(self) -> str:
+        """Short content hash of the rules, stable across time-of-day changes."""
+        return rules_digest(self.rules)
+
+    @cached_property
+    def signs_by_cell(self) -> Dict[Tuple[int, int], Tuple[Tuple[int, dict], ...]]:
+        """(x, y) → ((index in signs, sign), ...)"""
+        cells: Dict[Tuple[int, int], list] = {}
+        for i, s in enumerate(self.signs):
+            cells.setdefault((s['x'], s['y']), []).append((i, s))
+        return {k: tuple(v) for k, v in cells.items()}
@@ -2,90 +2,594 @@
 Star Carr Mesolithic Scholar Simulator - FastAPI Server
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import (APIRouter, Depends, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect,
+                     WebSocketException)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.requests import HTTPConnection
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
-import yaml
+import asyncio
+import contextlib
+import gzip
+import json
+import multiprocessing
 import os
+import threading
+import time
+
+from engine import StateManager, RuleWatcher, load_rules
+from engine.jobs import JobConflict
+from engine.metrics import MetricsMiddleware, log_event, metrics
+from engine.payloads import not_modified
+from engine.pipeline import GenerationPool
+from engine.profiling import (MODES as PROFILE_MODES, Profiler, ProfilingMiddleware, admin_authorized,
+                              profiled_endpoint)
+from engine.registry import WorldRegistry
+from engine.seasons import SeasonClock
+from engine.session import Session
+from engine.shared import SharedWorld
+from engine.encoding import encode_raw, encode_rle, encode_gzip, encode_strips, clamp_rect, viewport_delta
+from engine.tiles import TileCache, TILE_PX, CELL_PX, OVERLAYS, max_zoom
+
+RULES_DIR = os.environ.get('RULES_DIR', 'rules')
 
 # Load rules
-with open('rules/terrain_init.yaml') as f:
-    terrain_rules = yaml.safe_load(f)
-with open('rules/species_init.yaml') as f:
-    species_rules = yaml.safe_load(f)
+rules = load_rules(RULES_DIR)
+
+# Initialize state manager. Generation runs in a worker process so it never
+# holds the GIL of the process serving requests (GENERATION_PROCESSES=0 runs inline).
+# The process is started by the first generation, so of several server workers
+# sharing a world only the one that generates and publishes it owns one.
+executor = GenerationPool() if os.environ.get('GENERATION_PROCESSES', '1') != '0' else None
+
+# With several workers the workers share one memory-mapped snapshot; whichever
+# gets the generation lock first creates it and the rest attach read-only.
+# `uvicorn --workers N` doesn't set WEB_CONCURRENCY, but its workers (like
+# --reload's) are multiprocessing children of the supervisor, which a single
+# server process never is. SHARED_WORLD=1/0 forces it either way.
+multi_worker = int(os.environ.get('WEB_CONCURRENCY', 1)) > 1 or multiprocessing.parent_process() is not None
+shared = None
+if os.environ.get('SHARED_WORLD', '1' if multi_worker else '0') != '0':
+    shared = SharedWorld('data')
+# Opt-in profiling; none of it is installed unless switched on.
+# PROFILE_GENERATE=cpu|alloc profiles every generation, PROFILE_REQUESTS=0.01
+# profiles a sampled fraction of API requests and PROFILE_QUERY=1 honours
+# ?profile=cpu|alloc on any request (and on POST /api/regenerate) that sends
+# the ADMIN_TOKEN in X-Admin-Token. /api/admin/* answers 404 unless
+# ADMIN_TOKEN is set and 403 without it.
+profile_generate = os.environ.get('PROFILE_GENERATE', '0')
+profile_generate = None if profile_generate == '0' else profile_generate if profile_generate in PROFILE_MODES else 'cpu'
+profile_requests = float(os.environ.get('PROFILE_REQUESTS', 0))
+profile_query = os.environ.get('PROFILE_QUERY', '0') != '0'
+admin_token = os.environ.get('ADMIN_TOKEN') or None
+profiler = Profiler(os.environ.get('PROFILE_DIR', 'data/profiles'), generate=profile_generate)
+
+# The world is loaded (or generated) in the background once the server is up;
+# until then /readyz and every world endpoint answer 503 with Retry-After.
+state = StateManager(rules, executor=executor, shared=shared, profiler=profiler)
+startup = {'status': 'loading', 'error': None, 'seconds': None}
+RETRY_AFTER = os.environ.get('STARTUP_RETRY_AFTER', '5')
+
+# Handlers read `state.world` once per request; regeneration runs as a background
+# job that builds a new World and swaps the reference, so a request never sees a
+# half-built world. At most one job runs at a time.
+jobs = state.jobs
+tiles = TileCache(state.data_dir)
+
+# Additional worlds (/api/worlds/{id}/...) load lazily and are evicted to disk
+# LRU-first once resident worlds exceed WORLD_MEMORY_MB. The default world
+# above backs the plain /api/... routes and is never evicted.
+registry = WorldRegistry(rules, data_dir=state.data_dir, executor=executor, store=state.redis,
+                         memory_bytes=int(os.environ.get('WORLD_MEMORY_MB', 256)) << 20, default=state,
+                         profiler=profiler)
+
+
+def reload_rules(new_rules: dict):
+    registry.set_rules(new_rules)
+    jobs.run(rules=new_rules)
+
+
+rule_watcher = RuleWatcher(RULES_DIR, on_change=reload_rules,
+                           interval=float(os.environ.get('RULES_POLL_SECONDS', 2)))
+
+# SEASON_TICK_SECONDS=3600 advances the default world a month every hour
+season_clock = SeasonClock(state, float(os.environ.get('SEASON_TICK_SECONDS', 0)))
+
+
+def _load_world():
+    t0 = time.perf_counter()
+    try:
+        state.load_or_generate(seed=42)
+    except Exception as e:
+        startup.update(status='failed', error=f'{type(e).__name__}: {e}')
+        log_event('startup', status='failed', error=startup['error'])
+        return
+    startup.update(status='ready', seconds=round(time.perf_counter() - t0, 3))
+    log_event('startup', status='ready', seed=state.world.seed, seconds=startup['seconds'])
+    if os.environ.get('RULES_WATCH', '1') != '0':
+        rule_watcher.start()
+    if season_clock.interval > 0:
+        season_clock.start()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bind first, load after: the port and /healthz are up while the world loads
+    threading.Thread(target=_load_world, name='world-loader', daemon=True).start()
+    yield
+    rule_watcher.stop()
+    season_clock.stop()
+    state.flush_saves(timeout=5)
+    if state.redis is not None:
+        state.redis.flush(timeout=5)
+
+
+app = FastAPI(title="Star Carr Mesolithic Scholar Simulator", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, slow_seconds=float(os.environ.get('SLOW_REQUEST_MS', 500)) / 1000)
+
+
+def _cache_metrics():
+    """Existing stats dicts as Prometheus families, read at scrape time."""
+    worlds = registry.resident()
+    yield ('singleflight_calls_total', 'counter', 'Calls through the single-flight layer',
+           [({'world': wid, 'op': op}, st['calls']) for wid, sm in worlds for op, st in sm.flights.stats().items()])
+    yield ('singleflight_coalesced_total', 'counter', 'Calls that joined an identical in-flight call',
+           [({'world': wid, 'op': op}, st['coalesced']) for wid, sm in worlds for op, st in sm.flights.stats().items()])
+    yield ('payload_cache_total', 'counter', 'Pre-encoded payload lookups by result',
+           [({'world': wid, 'result': k}, v) for wid, sm in worlds for k, v in sm.payloads.stats.items()])
+    yield ('tile_cache_total', 'counter', 'Tile requests by result',
+           [({'result': k}, v) for k, v in tiles.stats.items()])
+    yield ('world_resident_bytes', 'gauge', 'Array bytes of each resident world',
+           [({'world': wid}, sm.world.nbytes) for wid, sm in worlds if sm.world is not None])
+    if state.redis is not None:
+        yield ('redis_saves_total', 'counter', 'Write-behind Redis saves by outcome',
+               [({'result': k}, v) for k, v in state.redis.stats.items()])
+
+
+metrics.collect(_cache_metrics)
+
+
+class ProfiledRoute(APIRoute):
+    """Route whose sync endpoint can run under a profile requested by ProfilingMiddleware."""
+    
+    def get_route_handler(self):
+        if not asyncio.iscoroutinefunction(self.dependant.call):
+            self.dependant.call = profiled_endpoint(self.dependant.call, self.name)
+        return super().get_route_handler()
+
+
+route_class = APIRoute
+if profile_requests or profile_query:
+    route_class = app.router.route_class = ProfiledRoute
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, sample=profile_requests, query=profile_query,
+                       token=admin_token)
+
+# Per-world routes, mounted at /api (default world) and /api/worlds/{world_id}
+world_api = APIRouter(route_class=route_class)
 
-rules = {'terrain': terrain_rules, 'species': species_rules}
 
-# Initialize state manager
-from engine import StateManager
-state = StateManager(rules)
-state.load_or_generate(seed=42)
+class TimeUpdate(BaseModel):
+    time_of_day: str
 
-app = FastAPI(title="Star Carr Mesolithic Scholar Simulator")
 
+def _not_ready(conn: HTTPConnection = None) -> Exception:
+    detail = 'World failed to load' if startup['status'] == 'failed' else 'World is loading'
+    if conn is not None and conn.scope['type'] == 'websocket':
+        return WebSocketException(1013, detail)  # "try again later"
+    return HTTPException(503, detail, headers={'Retry-After': RETRY_AFTER})
 
-class TimeUpdate(BaseModel):
-    time_of_day: str
 
+def _world(conn: HTTPConnection) -> StateManager:
+    # the default world is pinned in the registry; going through get() counts its hits too
+    try:
+        sm = registry.get(conn.path_params.get('world_id', registry.DEFAULT))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except KeyError:
+        raise HTTPException(404, f"Unknown world '{conn.path_params.get('world_id')}'")
+    if sm.world is None:
+        raise _not_ready(conn)
+    return sm
 
-@app.get("/api/config")
-def get_config():
-    return state.get_config()
 
+@world_api.get("/config")
+def get_config(request: Request, sm: StateManager = Depends(_world)):
+    w = sm.world
+    return _payload_response(request, sm, w, 'config', lambda: _json_bytes(sm.get_config(world=w)))
 
-@app.get("/api/terrain/{x}/{y}")
-def get_terrain(x: int, y: int):
-    cfg = state.get_config()
-    if not (0 <= x < cfg['grid_cols'] and 0 <= y < cfg['grid_rows']):
+
+@world_api.get("/terrain/{x}/{y}")
+def get_terrain(x: int, y: int, sm: StateManager = Depends(_world)):
+    w = sm.world
+    rows, cols = w.shape
+    if not (0 <= x < cols and 0 <= y < rows):
         raise HTTPException(404, "Out of bounds")
-    tid = int(state.terrain[y, x])
-    tt = state.terrain_types.get(tid, {})
+    tid = int(w.terrain[y, x])
+    tt = w.terrain_types.get(tid, {})
     return {'x': x, 'y': y, 'terrain_id': tid, 'name': tt.get('name'), 'color': tt.get('color')}
 
 
-@app.get("/api/observe/{x}/{y}")
-def observe(x: int, y: int, radius: int = None):
-    result = state.observe(x, y, radius)
+@world_api.get("/observe/{x}/{y}")
+def observe(x: int, y: int, radius: int = None, sm: StateManager = Depends(_world)):
+    w = sm.world
+    result = sm.flights.do(('observe', w.version, x, y, radius), lambda: sm.observe(x, y, radius, world=w))
     if 'error' in result:
         raise HTTPException(404, result['error'])
     return result
 
 
-@app.get("/api/terrain_batch")
-def terrain_batch(min_x: int, min_y: int, max_x: int, max_y: int):
-    cfg = state.get_config()
+def _etag_response(request: Request, etag: str, build, media_type: str = 'application/json',
+                   headers: dict = None, cache_control: str = 'no-cache') -> Response:
+    """304 if the client already has this version, else the body from build()."""
+    headers = {'ETag': etag, 'Cache-Control': cache_control, **(headers or {})}
+    if not_modified(request.headers.get('if-none-match', ''), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=build(), media_type=media_type, headers=headers)
+
+
+def _json_bytes(obj) -> bytes:
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _payload_response(request: Request, sm: StateManager, w, name: str, build, rules: bool = False) -> Response:
+    """JSON body built once per world version (and gzip'd once for clients that accept it).
+    
+    rules=True keys a body derived from the rules alone on the rules digest,
+    so it stays cached (and valid in client caches) across time changes.
+    """
+    etag, headers, body = sm.payloads.encoded(w.version, name, build, request.headers.get('accept-encoding', ''),
+                                              rules=w.rules_digest if rules else None)
+    return _etag_response(request, etag, body, headers=headers)
+
+
+TERRAIN_FORMATS = {
+    'raw': ('application/octet-stream', encode_raw, {}),
+    'rle': ('application/x-star-carr-rle', encode_rle, {}),
+    'gzip': ('application/octet-stream', encode_gzip, {'Content-Encoding': 'gzip'}),
+}
+
+
+def _terrain_format(request: Request, fmt: str = None) -> str:
+    """format= query param wins; otherwise negotiate from Accept/Accept-Encoding."""
+    if fmt:
+        if fmt != 'json' and fmt not in TERRAIN_FORMATS:
+            raise HTTPException(400, f"Unknown format '{fmt}'")
+        return fmt
+    accept = request.headers.get('accept', '')
+    if 'application/x-star-carr-rle' in accept:
+        return 'rle'
+    if 'application/octet-stream' in accept:
+        return 'gzip' if 'gzip' in request.headers.get('accept-encoding', '') else 'raw'
+    return 'json'
+
+
+@world_api.get("/terrain_batch")
+def terrain_batch(request: Request, min_x: int, min_y: int, max_x: int, max_y: int, format: str = None,
+                  sm: StateManager = Depends(_world)):
+    """Terrain ids for a rectangle.
+    
+    format=json (default) returns nested lists; raw/rle/gzip return the block as
+    bytes with its origin and size in X-Min-X/X-Min-Y/X-Width/X-Height headers.
+    """
+    w = sm.world
+    rows, cols = w.shape
     min_x, min_y = max(0, min_x), max(0, min_y)
-    max_x, max_y = min(cfg['grid_cols'], max_x), min(cfg['grid_rows'], max_y)
-    cells = [[int(state.terrain[y, x]) for x in range(min_x, max_x)] for y in range(min_y, max_y)]
-    return {'min_x': min_x, 'min_y': min_y, 'cells': cells}
-
-
-@app.get("/api/god_mode/corridors")
-def get_corridors():
-    return state.get_corridors()
+    max_x, max_y = max(min_x, min(cols, max_x)), max(min_y, min(rows, max_y))
+    block = w.terrain[min_y:max_y, min_x:max_x]
+    fmt = _terrain_format(request, format)
+    etag = f'"{w.version}-{fmt}-{min_x}.{min_y}.{max_x}.{max_y}"'
+    
+    vary = {'Vary': 'Accept, Accept-Encoding'}
+    
+    key = ('terrain_batch', w.version, fmt, min_x, min_y, max_x, max_y)
+    
+    if fmt == 'json':
+        return _etag_response(request, etag, lambda: sm.flights.do(key, lambda: json.dumps(
+            {'min_x': min_x, 'min_y': min_y, 'cells': block.tolist()}, separators=(',', ':'))), headers=vary)
+    
+    media_type, encode, extra = TERRAIN_FORMATS[fmt]
+    headers = {'X-Min-X': str(min_x), 'X-Min-Y': str(min_y), 'X-Width': str(max_x - min_x),
+               'X-Height': str(max_y - min_y), 'X-World-Version': str(w.version), **vary, **extra}
+    return _etag_response(request, etag, lambda: sm.flights.do(key, lambda: encode(block)), media_type, headers)
+
+
+def _parse_rect(value: str):
+    try:
+        x0, y0, x1, y1 = (int(v) for v in value.split(','))
+    except ValueError:
+        raise HTTPException(400, "Rectangles are min_x,min_y,max_x,max_y")
+    return x0, y0, x1, y1
+
+
+@world_api.get("/terrain_delta")
+def terrain_delta(prev: str, next: str, version: int = None, format: str = 'raw',
+                  sm: StateManager = Depends(_world)):
+    """Terrain strips newly exposed when the viewport moves from `prev` to `next`.
+    
+    Body is encode_strips() output (gzip'd when format=gzip). If `version` is not
+    the current world version the whole `next` rectangle is sent and X-Full is 1,
+    so the client must drop its cached cells.
+    """
+    if format not in ('raw', 'gzip'):
+        raise HTTPException(400, "format must be raw or gzip")
+    w = sm.world
+    prev_rect, next_rect = clamp_rect(_parse_rect(prev), w.shape), clamp_rect(_parse_rect(next), w.shape)
+    full = version != w.version
+    rects = [next_rect] if full else viewport_delta(prev_rect, next_rect)
+    
+    body = encode_strips(w.terrain, rects)
+    headers = {'X-World-Version': str(w.version), 'X-Full': '1' if full else '0', 'Cache-Control': 'no-store'}
+    if format == 'gzip':
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(content=body, media_type='application/octet-stream', headers=headers)
+
+
+@world_api.get("/tiles")
+def tile_info(request: Request, sm: StateManager = Depends(_world)):
+    """Tile pyramid metadata; `url` pins the drawn layers' digest for immutable caching."""
+    w = sm.world
+    base = request.url.path[:-len('/tiles')]
+    digest = tiles.digest(w, OVERLAYS)
+    return {
+        'version': digest,
+        'tile_size': TILE_PX,
+        'cell_px': CELL_PX,
+        'max_zoom': max_zoom(w.shape),
+        'overlays': list(OVERLAYS),
+        'url': f'{base}/tiles/{{z}}/{{x}}/{{y}}?v={digest}',
+    }
+
+
+@world_api.get("/tiles/{z}/{x}/{y}")
+def get_tile(request: Request, z: int, x: int, y: int, overlay: str = '', v: str = None,
+             sm: StateManager = Depends(_world)):
+    """PNG terrain tile; overlay=corridors,signs adds god-mode layers."""
+    w = sm.world
+    overlays = tuple(sorted({o for o in overlay.split(',') if o}))
+    if any(o not in OVERLAYS for o in overlays):
+        raise HTTPException(400, f"Unknown overlay; choose from {', '.join(OVERLAYS)}")
+    png = tiles.get(w, z, x, y, overlays)
+    if png is None:
+        raise HTTPException(404, "No such tile")
+    
+    # URLs pinned to the current layers never change content; others must revalidate
+    cache = 'public, max-age=31536000, immutable' if v == tiles.digest(w, OVERLAYS) else 'no-cache'
+    etag = f'"{tiles.digest(w, overlays)}-{z}.{x}.{y}-{"+".join(overlays) or "base"}"'
+    return _etag_response(request, etag, lambda: png, 'image/png', cache_control=cache)
+
+
+@world_api.get("/god_mode/corridors")
+def get_corridors(request: Request, format: str = 'json', sm: StateManager = Depends(_world)):
+    """Corridor layers; format=bitmask or rle sends base64 masks instead of cell lists."""
+    if format not in sm.CORRIDOR_FORMATS:
+        raise HTTPException(400, f"Unknown format; choose from {', '.join(sm.CORRIDOR_FORMATS)}")
+    w = sm.world
+    return _payload_response(request, sm, w, f'corridors-{format}',
+                             lambda: _json_bytes(sm.get_corridors(format, world=w)))
+
+
+@world_api.get("/god_mode/signs")
+def get_signs(request: Request, format: str = 'json', sm: StateManager = Depends(_world)):
+    """All signs; format=columnar sends a type table plus base64 index/x/y columns."""
+    if format not in sm.SIGN_FORMATS:
+        raise HTTPException(400, f"Unknown format; choose from {', '.join(sm.SIGN_FORMATS)}")
+    w = sm.world
+    return _payload_response(request, sm, w, f'signs-{format}',
+                             lambda: _json_bytes(sm.get_all_signs(format, world=w)))
+
+
+@world_api.post("/time")
+def set_time(update: TimeUpdate, sm: StateManager = Depends(_world)):
+    sm.set_time(update.time_of_day)
+    return {'time_of_day': sm.world.time_of_day}
+
+
+@world_api.get("/game_state")
+def get_game_state(sm: StateManager = Depends(_world)):
+    return sm.get_game_state()
+
+
+@world_api.post("/season/advance")
+def advance_season(months: int = 1, sm: StateManager = Depends(_world)):
+    """Simulate the next month(s): presence, damage states and signs per seasons.yaml."""
+    if not 1 <= months <= 24:
+        raise HTTPException(400, "months must be between 1 and 24")
+    result = sm.advance_month(months)
+    if result is None:
+        raise HTTPException(409, "World was regenerated while the season was advancing")
+    return result
 
 
-@app.get("/api/god_mode/signs")
-def get_signs():
-    return state.get_all_signs()
+@world_api.get("/species")
+def get_species(request: Request, sm: StateManager = Depends(_world)):
+    w = sm.world
+    return _payload_response(request, sm, w, 'species', lambda: _json_bytes(w.species), rules=True)
+
+
+@world_api.get("/stats")
+def world_cache_stats(sm: StateManager = Depends(_world)):
+    """Request coalescing and payload cache counters for this world."""
+    return {'singleflight': sm.flights.stats(), 'payloads': dict(sm.payloads.stats)}
+
+
+@world_api.websocket("/session")
+async def session_socket(websocket: WebSocket, sm: StateManager = Depends(_world)):
+    """Movement channel: 'start', 'move' and 'time' messages in, 'update' diffs out.
+    
+    World changes (time of day, regeneration) are pushed as updates too.
+    """
+    await websocket.accept()
+    w = sm.world
+    spawn = w.terrain_rules.get('spawn', {})
+    session = Session(sm, spawn.get('x', 20), spawn.get('y', 42))
+    
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    unsubscribe = sm.subscribe(lambda world: loop.call_soon_threadsafe(changed.set))
+    receive = asyncio.ensure_future(websocket.receive_text())
+    world_changed = asyncio.ensure_future(changed.wait())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receive, world_changed}, return_when=asyncio.FIRST_COMPLETED)
+            if world_changed in done:
+                changed.clear()
+                world_changed = asyncio.ensure_future(changed.wait())
+                if session.started:
+                    reply = await run_in_threadpool(session.update, 'world')
+                    if reply:
+                        await websocket.send_json(reply)
+            if receive in done:
+                text = receive.result()
+                receive = asyncio.ensure_future(websocket.receive_text())
+                try:
+                    msg = json.loads(text)
+                except ValueError:
+                    await websocket.send_json({'type': 'error', 'detail': 'Messages must be JSON', 'seq': None})
+                    continue
+                try:
+                    reply = await run_in_threadpool(session.handle, msg)
+                except Exception as e:
+                    log_event('session', status='failed', error=repr(e))
+                    reply = {'type': 'error', 'detail': 'Message failed'}
+                if reply:
+                    await websocket.send_json({**reply, 'seq': msg.get('seq') if isinstance(msg, dict) else None})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        unsubscribe()
+        receive.cancel()
+        world_changed.cancel()
+
+
+@world_api.post("/regenerate", status_code=202)
+def regenerate(seed: int = None, profile: str = None, x_admin_token: str = Header(None),
+               sm: StateManager = Depends(_world)):
+    """Start a regeneration job for this world; profile=cpu|alloc profiles it (needs PROFILE_QUERY=1 and the admin token)."""
+    if profile is not None and not profile_query:
+        raise HTTPException(403, "Profiling by query flag is disabled (set PROFILE_QUERY=1)")
+    if profile is not None and not admin_authorized(admin_token, x_admin_token):
+        raise HTTPException(403, "Profiling needs the admin token in X-Admin-Token")
+    if profile is not None and profile not in PROFILE_MODES:
+        raise HTTPException(400, f"profile must be one of {', '.join(PROFILE_MODES)}")
+    try:
+        job = sm.jobs.submit(seed or 42, profile=profile)
+    except JobConflict as e:
+        return JSONResponse(status_code=409, content={'detail': str(e), **e.job.to_dict()})
+    return job.to_dict()
+
+
+def _job(job_id: str, sm: StateManager = Depends(_world)):
+    job = sm.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown job")
+    return job
+
+
+@world_api.get("/jobs/{job_id}")
+def get_job(job=Depends(_job)):
+    return job.to_dict()
+
+
+@world_api.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, job=Depends(_job), sm: StateManager = Depends(_world)):
+    return sm.jobs.cancel(job_id).to_dict()
+
+
+@world_api.get("/jobs/{job_id}/events")
+async def job_events(job=Depends(_job)):
+    """Server-Sent Events stream of job snapshots, one per change, until the job finishes."""
+    async def stream():
+        async for snapshot in job.snapshots():
+            yield f"data: {json.dumps(snapshot)}\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
+
+app.include_router(world_api, prefix='/api')
+app.include_router(world_api, prefix='/api/worlds/{world_id}')
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is serving. 503 only if loading the world failed."""
+    if startup['status'] == 'failed':
+        return JSONResponse(status_code=503, content={'status': 'failed', 'error': startup['error']})
+    return {'status': 'ok'}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once the default world is loaded, else 503 with Retry-After."""
+    w = state.world
+    if w is None:
+        return JSONResponse(status_code=503, headers={'Retry-After': RETRY_AFTER},
+                            content={'status': startup['status'], 'error': startup['error']})
+    return {'status': 'ready', 'seed': w.seed, 'version': w.version, 'load_seconds': startup['seconds'],
+            'redis': None if state.redis is None else state.redis.healthy}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of stage, persistence and request metrics (this worker only)."""
+    return Response(content=metrics.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.get("/api/worlds")
+def list_worlds():
+    """Known worlds with residency, size and hit-rate stats."""
+    return registry.summary()
+
+
+@app.post("/api/worlds/{world_id}", status_code=201)
+def create_world(world_id: str, seed: int = 42):
+    """Load world_id, generating it from `seed` if it has no snapshot yet."""
+    try:
+        registry.get(world_id, create=True, seed=seed)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return registry.stats(world_id)
+
+
+@app.get("/api/worlds/{world_id}")
+def world_stats(world_id: str):
+    if world_id not in registry.known():
+        raise HTTPException(404, f"Unknown world '{world_id}'")
+    return registry.stats(world_id)
+
+
+def _admin(x_admin_token: str = Header(None)):
+    """Admin-only routes: hidden unless ADMIN_TOKEN is set, and need it in X-Admin-Token."""
+    if admin_token is None:
+        raise HTTPException(404, "Not Found")
+    if not admin_authorized(admin_token, x_admin_token):
+        raise HTTPException(403, "Admin token required")
 
 
-@app.post("/api/time")
-def set_time(update: TimeUpdate):
-    state.set_time(update.time_of_day)
-    return {'time_of_day': state.time_of_day}
 
 
-@app.get("/api/species")
-def get_species():
-    return state.species
+@app.get("/api/admin/profiles", dependencies=[Depends(_admin)])
+def list_profiles():
+    """Recent profile reports, newest first, plus the active profiling settings."""
+    return {
+        'generate': profiler.generate,
+        'sample_rate': profile_requests,
+        'query_flag': profile_query,
+        'profiles': profiler.list(),
+    }
 
 
-@app.post("/api/regenerate")
-def regenerate(seed: int = None):
-    state.generate(seed or 42)
-    return {'status': 'regenerated'}
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(_admin)])
+def download_profile(profile_id: str, format: str = 'txt'):
+    """A profile report: format=txt (top functions/allocations) or prof (raw pstats)."""
+    path = profiler.path(profile_id, format)
+    if path is None:
+        raise HTTPException(404, "Unknown profile")
+    if format == 'prof':
+        return FileResponse(path, media_type='application/octet-stream', filename=f'{profile_id}.prof')
+    return FileResponse(path, media_type='text/plain; charset=utf-8')
 
 
 # Static files
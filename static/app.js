@@ -17,7 +17,12 @@ const state = {
     showAllTerrain: false,
     corridorData: null,
     allSignsData: null,
-    timeOfDay: 'midday'
+    worldVersion: null,
+    timeOfDay: 'midday',
+    socket: null, // session channel; HTTP is used while it's not open
+    sessionStarted: false,
+    observationMap: {},
+    signMap: {}
 };
 
 // Canvas setup
@@ -69,6 +74,7 @@ async function init() {
         
         setupControls();
         await updateView();
+        openSession();
         
         // Show predator presence in god mode
         updatePredatorInfo();
@@ -151,6 +157,12 @@ function setupControls() {
     timeSelect.addEventListener('change', async (e) => {
         state.timeOfDay = e.target.value;
         
+        if (sessionReady()) {
+            // The server pushes the updated view to every session
+            state.socket.send(JSON.stringify({ type: 'time', time_of_day: state.timeOfDay }));
+            return;
+        }
+        
         await fetch('/api/time', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
@@ -167,12 +179,12 @@ function setupControls() {
 async function loadGodModeData() {
     try {
         const [corridorRes, signsRes] = await Promise.all([
-            fetch('/api/god_mode/corridors'),
-            fetch('/api/god_mode/signs')
+            fetch('/api/god_mode/corridors?format=bitmask'),
+            fetch('/api/god_mode/signs?format=columnar')
         ]);
         
-        state.corridorData = await corridorRes.json();
-        state.allSignsData = await signsRes.json();
+        state.corridorData = decodeCorridors(await corridorRes.json());
+        state.allSignsData = decodeSigns(await signsRes.json());
         
         // Build corridor legend
         buildCorridorLegend();
@@ -181,6 +193,47 @@ async function loadGodModeData() {
     }
 }
 
+function base64Bytes(b64) {
+    const bin = atob(b64);
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return bytes;
+}
+
+/**
+ * Expand bit-packed corridor masks (MSB first, row-major) into cell lists
+ */
+function decodeCorridors(data) {
+    for (const layer of Object.values(data)) {
+        if (layer.encoding !== 'bitmask') continue;
+        const bits = base64Bytes(layer.data);
+        const cells = [];
+        for (let i = 0; i < layer.width * layer.height; i++) {
+            if (bits[i >> 3] & (0x80 >> (i & 7))) {
+                cells.push([i % layer.width, Math.floor(i / layer.width)]);
+            }
+        }
+        layer.cells = cells;
+        delete layer.data;
+    }
+    return data;
+}
+
+/**
+ * Regroup columnar signs (uint8 type index, uint16 x/y) by type
+ */
+function decodeSigns(data) {
+    if (Array.isArray(data)) return data;
+    const index = base64Bytes(data.type_index);
+    const xs = new DataView(base64Bytes(data.x).buffer);
+    const ys = new DataView(base64Bytes(data.y).buffer);
+    const groups = data.types.map(t => ({ ...t, locations: [] }));
+    for (let i = 0; i < data.count; i++) {
+        groups[index[i]].locations.push({ x: xs.getUint16(i * 2, true), y: ys.getUint16(i * 2, true) });
+    }
+    return groups;
+}
+
 /**
  * Build corridor legend in god mode panel
  */
@@ -218,6 +271,11 @@ function updatePredatorInfo() {
  * Move player
  */
 async function movePlayer(dx, dy) {
+    if (sessionReady()) {
+        state.socket.send(JSON.stringify({ type: 'move', dx, dy }));
+        return;
+    }
+    
     const newX = state.playerX + dx;
     const newY = state.playerY + dy;
     
@@ -228,14 +286,21 @@ async function movePlayer(dx, dy) {
     
     state.playerX = newX;
     state.playerY = newY;
+    revealAround(newX, newY);
     
-    // Mark cells as revealed
+    await updateView();
+}
+
+/**
+ * Mark cells within the visibility radius as revealed
+ */
+function revealAround(x, y) {
     const visRadius = state.config.visibility_radius;
-    for (let dy2 = -visRadius; dy2 <= visRadius; dy2++) {
-        for (let dx2 = -visRadius; dx2 <= visRadius; dx2++) {
-            if (dx2*dx2 + dy2*dy2 <= visRadius*visRadius) {
-                const ry = newY + dy2;
-                const rx = newX + dx2;
+    for (let dy = -visRadius; dy <= visRadius; dy++) {
+        for (let dx = -visRadius; dx <= visRadius; dx++) {
+            if (dx*dx + dy*dy <= visRadius*visRadius) {
+                const ry = y + dy;
+                const rx = x + dx;
                 if (rx >= 0 && rx < state.config.grid_cols &&
                     ry >= 0 && ry < state.config.grid_rows) {
                     state.revealedCells.add(`${rx},${ry}`);
@@ -243,17 +308,163 @@ async function movePlayer(dx, dy) {
             }
         }
     }
+}
+
+/**
+ * Open the WebSocket session channel. Moves and time changes go over it once
+ * it has answered 'start'; if it closes, the HTTP endpoints take over again.
+ */
+function openSession() {
+    if (!('WebSocket' in window)) return;
     
-    await updateView();
+    const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${proto}://${location.host}/api/session`);
+    
+    socket.addEventListener('open', () => {
+        socket.send(JSON.stringify({ type: 'start', x: state.playerX, y: state.playerY, view_radius: VIEW_RADIUS }));
+    });
+    socket.addEventListener('message', (event) => applySessionUpdate(JSON.parse(event.data)));
+    socket.addEventListener('close', () => {
+        state.socket = null;
+        state.sessionStarted = false;
+    });
+    state.socket = socket;
+}
+
+function sessionReady() {
+    return state.sessionStarted && state.socket && state.socket.readyState === WebSocket.OPEN;
 }
 
 /**
- * Fetch terrain batch
+ * Apply a session 'update': merge terrain strips and observation diffs, then redraw
+ */
+function applySessionUpdate(msg) {
+    if (msg.type === 'error') {
+        console.error('Session error:', msg.detail);
+        return;
+    }
+    if (msg.type !== 'update') return;
+    
+    state.sessionStarted = true;
+    state.playerX = msg.x;
+    state.playerY = msg.y;
+    state.worldVersion = String(msg.version);
+    if (msg.time_of_day !== state.timeOfDay) {
+        state.timeOfDay = msg.time_of_day;
+        timeSelect.value = msg.time_of_day;
+    }
+    if (msg.reason === 'move') {
+        revealAround(msg.x, msg.y);
+    }
+    
+    const t = msg.terrain;
+    const bytes = base64Bytes(t.strips);
+    state.lastTerrainData = mergeStrips(t.full ? null : state.lastTerrainData, t.rect,
+                                        new DataView(bytes.buffer));
+    
+    const o = msg.observation;
+    if (o.reset) {
+        state.observationMap = {};
+        state.signMap = {};
+    }
+    for (const id of o.remove) delete state.observationMap[id];
+    for (const sp of o.upsert) state.observationMap[sp.species_id] = sp;
+    for (const [type, x, y] of o.signs_remove) delete state.signMap[`${type},${x},${y}`];
+    for (const sign of o.signs_add) state.signMap[`${sign.type},${sign.x},${sign.y}`] = sign;
+    
+    state.currentObservations = {
+        location: o.location,
+        current_terrain: o.current_terrain,
+        visible_terrains: o.visible_terrains,
+        corridors: o.corridors,
+        observations: o.order.map(id => state.observationMap[id]),
+        signs: Object.values(state.signMap),
+        time_of_day: msg.time_of_day,
+        season: msg.season
+    };
+    
+    renderMap(state.lastTerrainData);
+    renderObservations(state.currentObservations);
+}
+
+/**
+ * Fetch terrain for a viewport. After the first full fetch only the newly
+ * exposed strips are requested and merged into the previous cells.
  */
 async function fetchTerrainBatch(minX, minY, maxX, maxY) {
-    const url = `/api/terrain_batch?min_x=${minX}&min_y=${minY}&max_x=${maxX}&max_y=${maxY}`;
+    const prev = state.lastTerrainData;
+    if (!prev || !state.worldVersion) {
+        return await fetchTerrainFull(minX, minY, maxX, maxY);
+    }
+    
+    const url = `/api/terrain_delta?prev=${prev.min_x},${prev.min_y},${prev.max_x},${prev.max_y}` +
+        `&next=${minX},${minY},${maxX},${maxY}&version=${state.worldVersion}&format=gzip`;
     const response = await fetch(url);
-    return await response.json();
+    const view = new DataView(await response.arrayBuffer());
+    state.worldVersion = response.headers.get('X-World-Version');
+    const full = response.headers.get('X-Full') === '1';
+    
+    return mergeStrips(full ? null : prev, [minX, minY, maxX, maxY], view);
+}
+
+/**
+ * Build a viewport's cells from the previous viewport (if any) plus
+ * encode_strips() data: uint16 count, then per strip uint16 x, y, w, h + w*h cells
+ */
+function mergeStrips(prev, [minX, minY, maxX, maxY], view) {
+    const width = maxX - minX;
+    const height = maxY - minY;
+    const cells = [];
+    for (let row = 0; row < height; row++) {
+        const line = new Uint8Array(width);
+        const y = minY + row;
+        if (prev && y >= prev.min_y && y < prev.max_y) {
+            const src = prev.cells[y - prev.min_y];
+            const x0 = Math.max(minX, prev.min_x);
+            const x1 = Math.min(maxX, prev.max_x);
+            if (x0 < x1) {
+                line.set(src.subarray(x0 - prev.min_x, x1 - prev.min_x), x0 - minX);
+            }
+        }
+        cells.push(line);
+    }
+    
+    let offset = 2;
+    const count = view.getUint16(0, true);
+    for (let i = 0; i < count; i++) {
+        const sx = view.getUint16(offset, true);
+        const sy = view.getUint16(offset + 2, true);
+        const sw = view.getUint16(offset + 4, true);
+        const sh = view.getUint16(offset + 6, true);
+        offset += 8;
+        for (let r = 0; r < sh; r++) {
+            const strip = new Uint8Array(view.buffer, view.byteOffset + offset + r * sw, sw);
+            cells[sy + r - minY].set(strip, sx - minX);
+        }
+        offset += sw * sh;
+    }
+    
+    return { min_x: minX, min_y: minY, max_x: maxX, max_y: maxY, cells };
+}
+
+/**
+ * Fetch a whole viewport (gzip'd uint8 bytes, one per cell, row-major)
+ */
+async function fetchTerrainFull(minX, minY, maxX, maxY) {
+    const url = `/api/terrain_batch?min_x=${minX}&min_y=${minY}&max_x=${maxX}&max_y=${maxY}&format=gzip`;
+    const response = await fetch(url);
+    const bytes = new Uint8Array(await response.arrayBuffer());
+    const width = parseInt(response.headers.get('X-Width'), 10);
+    const height = parseInt(response.headers.get('X-Height'), 10);
+    state.worldVersion = response.headers.get('X-World-Version');
+    
+    const cells = [];
+    for (let row = 0; row < height; row++) {
+        cells.push(bytes.subarray(row * width, (row + 1) * width));
+    }
+    const min_x = parseInt(response.headers.get('X-Min-X'), 10);
+    const min_y = parseInt(response.headers.get('X-Min-Y'), 10);
+    return { min_x, min_y, max_x: min_x + width, max_y: min_y + height, cells };
 }
 
 /**
@@ -0,0 +1,39 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from engine import GenerationPipeline, StateManager, load_rules
+from engine.world import World
+
+
+@pytest.fixture(scope='session')
+def rules():
+    return load_rules(os.path.join(ROOT, 'rules'))
+
+
+@pytest.fixture(scope='session')
+def generated(rules):
+    """Pipeline result for seed 42 of the shipped rules (generated once per run)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GenerationPipeline().run(rules, 42)
+
+
+@pytest.fixture
+def world(rules, generated):
+    return World(rules=rules, terrain=generated['terrain'], corridors=generated['corridors'],
+                 species_presence=generated['presence'], signs=generated['signs'],
+                 predator_presence=generated['predator_presence'], seed=42)
+
+
+@pytest.fixture
+def state(rules, world, tmp_path):
+    """StateManager serving `world`, with no Redis and a throwaway data dir."""
+    sm = StateManager(rules, data_dir=str(tmp_path / 'data'), store=None)
+    sm._swap(world)
+    return sm
@@ -0,0 +1,76 @@
+import base64
+import gzip
+
+import numpy as np
+import pytest
+
+from engine.encoding import (clamp_rect, decode_rle, encode_gzip, encode_raw, encode_rle, encode_strips,
+                             viewport_delta)
+
+
+@pytest.fixture(params=['terrain', 'random', 'constant', 'single_row', 'single_column'])
+def block(request, generated):
+    rng = np.random.default_rng(0)
+    return {
+        'terrain': generated['terrain'][30:90, 10:70],
+        'random': rng.integers(0, 12, size=(17, 23), dtype=np.uint8),
+        'constant': np.full((5, 300), 7, dtype=np.uint8),  # one run per row
+        'single_row': rng.integers(0, 3, size=(1, 40), dtype=np.uint8),
+        'single_column': rng.integers(0, 3, size=(40, 1), dtype=np.uint8),
+    }[request.param]
+
+
+def test_raw_round_trip(block):
+    decoded = np.frombuffer(encode_raw(block), dtype=np.uint8).reshape(block.shape)
+    np.testing.assert_array_equal(decoded, block)
+
+
+def test_rle_round_trip(block):
+    np.testing.assert_array_equal(decode_rle(encode_rle(block), block.shape), block)
+
+
+def test_rle_runs_stop_at_row_ends():
+    block = np.zeros((3, 4), dtype=np.uint8)
+    assert len(encode_rle(block)) // 3 == 3  # one run per row, 3 bytes each
+
+
+def test_gzip_round_trip(block):
+    decoded = np.frombuffer(gzip.decompress(encode_gzip(block)), dtype=np.uint8).reshape(block.shape)
+    np.testing.assert_array_equal(decoded, block)
+
+
+def _decode_strips(data: bytes, grid_shape) -> np.ndarray:
+    out = np.full(grid_shape, 255, dtype=np.uint8)
+    count = int(np.frombuffer(data[:2], dtype='<u2')[0])
+    pos = 2
+    for _ in range(count):
+        x, y, w, h = (int(v) for v in np.frombuffer(data[pos:pos + 8], dtype='<u2'))
+        pos += 8
+        out[y:y + h, x:x + w] = np.frombuffer(data[pos:pos + w * h], dtype=np.uint8).reshape(h, w)
+        pos += w * h
+    assert pos == len(data)
+    return out
+
+
+@pytest.mark.parametrize('dx, dy', [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-3, 2), (40, 0)])
+def test_viewport_delta_strips_cover_exactly_the_new_cells(generated, dx, dy):
+    grid = generated['terrain']
+    prev = clamp_rect((50, 60, 80, 90), grid.shape)
+    new = clamp_rect((50 + dx, 60 + dy, 80 + dx, 90 + dy), grid.shape)
+    rects = viewport_delta(prev, new)
+
+    covered = np.zeros(grid.shape, dtype=np.int32)
+    for x0, y0, x1, y1 in rects:
+        covered[y0:y1, x0:x1] += 1
+    wanted = np.zeros(grid.shape, dtype=bool)
+    wanted[new[1]:new[3], new[0]:new[2]] = True
+    wanted[prev[1]:prev[3], prev[0]:prev[2]] = False
+    np.testing.assert_array_equal(covered, wanted.astype(np.int32))
+
+    decoded = _decode_strips(encode_strips(grid, rects), grid.shape)
+    np.testing.assert_array_equal(decoded[wanted], grid[wanted])
+
+
+def test_clamp_rect_stays_inside_the_grid():
+    assert clamp_rect((-5, -5, 10, 10), (8, 6)) == (0, 0, 6, 8)
+    assert clamp_rect((20, 20, 30, 30), (8, 6)) == (6, 8, 6, 8)
@@ -0,0 +1,52 @@
+import base64
+
+import numpy as np
+
+
+def _b64(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+def _decode_bitmask(entry: dict) -> np.ndarray:
+    n = entry['width'] * entry['height']
+    return np.unpackbits(_b64(entry['data'], np.uint8))[:n].astype(bool).reshape(entry['height'], entry['width'])
+
+
+def _decode_rle(entry: dict) -> np.ndarray:
+    runs = _b64(entry['data'], '<u4')
+    values = np.arange(len(runs)) % 2 == 1  # runs alternate, starting with False
+    return np.repeat(values, runs).reshape(entry['height'], entry['width'])
+
+
+def test_corridor_encodings_round_trip(state):
+    plain = state.get_corridors('json')
+    for fmt, decode in (('bitmask', _decode_bitmask), ('rle', _decode_rle)):
+        encoded = state.get_corridors(fmt)
+        assert encoded.keys() == plain.keys()
+        for name, entry in encoded.items():
+            mask = decode(entry)
+            np.testing.assert_array_equal(mask, state.world.corridors[name], err_msg=f'{fmt} {name}')
+            assert entry['count'] == plain[name]['count'] == int(mask.sum())
+
+
+def test_corridor_rle_of_a_mask_starting_true(state):
+    from engine.encoding import mask_rle
+    mask = np.array([[True, True, False], [False, True, True]])
+    entry = {'data': mask_rle(mask), 'width': 3, 'height': 2}
+    np.testing.assert_array_equal(_decode_rle(entry), mask)
+
+
+def test_columnar_signs_round_trip(state):
+    plain = state.get_all_signs('json')
+    columnar = state.get_all_signs('columnar')
+    types = [t['type'] for t in columnar['types']]
+    index, xs, ys = _b64(columnar['type_index'], np.uint8), _b64(columnar['x'], '<u2'), _b64(columnar['y'], '<u2')
+
+    assert columnar['count'] == len(state.world.signs) == len(index)
+    decoded = [{'type': types[i], 'x': int(x), 'y': int(y)} for i, x, y in zip(index, xs, ys)]
+    assert decoded == [{'type': s['type'], 'x': s['x'], 'y': s['y']} for s in state.world.signs]
+
+    symbols = {t['type']: t for t in columnar['types']}
+    for group in plain:
+        assert {k: group[k] for k in ('char', 'color', 'description')} == \
+               {k: symbols[group['type']][k] for k in ('char', 'color', 'description')}
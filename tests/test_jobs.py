@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from engine.jobs import JobConflict, JobManager
+from engine.pipeline import GenerationCancelled
+
+STAGES = ['terrain', 'corridor:water_edge', 'place:beaver']
+
+
+class FakeState:
+    """Stands in for StateManager.generate: runs STAGES, each waiting for `release`."""
+
+    def __init__(self):
+        self.world = None
+        self.release = threading.Semaphore(0)
+        self.seeds = []
+
+    def generate(self, seed, rules=None, progress=None, cancel=None, profile=None):
+        self.seeds.append(seed)
+        progress({'event': 'plan', 'stages': STAGES})
+        for stage in STAGES:
+            self.release.acquire(timeout=5)
+            if cancel.is_set():
+                raise GenerationCancelled()
+            progress({'event': 'stage', 'stage': stage, 'status': 'computed', 'seconds': 0.01})
+
+
+@pytest.fixture
+def jobs():
+    return JobManager(FakeState())
+
+
+def finish(jobs, job):
+    for _ in STAGES:
+        jobs.state.release.release()
+    assert job.wait(5)
+
+
+def test_a_job_runs_every_stage(jobs):
+    job = jobs.submit(7)
+    finish(jobs, job)
+    d = job.to_dict()
+    assert d['status'] == 'done' and d['progress'] == 1.0
+    assert [s['name'] for s in d['stages']] == STAGES
+    assert jobs.state.seeds == [7] and not jobs.busy
+
+
+def test_a_second_job_conflicts_until_the_first_finishes(jobs):
+    job = jobs.submit(1)
+    assert jobs.busy
+    with pytest.raises(JobConflict) as e:
+        jobs.submit(2)
+    assert e.value.job is job
+    finish(jobs, job)
+    finish(jobs, jobs.submit(2))
+    assert jobs.state.seeds == [1, 2]
+
+
+def test_cancel_stops_between_stages(jobs):
+    job = jobs.submit(1)
+    assert jobs.cancel(job.id) is job
+    jobs.state.release.release()
+    assert job.wait(5)
+    assert job.status == 'cancelled' and not jobs.busy
+    assert jobs.cancel('nope') is None
+
+
+def test_snapshots_follow_every_change_without_polling(jobs):
+    job = jobs.submit(1)
+
+    async def collect():
+        seen = []
+        async for snapshot in job.snapshots():
+            seen.append(snapshot)
+            if len(seen) == 1:
+                threading.Thread(target=finish, args=(jobs, job)).start()
+        return seen
+
+    seen = asyncio.run(asyncio.wait_for(collect(), 10))
+    revisions = [s['revision'] for s in seen]
+    assert revisions == sorted(set(revisions))
+    assert seen[-1]['status'] == 'done' and seen[-1]['progress'] == 1.0
+    assert not job._listeners
+
+
+def test_a_finished_job_streams_one_snapshot(jobs):
+    job = jobs.submit(1)
+    finish(jobs, job)
+
+    async def collect():
+        return [s async for s in job.snapshots()]
+
+    assert [s['status'] for s in asyncio.run(collect())] == ['done']
@@ -0,0 +1,57 @@
+import pytest
+
+from engine.metrics import Metrics, log_event
+
+
+@pytest.fixture
+def registry():
+    m = Metrics(prefix='test')
+    m.counter('jobs_total', 'Jobs run by status')
+    m.histogram('step_seconds', 'One step', buckets=(0.1, 1.0))
+    return m
+
+
+def test_families_have_help_and_type_lines(registry):
+    registry.inc('jobs_total', status='ok')
+    registry.inc('jobs_total', 2, status='ok')
+    lines = registry.render().splitlines()
+    assert lines[:3] == ['# HELP test_jobs_total Jobs run by status',
+                         '# TYPE test_jobs_total counter',
+                         'test_jobs_total{status="ok"} 3']
+    assert '# TYPE test_step_seconds histogram' in lines
+
+
+def test_label_values_are_escaped(registry):
+    registry.inc('jobs_total', path='C:\\rules\n"x"')
+    assert 'test_jobs_total{path="C:\\\\rules\\n\\"x\\""} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    for v in (0.05, 0.5, 0.5, 5.0):
+        registry.observe('step_seconds', v, stage='terrain')
+    lines = [l for l in registry.render().splitlines() if l.startswith('test_step_seconds')]
+    assert lines == ['test_step_seconds_bucket{stage="terrain",le="0.1"} 1',
+                     'test_step_seconds_bucket{stage="terrain",le="1"} 3',
+                     'test_step_seconds_bucket{stage="terrain",le="+Inf"} 4',
+                     'test_step_seconds_sum{stage="terrain"} 6.05',
+                     'test_step_seconds_count{stage="terrain"} 4']
+
+
+def test_collectors_are_rendered_and_a_failing_one_is_skipped(registry, capsys):
+    registry.collect(lambda: [('cache_hits', 'gauge', 'Cache hits', [({'world': 'default'}, 7)])])
+    registry.collect(lambda: 1 / 0)
+    text = registry.render()
+    assert '# TYPE test_cache_hits gauge\ntest_cache_hits{world="default"} 7\n' in text
+    assert 'Metrics collector failed' in capsys.readouterr().out
+
+
+def test_log_event_prints_one_logfmt_line(capsys):
+    log_event('stage', stage='place:beaver', seconds=0.41234, signs=12, error="KeyError('x')", note='',
+              path='a b=c')
+    assert capsys.readouterr().out == (
+        'event=stage stage=place:beaver seconds=0.4123 signs=12 error=KeyError(\'x\') note="" path="a b=c"\n')
+
+
+def test_log_event_escapes_quotes(capsys):
+    log_event('session', error='bad "x"')
+    assert capsys.readouterr().out == 'event=session error="bad \\"x\\""\n'
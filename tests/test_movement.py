@@ -0,0 +1,125 @@
+import contextlib
+import io
+import os
+import threading
+import time
+
+import numpy as np
+
+from engine import StateManager
+from engine.shared import SharedWorld
+
+
+def test_animals_move_with_the_time_of_day(state, world):
+    state.set_time('dusk')
+    moved = state.world.species_presence
+    assert not np.array_equal(moved['red_deer'], world.species_presence['red_deer'])
+    assert moved['birch'] is world.species_presence['birch']  # plants stay put
+
+
+def test_movement_can_be_switched_off(rules, world, tmp_path):
+    species = rules['species']
+    still = {**rules, 'species': {**species, 'movement': {**species['movement'], 'enabled': False}}}
+    sm = StateManager(still, data_dir=str(tmp_path / 'data'), store=None)
+    sm._swap(world.with_changes(rules=still))
+    sm.set_time('dusk')
+    assert sm.agents is None
+    assert sm.world.species_presence['red_deer'] is world.species_presence['red_deer']
+
+
+def test_only_species_with_groups_are_drawn(state, world):
+    state.set_time('dusk')
+    agents = state.agents
+    drawn = agents.rasterize()
+    with_groups = {agents.species[i] for i in np.unique(agents.sp)}
+    assert set(drawn) == with_groups
+    for sp in set(agents.species) - with_groups:
+        assert not world.species_presence[sp].any()
+
+
+def test_setting_the_same_time_of_day_changes_nothing(state):
+    seen = []
+    state.subscribe(seen.append)
+    before = state.world
+    state.set_time(before.time_of_day)
+    assert state.world is before
+    assert not seen
+
+
+def test_moved_layers_are_saved_behind_the_request(state, monkeypatch):
+    state.save(state.world)
+    save, started = state.save, threading.Event()
+
+    def slow_save(*args, **kwargs):
+        started.set()
+        time.sleep(1.0)
+        save(*args, **kwargs)
+
+    monkeypatch.setattr(state, 'save', slow_save)
+    t0 = time.perf_counter()
+    state.set_time('dusk')
+    assert time.perf_counter() - t0 < 0.5
+    assert started.wait(5)
+    state.flush_saves(timeout=10)
+    moved = state.world.species_presence
+    for sp in state.agents.species:
+        assert np.array_equal(np.load(f'{state.data_dir}/species_{sp}.npy'), moved[sp])
+
+
+def test_a_burst_of_time_changes_is_saved_at_most_twice(state, monkeypatch):
+    calls = []
+    save = state.save
+
+    def slow_save(*args, **kwargs):
+        calls.append(kwargs.get('layers'))
+        time.sleep(0.3)
+        save(*args, **kwargs)
+
+    monkeypatch.setattr(state, 'save', slow_save)
+    for tod in ['dawn', 'morning', 'midday', 'afternoon', 'dusk', 'night']:
+        state.set_time(tod)
+    state.flush_saves(timeout=10)
+    assert 1 <= len(calls) <= 2
+    assert np.array_equal(np.load(f'{state.data_dir}/species_red_deer.npy'), state.world.species_presence['red_deer'])
+
+
+def test_shared_time_change_publishes_only_the_moved_layers(rules, world, tmp_path):
+    shared = SharedWorld(str(tmp_path))
+    a = StateManager(rules, data_dir=str(tmp_path / 'a'), store=None, shared=shared)
+    b = StateManager(rules, data_dir=str(tmp_path / 'b'), store=None, shared=shared)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with shared.lock():
+            a._attach(a._publish(world))
+        b._attach(shared.read_pointer())
+        base = shared.path(a._snapshot)
+        terrain = b.world.terrain
+
+        a.set_time('dusk')
+        pointer = shared.read_pointer()
+        b._on_shared_change(pointer)
+
+    path = shared.path(pointer['snapshot'])
+    assert pointer['base'] == os.path.basename(base)
+    assert os.path.samefile(f'{path}/terrain.npy', f'{base}/terrain.npy')
+    assert os.path.samefile(f'{path}/species_birch.npy', f'{base}/species_birch.npy')
+    assert not os.path.samefile(f'{path}/species_red_deer.npy', f'{base}/species_red_deer.npy')
+    assert b.world.terrain is terrain  # unchanged layers are not reloaded
+    assert b.world.time_of_day == 'dusk' and b.world.version == a.world.version
+    for sp in a.agents.species:
+        assert np.array_equal(b.world.species_presence[sp], a.world.species_presence[sp])
+
+
+def test_shared_steps_keep_their_groups(rules, world, tmp_path):
+    shared = SharedWorld(str(tmp_path))
+    sm = StateManager(rules, data_dir=str(tmp_path / 'data'), store=None, shared=shared)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with shared.lock():
+            sm._attach(sm._publish(world))
+        sm.set_time('dusk')
+        groups = sm.agents
+        sizes, x = groups.size.copy(), groups.x.copy()
+        assert isinstance(sm.world.species_presence['red_deer'], np.memmap)  # re-mapped from the snapshot
+        sm.set_time('night')
+    assert sm.agents is groups
+    assert np.array_equal(groups.size, sizes)  # not rebuilt from the drawn squares
+    assert len(groups.x) == len(x)
@@ -0,0 +1,108 @@
+"""The incremental Observer against the original brute-force observe()."""
+
+import numpy as np
+import pytest
+
+from engine.observer import CATEGORY_ORDER, TEXT_FIELDS
+
+
+def reference_observe(sm, w, x, y, radius):
+    """StateManager.observe as it was before the Observer: scan the whole disc."""
+    rows, cols = w.shape
+    context = sm._build_context(w, x, y, radius)
+    disc = [(dx, dy) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+            if dx * dx + dy * dy <= radius * radius]
+    inside = [(x + dx, y + dy) for dx, dy in disc if 0 <= x + dx < cols and 0 <= y + dy < rows]
+
+    visible, seen = [], set()
+    for cx, cy in inside:
+        t = int(w.terrain[cy, cx])
+        if t not in seen:
+            seen.add(t)
+            tt = w.terrain_types.get(t, {})
+            visible.append({'id': t, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')})
+
+    observations = []
+    for sp_id, presence in w.species_presence.items():
+        cells = [{'x': cx, 'y': cy} for cx, cy in inside if presence[cy, cx] > 0]
+        if not cells:
+            continue
+        max_state = max(int(presence[c['y'], c['x']]) for c in cells)
+        sp = w.species.get(sp_id, {})
+        obs = sp.get('observation', {})
+        text = {f: obs.get(f, '') for f in TEXT_FIELDS}
+        for ct in obs.get('conditional_texts', []):
+            ct_radius = ct.get('radius', radius)
+            ctx = context if ct_radius == radius else sm._build_context(w, x, y, ct_radius)
+            if sm._eval_condition(ct.get('condition', ''), ctx, {'state': max_state}):
+                if ct.get('append_to', '') in text:
+                    text[ct['append_to']] += ' ' + ct.get('text', '')
+        observations.append({
+            'species_id': sp_id, 'common_name': sp.get('common', sp_id), 'latin_name': sp.get('latin', ''),
+            'category': sp.get('category', ''), 'count': len(cells),
+            'locations': sorted(cells, key=lambda c: (c['y'], c['x'])), 'state': max_state,
+            'photo_url': f"/assets/species/{sp.get('photo')}" if sp.get('photo') else None, **text,
+        })
+    observations.sort(key=lambda o: (CATEGORY_ORDER.index(o['category']) if o['category'] in CATEGORY_ORDER
+                                     else 99, o['common_name']))
+
+    signs = []
+    for s in w.signs:
+        if (s['x'] - x) ** 2 + (s['y'] - y) ** 2 <= radius * radius:
+            sym = w.symbols.get(s['type'], {})
+            signs.append({'type': s['type'], 'x': s['x'], 'y': s['y'], 'char': sym.get('char', '?'),
+                          'color': sym.get('color', '#888'), 'description': sym.get('description', '')})
+
+    tid = int(w.terrain[y, x])
+    tt = w.terrain_types.get(tid, {})
+    return {
+        'location': {'x': x, 'y': y},
+        'current_terrain': {'id': tid, 'name': tt.get('name', '?'), 'color': tt.get('color', '#888')},
+        'visible_terrains': visible,
+        'observations': observations,
+        'signs': signs,
+        'corridors': [n for n, m in w.corridors.items() if m is not None and m[y, x]],
+        'time_of_day': w.time_of_day,
+        'season': w.season,
+    }
+
+
+def _busy_cells(w, n, rng):
+    """Cells with signs or several species in view, where the tallies have most to do."""
+    occupied = sum((a > 0).astype(np.int32) for a in w.species_presence.values())
+    ys, xs = np.nonzero(occupied >= 2)
+    picks = [(int(xs[i]), int(ys[i])) for i in rng.choice(len(xs), size=min(n, len(xs)), replace=False)]
+    picks += [(s['x'], s['y']) for s in w.signs[:n]]
+    return picks + [(0, 0), (w.shape[1] - 1, w.shape[0] - 1)]  # corners clip the disc
+
+
+@pytest.mark.parametrize('time_of_day', ['dawn', 'midday', 'night'])
+def test_observe_matches_reference(state, time_of_day):
+    state.set_time(time_of_day)
+    w = state.world
+    for x, y in _busy_cells(w, 15, np.random.default_rng(1)):
+        assert state.observe(x, y, world=w) == reference_observe(state, w, x, y, w.visibility_radius), (x, y)
+
+
+def test_observe_step_walk_matches_reference(state):
+    w = state.world
+    rng = np.random.default_rng(2)
+    x, y = _busy_cells(w, 1, rng)[0]
+    radius = w.visibility_radius
+    result, st = state.observe_step(None, 0, 0, x=x, y=y, world=w)
+    for _ in range(150):
+        dx, dy = (int(v) for v in rng.integers(-1, 2, size=2))
+        if not (0 <= st.x + dx < w.shape[1] and 0 <= st.y + dy < w.shape[0]):
+            continue
+        result, st = state.observe_step(st, dx, dy, world=w)
+        assert result == reference_observe(state, w, st.x, st.y, radius), (st.x, st.y)
+
+
+def test_observe_step_rebuilds_after_the_world_changes(state):
+    w = state.world
+    x, y = _busy_cells(w, 1, np.random.default_rng(3))[0]
+    _, st = state.observe_step(None, 0, 0, x=x, y=y, world=w)
+    state.advance_month()
+    w2 = state.world
+    result, st = state.observe_step(st, 1, 0, world=w2)
+    assert result == reference_observe(state, w2, x + 1, y, w2.visibility_radius)
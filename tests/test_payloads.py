@@ -0,0 +1,58 @@
+import gzip
+import json
+
+from engine.payloads import PayloadCache, not_modified
+
+
+def test_etag_and_vary_follow_the_encoding(world):
+    cache = PayloadCache()
+    build = lambda: json.dumps({'seed': world.seed}).encode('utf-8')
+    etag, headers, body = cache.encoded(world.version, 'config', build)
+    assert etag == f'"{world.version}-config"'
+    assert headers == {'Vary': 'Accept-Encoding'}
+    assert json.loads(body()) == {'seed': world.seed}
+
+    gz_etag, gz_headers, gz_body = cache.encoded(world.version, 'config', build, 'gzip, deflate, br')
+    assert gz_etag == f'"{world.version}-config-gz"'
+    assert gz_headers == {'Vary': 'Accept-Encoding', 'Content-Encoding': 'gzip'}
+    assert gzip.decompress(gz_body()) == body()
+    assert cache.stats == {'hits': 2, 'built': 2}  # the gzip'd body reuses the plain one
+
+
+def test_a_matching_if_none_match_is_not_modified():
+    etag = '"7-config-gz"'
+    assert not_modified(etag, etag)
+    assert not_modified(f'"6-config", {etag}', etag)
+    assert not_modified('*', etag)
+    assert not not_modified('', etag)
+    assert not not_modified('"7-config"', etag)  # the plain body is other bytes
+
+
+def test_rules_payloads_outlive_time_changes(world):
+    cache = PayloadCache()
+    builds = []
+
+    def species():
+        builds.append(1)
+        return json.dumps(sorted(world.species)).encode('utf-8')
+
+    etags = set()
+    for w in [world, world.with_changes(time_of_day='dusk'), world.with_changes(month=6)]:
+        etag, _, body = cache.encoded(w.version, 'species', species, rules=w.rules_digest)
+        body()
+        etags.add(etag)
+    assert etags == {f'"{world.rules_digest}-species"'}
+    assert len(builds) == 1
+
+    edited = world.with_changes(rules={**world.rules, 'seasons': {}})
+    etag, _, body = cache.encoded(edited.version, 'species', species, rules=edited.rules_digest)
+    body()
+    assert etag != etags.pop() and len(builds) == 2
+
+
+def test_only_the_latest_versions_are_kept(world):
+    cache = PayloadCache(versions=2)
+    for version in (1, 2, 3):
+        cache.get(version, 'config', lambda: b'{}')
+    cache.get(1, 'config', lambda: b'{}')  # a request still holding an old world
+    assert list(cache._entries) == [2, 3]
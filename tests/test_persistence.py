@@ -0,0 +1,123 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+import pytest
+
+from engine import StateManager
+from engine.persistence import MemoryRedis, RedisStore, _redis_client
+
+
+class FlakyRedis(MemoryRedis):
+    """MemoryRedis that is unreachable until `down` calls have failed."""
+
+    def __init__(self, down: int, **kwargs):
+        super().__init__(**kwargs)
+        self.down = down
+        self.calls = 0
+
+    async def _delay(self):
+        await super()._delay()
+        self.calls += 1
+        if self.calls <= self.down:
+            raise ConnectionError('connection refused')
+
+
+@pytest.fixture
+def store():
+    stores = []
+
+    def make(client, **kwargs):
+        s = RedisStore(client, **kwargs)
+        stores.append(s)
+        return s
+
+    yield make
+    for s in stores:
+        s.close(timeout=5)
+
+
+def test_quick_saves_coalesce_into_one_write(store):
+    client = MemoryRedis()
+    s = store(client, flush_delay=0.2)
+    for i in range(50):
+        s.save('world', lambda i=i: f'payload-{i}')
+    assert s.flush(timeout=5)
+    assert client.writes == 1
+    assert client.data['world'] == b'payload-49'
+    assert s.stats['queued'] == 50 and s.stats['coalesced'] == 49 and s.stats['written'] == 1
+
+
+def test_failed_writes_are_retried_until_redis_is_back(store):
+    client = FlakyRedis(down=2)
+    s = store(client, flush_delay=0.01)
+    s.save('world', lambda: 'payload')
+    assert s.flush(timeout=10)
+    assert client.data['world'] == b'payload'
+    assert s.stats['failed'] == 2 and s.stats['written'] == 1
+    assert s.healthy
+
+
+def test_ping_reports_health_and_recovers(store):
+    s = store(FlakyRedis(down=1))
+    assert s.ping() is False and not s.healthy
+    assert s.ping() is True and s.healthy
+
+
+def test_redis_pool_health_checks_and_retries_connections():
+    client = _redis_client('redis://localhost:6379/0')
+    kwargs = client.connection_pool.connection_kwargs
+    assert kwargs['health_check_interval'] > 0
+    assert kwargs['retry_on_timeout'] is True
+    assert kwargs['retry'] is not None
+
+
+def test_save_returns_before_the_write_finishes(store):
+    client = MemoryRedis(latency=0.5)
+    s = store(client, flush_delay=0.01)
+    t0 = time.perf_counter()
+    s.save('world', lambda: 'payload')
+    assert time.perf_counter() - t0 < 0.05
+    assert client.writes == 0
+    assert s.flush(timeout=5)
+    assert client.writes == 1
+
+
+def test_handlers_do_not_wait_for_redis(state, store):
+    client = MemoryRedis(latency=1.0)
+    state.redis = store(client, flush_delay=0.01)
+    t0 = time.perf_counter()
+    state.set_time('dusk')
+    assert time.perf_counter() - t0 < 0.5
+    assert state.world.time_of_day == 'dusk'
+    assert client.writes == 0
+    assert state.redis.flush(timeout=10)
+    assert client.writes == 1
+
+
+def test_mmapped_load_maps_every_grid(state, world):
+    state.save(world)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = state.load(mmap=True)
+    assert set(loaded.corridors) == set(world.corridors)
+    for name, mask in loaded.corridors.items():
+        assert isinstance(mask, np.memmap)
+        assert np.array_equal(mask, world.corridors[name])
+    assert all(isinstance(arr, np.memmap) for arr in loaded.species_presence.values())
+
+
+def test_redis_world_from_other_rules_is_ignored(state, world, rules, store):
+    state.redis = store(MemoryRedis(), flush_delay=0.01)
+    state._save_to_redis()
+    assert state.redis.flush(timeout=10)
+    other = StateManager(dict(rules, terrain={**rules['terrain'], 'changed': True}), data_dir=state.data_dir,
+                         store=None)
+    other.redis = state.redis
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert not other._load_from_redis()
+        same = StateManager(rules, data_dir=state.data_dir, store=None)
+        same.redis = state.redis
+        assert same._load_from_redis()
+    assert same.world.rules_digest == world.rules_digest
+    assert np.array_equal(same.world.terrain, world.terrain)
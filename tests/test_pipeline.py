@@ -0,0 +1,63 @@
+import contextlib
+import copy
+import io
+
+import numpy as np
+
+from engine import GenerationPipeline, parse_seeds
+from engine.pipeline import GenerationPool
+
+
+def _run(pipeline, rules, seed=42):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pipeline.run(rules, seed)
+
+
+def _assert_same(a, b):
+    np.testing.assert_array_equal(a['terrain'], b['terrain'])
+    assert a['corridors'].keys() == b['corridors'].keys()
+    for name in a['corridors']:
+        np.testing.assert_array_equal(a['corridors'][name], b['corridors'][name])
+    assert a['presence'].keys() == b['presence'].keys()
+    for sp_id in a['presence']:
+        np.testing.assert_array_equal(a['presence'][sp_id], b['presence'][sp_id], err_msg=sp_id)
+    assert list(a['signs']) == list(b['signs'])
+    assert dict(a['predator_presence']) == dict(b['predator_presence'])
+
+
+def test_incremental_rebuild_equals_full_rebuild(rules, generated):
+    edited = copy.deepcopy(rules)
+    edited['species']['species']['nettles']['distribution']['base_density'] = 0.5
+
+    pipeline = GenerationPipeline()
+    _run(pipeline, rules)
+    incremental = _run(pipeline, edited)
+    assert pipeline.last_run['terrain'] == 'cached'
+    assert pipeline.last_run['place:nettles'] == 'computed'
+    assert 'computed' in pipeline.last_run.values() and 'cached' in pipeline.last_run.values()
+
+    _assert_same(incremental, _run(GenerationPipeline(), edited))
+
+
+def test_unchanged_rules_reuse_every_stage(rules, generated):
+    pipeline = GenerationPipeline()
+    first = _run(pipeline, rules)
+    second = _run(pipeline, rules)
+    assert set(pipeline.last_run.values()) == {'cached'}
+    _assert_same(first, second)
+    _assert_same(first, generated)
+
+
+def test_the_generation_process_starts_on_first_use():
+    pool = GenerationPool()
+    assert not pool.started
+    try:
+        assert pool.submit(pow, 2, 10).result(timeout=30) == 1024
+        assert pool.started
+    finally:
+        pool.shutdown()
+
+
+def test_seed_lists_expand_inclusive_ranges():
+    assert parse_seeds('42') == [42]
+    assert parse_seeds('1-3,7,10-11') == [1, 2, 3, 7, 10, 11]
@@ -0,0 +1,22 @@
+from engine.profiling import Profiler, ProfilingMiddleware, admin_authorized
+
+
+def scope(query: bytes, token: bytes = None) -> dict:
+    headers = [(b'x-admin-token', token)] if token is not None else []
+    return {'type': 'http', 'path': '/api/config', 'query_string': query, 'headers': headers}
+
+
+def test_admin_token_is_required_and_must_match():
+    assert admin_authorized('s3cret', 's3cret')
+    assert not admin_authorized('s3cret', 'wrong')
+    assert not admin_authorized('s3cret', None)
+    assert not admin_authorized(None, '')
+    assert not admin_authorized('', '')
+
+
+def test_query_profiling_needs_the_admin_token(tmp_path):
+    mw = ProfilingMiddleware(None, Profiler(str(tmp_path)), query=True, token='s3cret')
+    assert mw._mode(scope(b'profile=alloc', b's3cret')) == 'alloc'
+    assert mw._mode(scope(b'profile=cpu', b'wrong')) is None
+    assert mw._mode(scope(b'profile=cpu')) is None
+    assert ProfilingMiddleware(None, Profiler(str(tmp_path)), query=True)._mode(scope(b'profile=cpu', b'')) is None
@@ -0,0 +1,54 @@
+import pytest
+
+from engine.persistence import MemoryRedis, RedisStore
+from engine.registry import WorldRegistry
+from engine.state_manager import StateManager
+
+
+@pytest.fixture
+def store():
+    s = RedisStore(MemoryRedis(), flush_delay=0.01)
+    yield s
+    s.close(timeout=5)
+
+
+def _registry(rules, state, tmp_path, **kwargs):
+    return WorldRegistry(rules, data_dir=str(tmp_path), default=state, **kwargs)
+
+
+def test_default_world_counts_hits(rules, state, tmp_path):
+    registry = _registry(rules, state, tmp_path)
+    assert registry.get(registry.DEFAULT) is state
+    assert registry.get(registry.DEFAULT) is state
+    stats = registry.stats(registry.DEFAULT)
+    assert (stats['loads'], stats['hits'], stats['hit_rate']) == (1, 2, pytest.approx(2 / 3, abs=1e-4))
+
+
+def test_worlds_only_in_redis_are_known_and_load(rules, state, store, tmp_path):
+    store.client.data[f'{StateManager.REDIS_KEY}:remote'] = state._redis_payload(state.world).encode('utf-8')
+    registry = _registry(rules, state, tmp_path / 'other', store=store)
+    assert 'remote' in registry.known()
+    assert registry.stats('remote')['resident'] is False
+
+    sm = registry.get('remote')
+    assert sm.world.shape == state.world.shape
+    assert len(sm.world.signs) == len(state.world.signs)
+
+
+def test_eviction_keeps_worlds_with_open_sessions(rules, state, world, tmp_path):
+    registry = _registry(rules, state, tmp_path, memory_bytes=0)
+    managers = {}
+    for wid in ('a', 'b'):
+        sm = registry._manager(wid)
+        sm._swap(world)
+        registry._resident[wid] = managers[wid] = sm
+    unsubscribe = managers['a'].subscribe(lambda w: None)
+
+    with registry._lock:
+        evicted = [wid for wid, _ in registry._evict(keep='new')]
+    assert evicted == ['b']
+    assert registry.get('a') is managers['a']
+
+    unsubscribe()
+    with registry._lock:
+        assert [wid for wid, _ in registry._evict(keep='new')] == ['a']
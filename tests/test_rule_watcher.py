@@ -0,0 +1,80 @@
+import contextlib
+import io
+import os
+import shutil
+
+import pytest
+
+from conftest import ROOT
+from engine.rule_watcher import RuleWatcher
+
+
+@pytest.fixture
+def rules_dir(tmp_path):
+    path = tmp_path / 'rules'
+    shutil.copytree(os.path.join(ROOT, 'rules'), path)
+    return path
+
+
+@pytest.fixture
+def watcher(rules_dir):
+    changes = []
+    w = RuleWatcher(str(rules_dir), on_change=changes.append)
+    w.changes = changes
+    return w
+
+
+def check(watcher) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return watcher.check()
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_touching_a_file_is_not_a_change(watcher, rules_dir):
+    bump_mtime(rules_dir / 'terrain_init.yaml')
+    assert not check(watcher)
+    assert watcher.changes == []
+
+
+def test_an_edit_reloads_the_rules(watcher, rules_dir):
+    path = rules_dir / 'species_init.yaml'
+    path.write_text(path.read_text() + '\n# edited\n')
+    bump_mtime(path)
+    assert check(watcher)
+    assert len(watcher.changes) == 1 and 'species' in watcher.changes[0]
+    assert not check(watcher)
+
+
+def test_an_optional_file_created_or_deleted_later_is_a_change(rules_dir):
+    seasons = rules_dir / 'seasons.yaml'
+    text = seasons.read_text()
+    seasons.unlink()
+    changes = []
+    watcher = RuleWatcher(str(rules_dir), on_change=changes.append)
+
+    seasons.write_text(text)
+    assert check(watcher)
+    assert changes[-1]['seasons']['start_month'] == 4
+
+    seasons.unlink()
+    assert check(watcher)
+    assert changes[-1]['seasons'] == {}
+    assert len(changes) == 2
+
+
+def test_invalid_rules_keep_the_current_world_until_fixed(watcher, rules_dir):
+    seasons = rules_dir / 'seasons.yaml'
+    text = seasons.read_text()
+    seasons.write_text(text.replace('start_month: 4', 'start_month: 13'))
+    bump_mtime(seasons)
+    assert not check(watcher)
+    assert watcher.changes == []
+
+    seasons.write_text(text.replace('start_month: 4', 'start_month: 5'))
+    bump_mtime(seasons)
+    assert check(watcher)
+    assert watcher.changes[0]['seasons']['start_month'] == 5
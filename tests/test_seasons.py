@@ -0,0 +1,143 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+from scipy.ndimage import binary_dilation, distance_transform_edt
+
+from engine import StateManager
+from engine.seasons import SeasonClock, SeasonEngine
+from engine.shared import SharedWorld
+from engine.world import World
+
+SOFTWOOD = ['birch', 'willow', 'alder']
+
+
+def seasonal(world: World, cfg: dict, **changes) -> World:
+    """world with seasons.yaml replaced by cfg."""
+    return world.with_changes(rules={**world.rules, 'seasons': cfg}, **changes)
+
+
+def tick(w: World, seed: int = 0):
+    return SeasonEngine().tick(w, np.random.default_rng(seed))
+
+
+def test_a_month_without_rules_changes_nothing_and_keeps_every_array(world):
+    w = seasonal(world, {})
+    out, changed, _ = tick(w)
+    assert changed == []
+    assert (out.month, out.season) == (5, 'spring')
+    assert out.signs is w.signs
+    assert all(out.species_presence[sp] is arr for sp, arr in w.species_presence.items())
+
+
+def test_die_back_clears_a_species_and_leaves_the_rest_alone(world):
+    w = seasonal(world, {'species': {'nettles': {'die_back': 1.0}}})
+    out, changed, _ = tick(w)
+    assert changed == ['presence:nettles']
+    assert not out.species_presence['nettles'].any()
+    assert all(out.species_presence[sp] is arr for sp, arr in w.species_presence.items() if sp != 'nettles')
+
+
+def test_spread_only_takes_suitable_cells_next_to_presence(world):
+    w = seasonal(world, {'species': {'reeds': {'spread': 1.0}}})
+    before = w.species_presence['reeds'] > 0
+    out, _, _ = tick(w)
+    after = out.species_presence['reeds'] > 0
+    gained = after & ~before
+    assert gained.any()
+    assert (after | ~before).all()  # nothing lost
+    assert not (gained & ~binary_dilation(before, np.ones((3, 3), bool))).any()
+    assert not (gained & (SeasonEngine().habitat(w, 'reeds') == 0)).any()
+
+
+def test_rates_follow_the_calendar(world):
+    w = seasonal(world, {'species': {'nettles': {'die_back': {12: 1.0, 'default': 0}}}})
+    _, changed, _ = tick(w.with_changes(month=4))  # to May
+    assert changed == []
+    out, changed, _ = tick(w.with_changes(month=11))  # to December
+    assert changed == ['presence:nettles'] and out.season == 'winter'
+
+
+def test_damage_advances_states_near_the_source_up_to_the_top_state(world):
+    # beavers at every 50th birch cell, so plenty of trees are in reach
+    ys, xs = np.nonzero(world.species_presence['birch'])
+    beaver = np.zeros_like(world.species_presence['beaver'])
+    beaver[ys[::50], xs[::50]] = 1
+    world = world.with_changes(species_presence={**world.species_presence, 'beaver': beaver})
+    w = seasonal(world, {'damage': {'beaver': 1.0}})
+    far = distance_transform_edt(w.species_presence['beaver'] == 0) >= 5
+    for month in range(6):
+        w, _, _ = tick(w, month)
+    for sp in SOFTWOOD:
+        before, after = world.species_presence[sp], w.species_presence[sp]
+        assert after.max() <= 3
+        assert ((after >= before) & ((after > 0) == (before > 0))).all()
+        assert np.array_equal(after[far], before[far])
+    assert any((w.species_presence[sp] == 3).any() for sp in SOFTWOOD)
+
+
+def test_recovery_moves_damaged_cells_back(world):
+    gnawed = {sp: np.where(world.species_presence[sp] > 0, 2, 0).astype(np.uint8) for sp in SOFTWOOD}
+    w = seasonal(world, {'recovery': {'tree_damage': {2: {'to': 1, 'rate': 1.0}}}},
+                 species_presence={**world.species_presence, **gnawed})
+    out, changed, _ = tick(w)
+    assert sorted(changed) == sorted(f'presence:{sp}' for sp in SOFTWOOD)
+    for sp in SOFTWOOD:
+        assert np.array_equal(out.species_presence[sp], (gnawed[sp] > 0).astype(np.uint8))
+
+
+def test_signs_decay(world):
+    assert world.signs
+    out, changed, _ = tick(seasonal(world, {'signs': {'rate': 0, 'decay': {'default': 1.0}}}))
+    assert changed == ['signs'] and out.signs == ()
+
+
+def test_new_signs_never_duplicate_a_cell(world):
+    w = seasonal(world, {'signs': {'rate': 1.0, 'decay': {'default': 0}}})
+    out, changed, _ = tick(w)
+    keys = [(s['type'], s['x'], s['y']) for s in out.signs]
+    assert changed == ['signs'] and len(out.signs) > len(w.signs)
+    assert len(keys) == len(set(keys))
+    assert list(out.signs[:len(w.signs)]) == list(w.signs)
+
+
+def test_a_month_at_250k_cells_takes_under_a_second(world):
+    # the seed-42 world tiled to 600x500 cells, with the shipped seasons.yaml
+    reps = (2, 3)
+    big = world.with_changes(terrain=np.tile(world.terrain, reps),
+                             corridors={k: np.tile(v, reps) for k, v in world.corridors.items()},
+                             species_presence={k: np.tile(v, reps) for k, v in world.species_presence.items()},
+                             signs=list(world.signs) * 6)
+    assert big.terrain.size >= 250_000
+    engine = SeasonEngine()
+    engine.tick(big, np.random.default_rng(0))  # habitat fields are built once per world
+    t0 = time.perf_counter()
+    for month in range(3):
+        big, _, _ = engine.tick(big, np.random.default_rng(month))
+    assert (time.perf_counter() - t0) / 3 < 1.0
+
+
+def test_workers_sharing_a_world_skip_a_tick_made_within_min_interval(rules, world, tmp_path):
+    shared = SharedWorld(str(tmp_path))
+    sm = StateManager(rules, data_dir=str(tmp_path / 'data'), store=None, shared=shared)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with shared.lock():
+            sm._attach(sm._publish(world))
+        assert sm.advance_month()['month'] == 5
+        assert sm.advance_month(min_interval=60) is None
+        time.sleep(0.05)
+        assert sm.advance_month(min_interval=0.01)['month'] == 6
+    assert shared.read_pointer()['month'] == 6
+
+
+def test_the_clock_logs_failed_ticks(state, monkeypatch, capsys):
+    def fail(**kwargs):
+        raise RuntimeError('disk full')
+
+    monkeypatch.setattr(state, 'advance_month', fail)
+    clock = SeasonClock(state, 0.01)
+    clock.start()
+    time.sleep(0.1)
+    clock.stop()
+    assert "event=season status=failed error=\"RuntimeError('disk full')\"" in capsys.readouterr().out
@@ -0,0 +1,82 @@
+import base64
+
+import numpy as np
+
+from engine.session import Session
+
+
+def decode_strips(data: bytes) -> list:
+    """[(rect, cells)] from encode_strips output."""
+    count = int(np.frombuffer(data[:2], dtype='<u2')[0])
+    out, at = [], 2
+    for _ in range(count):
+        x, y, w, h = (int(v) for v in np.frombuffer(data[at:at + 8], dtype='<u2'))
+        at += 8
+        out.append(((x, y, x + w, y + h), np.frombuffer(data[at:at + w * h], dtype=np.uint8).reshape(h, w)))
+        at += w * h
+    return out
+
+
+def started(state, x=60, y=60, r=5):
+    session = Session(state, 0, 0)
+    reply = session.handle({'type': 'start', 'x': x, 'y': y, 'view_radius': r})
+    return session, reply
+
+
+def test_start_sends_the_full_viewport_and_observation(state):
+    session, reply = started(state)
+    assert reply['type'] == 'update' and reply['reason'] == 'start'
+    assert reply['terrain']['full'] and reply['terrain']['rect'] == [55, 55, 66, 66]
+    obs = state.observe(60, 60)
+    assert reply['observation']['reset']
+    assert reply['observation']['order'] == [o['species_id'] for o in obs['observations']]
+    assert len(reply['observation']['signs_add']) == len(obs['signs'])
+
+
+def test_move_sends_only_what_changed(state):
+    session, _ = started(state)
+    have = {o['species_id']: o for o in state.observe(60, 60)['observations']}
+    reply = session.handle({'type': 'move', 'dx': 1, 'dy': 0})
+    assert not reply['terrain']['full'] and (reply['x'], reply['y']) == (61, 60)
+    strips = decode_strips(base64.b64decode(reply['terrain']['strips']))
+    assert [rect for rect, _ in strips] == [(66, 55, 67, 66)]
+    assert np.array_equal(strips[0][1], state.world.terrain[55:66, 66:67])
+
+    obs = reply['observation']
+    for o in obs['upsert']:
+        have[o['species_id']] = o
+    for sp_id in obs['remove']:
+        del have[sp_id]
+    assert have == {o['species_id']: o for o in state.observe(61, 60)['observations']}
+    assert session.handle({'type': 'move', 'dx': 0, 'dy': 0}) is None
+
+
+def test_world_changes_are_pushed_as_updates(state):
+    session, _ = started(state)
+    state.set_time('night')
+    reply = session.update('world')
+    assert reply['reason'] == 'world' and reply['time_of_day'] == 'night'
+    assert session.update('world') is None
+
+
+def test_a_smaller_world_moves_the_player_onto_it(state, world):
+    session, _ = started(state, x=150, y=150)
+    state._swap(world.with_changes(terrain=world.terrain[:100, :120],
+                                   corridors={k: v[:100, :120] for k, v in world.corridors.items()},
+                                   species_presence={k: v[:100, :120] for k, v in world.species_presence.items()},
+                                   signs=[s for s in world.signs if s['x'] < 120 and s['y'] < 100]))
+    reply = session.update('world')
+    assert reply['type'] == 'update' and (reply['x'], reply['y']) == (119, 99)
+    assert reply['terrain']['full']
+
+
+def test_bad_messages_get_an_error_reply(state):
+    session = Session(state, 0, 0)
+    assert session.handle({'type': 'move', 'dx': 1})['detail'] == "Send 'start' first"
+    session.handle({'type': 'start', 'x': 60, 'y': 60})
+    assert session.handle({'type': 'move', 'dx': 'east'})['type'] == 'error'
+    assert session.handle({'type': 'start', 'x': None})['type'] == 'error'
+    assert session.handle({'type': 'fly'})['type'] == 'error'
+    assert session.handle(['move'])['type'] == 'error'
+    assert session.handle({'type': 'move', 'dx': -1000}) is None  # off the map: stays put
+    assert (session.x, session.y) == (60, 60)
@@ -0,0 +1,24 @@
+import contextlib
+import io
+import shutil
+
+from engine import StateManager
+from engine.shared import SharedWorld
+
+
+def test_a_worker_behind_a_pruned_snapshot_attaches_the_latest(rules, world, tmp_path):
+    shared = SharedWorld(str(tmp_path), keep=2)
+    a = StateManager(rules, data_dir=str(tmp_path / 'a'), store=None, shared=shared)
+    b = StateManager(rules, data_dir=str(tmp_path / 'b'), store=None, shared=shared)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with shared.lock():
+            a._attach(a._publish(world))
+        b._attach(shared.read_pointer())
+        a.set_time('dusk')
+        missed = shared.read_pointer()
+        a.set_time('night')
+        latest = shared.read_pointer()
+        shutil.rmtree(shared.path(missed['snapshot']))  # pruned before b got to it
+        b._on_shared_change(missed)
+    assert b._snapshot == latest['snapshot']
+    assert b.world.time_of_day == 'night' and b.world.version == a.world.version
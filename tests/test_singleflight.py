@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from engine.singleflight import SingleFlight
+
+
+def run_together(flights, key, fn, callers=4):
+    """Call flights.do(key, fn) from several threads; results and errors fill in as they finish."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flights.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def wait_for_waiters(flights, key, n):
+    for _ in range(500):
+        with flights._lock:
+            flight = flights._flights.get(key)
+            if flight is not None and flight.waiters == n:
+                return
+        time.sleep(0.01)
+    raise AssertionError(f'{n} waiters never joined')
+
+
+def test_concurrent_callers_share_one_computation():
+    flights, release, calls = SingleFlight(), threading.Event(), []
+    key = ('observe', 1, 10, 20)
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {'x': 10}
+
+    threads, results, errors = run_together(flights, key, compute)
+    wait_for_waiters(flights, key, 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1 and not errors
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert flights.stats() == {'observe': {'calls': 4, 'coalesced': 3, 'in_flight': 0}}
+
+
+def test_an_error_reaches_every_waiter():
+    flights, release = SingleFlight(), threading.Event()
+    key = ('observe', 1, 0, 0)
+
+    def fail():
+        release.wait(5)
+        raise ValueError('out of bounds')
+
+    threads, results, errors = run_together(flights, key, fail)
+    wait_for_waiters(flights, key, 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert not results and len(errors) == 4
+    assert all(isinstance(e, ValueError) and str(e) == 'out of bounds' for e in errors)
+
+
+def test_the_key_is_released_after_each_call():
+    flights = SingleFlight()
+    key = ('payload:config', 1, 'config')
+
+    def fail():
+        raise RuntimeError('boom')
+
+    assert flights.do(key, lambda: 1) == 1
+    assert key not in flights._flights
+    with pytest.raises(RuntimeError):
+        flights.do(key, fail)
+    assert key not in flights._flights
+    assert flights.do(key, lambda: 2) == 2  # a later call computes afresh
+    assert flights.stats()['payload:config'] == {'calls': 3, 'coalesced': 0, 'in_flight': 0}
@@ -0,0 +1,76 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from engine.tiles import CELL_PX, TILE_PX, TileCache, max_zoom, parse_color, render_tile
+
+
+def decode_png(png: bytes) -> np.ndarray:
+    """(h, w, 4) pixels of an encode_png image."""
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    w, h = struct.unpack('>II', png[16:24])
+    idat_len = struct.unpack('>I', png[33:37])[0]
+    raw = np.frombuffer(zlib.decompress(png[41:41 + idat_len]), dtype=np.uint8).reshape(h, w * 4 + 1)
+    return raw[:, 1:].reshape(h, w, 4)
+
+
+def test_max_zoom_tiles_draw_each_cell_in_its_terrain_colour(world, tmp_path):
+    cache = TileCache(str(tmp_path))
+    z = max_zoom(world.shape)
+    img = decode_png(cache.get(world, z, 1, 2))
+    for cy, cx in [(0, 0), (5, 17), (31, 31)]:
+        colour = parse_color(world.terrain_types[int(world.terrain[2 * 32 + cy, 32 + cx])]['color'])
+        assert tuple(img[cy * CELL_PX + 3, cx * CELL_PX + 3]) == colour
+
+
+def test_cells_past_the_edge_are_transparent(world):
+    rows, cols = world.shape
+    z = max_zoom(world.shape)
+    img = render_tile(world, z, (cols - 1) // 32, (rows - 1) // 32)
+    assert img.shape == (TILE_PX, TILE_PX, 4) and cols % 32 and rows % 32
+    assert (img[:, (cols % 32) * CELL_PX:, 3] == 0).all()
+    assert (img[(rows % 32) * CELL_PX:, :, 3] == 0).all()
+    assert (img[:(rows % 32) * CELL_PX, :(cols % 32) * CELL_PX, 3] > 0).all()
+
+
+def test_tiles_outside_the_pyramid_are_none(world, tmp_path):
+    cache = TileCache(str(tmp_path))
+    assert cache.get(world, max_zoom(world.shape) + 1, 0, 0) is None
+    assert cache.get(world, 0, 1, 0) is None
+    assert cache.get(world, 0, 0, 0) is not None
+
+
+def test_time_changes_keep_tiles_and_layer_changes_do_not(world, tmp_path):
+    cache = TileCache(str(tmp_path))
+    cache.get(world, 2, 0, 0, ('signs',))
+    cache.get(world.with_changes(time_of_day='night', month=5), 2, 0, 0, ('signs',))
+    assert cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'rendered': 1}
+
+    fewer = world.with_changes(signs=world.signs[1:])
+    assert cache.digest(fewer) == cache.digest(world)
+    assert cache.digest(fewer, ('signs',)) != cache.digest(world, ('signs',))
+    cache.get(fewer, 2, 0, 0)
+    cache.get(fewer, 2, 0, 0, ('signs',))
+    assert cache.stats['rendered'] == 3
+
+    terrain = np.array(world.terrain)
+    terrain[0, 0] = (terrain[0, 0] + 1) % len(world.terrain_types)
+    assert cache.digest(world.with_changes(terrain=terrain)) != cache.digest(world)
+
+
+def test_caches_stay_within_budget_and_survive_a_restart(world, tmp_path):
+    cache = TileCache(str(tmp_path), memory_bytes=20_000, disk_bytes=30_000)
+    z = max_zoom(world.shape)
+    for x in range(4):
+        for y in range(4):
+            cache.get(world, z, x, y)
+    assert cache._mem_size <= 20_000 and len(cache._mem) < 16
+    assert cache._disk_size <= 30_000
+    on_disk = [os.path.join(r, f) for r, _, fs in os.walk(cache.dir) for f in fs]
+    assert sorted(on_disk) == sorted(cache._disk)
+
+    restarted = TileCache(str(tmp_path))
+    restarted.get(world, z, 3, 3)
+    assert restarted.stats['disk_hits'] == 1
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Star Carr Engine Benchmarks
+Times generation stages, observe latency, season ticks and save/load throughput on
+synthetic rule sets scaled from rules/ to several grid sizes and species
+counts. Each case runs in a fresh process so its peak RSS is its own.
+
+Usage:
+    python tools/benchmark.py run                          # 200x250, 400x500, 800x1000
+    python tools/benchmark.py run --sizes 200x250,4000x5000 --species 1,3 --out bench.json
+    python tools/benchmark.py compare baseline.json bench.json --threshold 0.15
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from engine import StateManager, load_rules
+from engine.persistence import MemoryRedis, RedisStore
+
+DEFAULT_SIZES = '200x250,400x500,800x1000'
+ALL_SIZES = '200x250,400x500,800x1000,2000x2500,4000x5000'
+
+
+def synthetic_rules(rules: dict, cols: int, rows: int, species_factor: int = 1) -> dict:
+    """rules scaled to a cols x rows grid, with every species cloned species_factor times.
+
+    Positions and radii scale with the grid; counts (grassland patches, game
+    trails) scale with its area. Clones are named '<id>_<n>' and keep their
+    original's distribution, effects and texts.
+    """
+    rules = copy.deepcopy(rules)
+    terrain = rules['terrain']
+    base_rows, base_cols = terrain['grid']['rows'], terrain['grid']['cols']
+    sx, sy = cols / base_cols, rows / base_rows
+    area = sx * sy
+
+    terrain['grid'].update(cols=cols, rows=rows)
+    lake = terrain['lake']
+    lake.update(center_x=round(lake['center_x'] * sx), center_y=round(lake['center_y'] * sy),
+                radius_x=round(lake['radius_x'] * sx), radius_y=round(lake['radius_y'] * sy))
+    spawn = terrain['spawn']
+    spawn.update(x=round(spawn['x'] * sx), y=round(spawn['y'] * sy))
+
+    patches = terrain.get('grassland_patches')
+    if patches:
+        patches['count'] = max(1, round(patches.get('count', 0) * area))
+        patches['region'] = {'x': [round(v * sx) for v in patches['region']['x']],
+                             'y': [round(v * sy) for v in patches['region']['y']]}
+        patches['radius'] = [max(1, round(v * min(sx, sy))) for v in patches['radius']]
+
+    trail = terrain.get('corridors', {}).get('game_trail')
+    if trail:
+        trail['count'] = max(1, round(trail.get('count', 5) * min(area, 16)))
+
+    species = rules['species'].get('species', {})
+    if species_factor > 1:
+        next_id = max((sp.get('id', 0) for sp in species.values()), default=0) + 1
+        for sp_id, sp in list(species.items()):
+            for n in range(1, species_factor):
+                clone = copy.deepcopy(sp)
+                clone['id'] = next_id
+                next_id += 1
+                species[f'{sp_id}_{n}'] = clone
+    return rules
+
+
+def _percentiles(samples: list) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    pick = lambda q: ms[min(len(ms) - 1, int(q * len(ms)))]
+    return {'n': len(ms), 'mean_ms': round(statistics.fmean(ms), 4), 'p50_ms': round(pick(0.5), 4),
+            'p95_ms': round(pick(0.95), 4), 'max_ms': round(ms[-1], 4)}
+
+
+def _timed(fn, repeat: int = 1) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_case(rules: dict, cols: int, rows: int, species_factor: int, seed: int, radii: list,
+             observations: int) -> dict:
+    """One grid size / species count (runs in its own process)."""
+    case_rules = synthetic_rules(rules, cols, rows, species_factor)
+    tmp = tempfile.mkdtemp(prefix='star-carr-bench-')
+    result = {'grid': f'{cols}x{rows}', 'cells': cols * rows, 'species_factor': species_factor,
+              'species': len(case_rules['species'].get('species', {})), 'seed': seed}
+    try:
+        # Generation, stage by stage
+        sm = StateManager(case_rules, data_dir=os.path.join(tmp, 'files'), store=None)
+        stages = {}
+
+        def progress(event):
+            if event.get('event') == 'stage':
+                stages[event['stage']] = round(event['seconds'], 4)
+
+        t0 = time.perf_counter()
+        w = sm.generate(seed, progress=progress)
+        result['generate_seconds'] = round(time.perf_counter() - t0, 4)
+        result['stages'] = stages
+        by_kind = {}
+        for name, seconds in stages.items():
+            kind = name.split(':')[0]
+            by_kind[kind] = round(by_kind.get(kind, 0) + seconds, 4)
+        result['stage_kinds'] = by_kind
+        result['world'] = {'bytes': w.nbytes, 'signs': len(w.signs),
+                           'species_present': sum(1 for a in w.species_presence.values() if a.any())}
+
+        # Observe: cold lookups at random cells, then an incremental walk
+        rng = np.random.default_rng(seed)
+        xs, ys = rng.integers(0, cols, observations), rng.integers(0, rows, observations)
+        result['observe'] = {}
+        for r in radii:
+            full = []
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                t0 = time.perf_counter()
+                sm.observe(x, y, r, world=w)
+                full.append(time.perf_counter() - t0)
+
+            steps, state = [], None
+            x, y = cols // 2, rows // 2
+            _, state = sm.observe_step(None, 0, 0, x=x, y=y, radius=r, world=w)
+            for dx, dy in rng.integers(-1, 2, (observations, 2)).tolist():
+                if not (0 <= state.x + dx < cols and 0 <= state.y + dy < rows):
+                    dx, dy = -dx, -dy
+                t0 = time.perf_counter()
+                _, state = sm.observe_step(state, dx, dy, world=w)
+                steps.append(time.perf_counter() - t0)
+            result['observe'][str(r)] = {'full': _percentiles(full), 'step': _percentiles(steps)}
+
+        # Seasons: a year of monthly ticks with the shipped seasons.yaml
+        ticks, sw = [], w
+        for _ in range(12):
+            t0 = time.perf_counter()
+            sw, _, _ = sm.seasons.tick(sw, rng)
+            ticks.append(time.perf_counter() - t0)
+        result['season_tick'] = _percentiles(ticks)
+
+        # Persistence throughput
+        mb = w.nbytes / 1e6
+        files = os.path.join(tmp, 'files')
+        persistence = {
+            'save_files': _timed(lambda: sm.save(w, data_dir=files), 3),
+            'load_files': _timed(lambda: sm.load(data_dir=files), 3),
+            'load_mmap': _timed(lambda: sm.load(data_dir=files, mmap=True), 3),
+        }
+        store = RedisStore(MemoryRedis())
+        sm.redis = store
+
+        def redis_save():
+            sm._save_to_redis()
+            store.flush()
+
+        persistence['save_redis'] = _timed(redis_save, 3)
+        persistence['load_redis'] = _timed(sm._load_from_redis, 3)  # includes its local file copy
+        store.close()
+        result['persistence'] = {op: {'seconds': round(s, 4), 'mb_per_s': round(mb / s, 1) if s else None}
+                                 for op, s in persistence.items()}
+        result['redis_payload_bytes'] = len(store.client.data.get(sm.redis_key, b''))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    result['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def _case_entry(args):
+    # Generation chatter would bury the results; the case's own output is enough
+    sys.stdout = open(os.devnull, 'w')
+    return run_case(*args)
+
+
+def _meta(args) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'args': {k: v for k, v in vars(args).items() if k != 'func'},
+    }
+
+
+def cmd_run(args):
+    rules = load_rules(args.rules)
+    sizes = ALL_SIZES if args.sizes == 'all' else args.sizes
+    grids = [tuple(int(v) for v in s.split('x')) for s in sizes.split(',')]
+    factors = [int(f) for f in args.species.split(',')]
+    radii = [int(r) for r in args.radii.split(',')]
+
+    ctx = multiprocessing.get_context('spawn')
+    cases = []
+    for cols, rows in grids:
+        for factor in factors:
+            print(f"{cols}x{rows}, species x{factor} ...", flush=True)
+            with ctx.Pool(1) as pool:
+                case = pool.apply(_case_entry, ((rules, cols, rows, factor, args.seed, radii, args.observations),))
+            cases.append(case)
+            obs = case['observe'][str(radii[0])]
+            print(f"  generate {case['generate_seconds']:.2f}s  "
+                  f"observe r={radii[0]} {obs['full']['p50_ms']:.2f}ms (step {obs['step']['p50_ms']:.2f}ms)  "
+                  f"season {case['season_tick']['p50_ms']:.0f}ms  "
+                  f"save {case['persistence']['save_files']['mb_per_s']} MB/s  peak {case['peak_rss_mb']} MB",
+                  flush=True)
+
+    report = {'meta': _meta(args), 'cases': cases}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+def _metrics(case: dict) -> dict:
+    """Flat {metric: seconds} for comparison (lower is better)."""
+    out = {'generate': case['generate_seconds']}
+    out.update({f'stage:{k}': v for k, v in case['stage_kinds'].items()})
+    for r, obs in case['observe'].items():
+        out[f'observe:r{r}:p50'] = obs['full']['p50_ms'] / 1000
+        out[f'observe_step:r{r}:p50'] = obs['step']['p50_ms'] / 1000
+    if 'season_tick' in case:
+        out['season_tick:p50'] = case['season_tick']['p50_ms'] / 1000
+    out.update({f'persistence:{op}': v['seconds'] for op, v in case['persistence'].items()})
+    return out
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        base = {(c['grid'], c['species_factor']): c for c in json.load(f)['cases']}
+    with open(args.current) as f:
+        current = json.load(f)['cases']
+
+    regressions = 0
+    for case in current:
+        key = (case['grid'], case['species_factor'])
+        if key not in base:
+            continue
+        print(f"{case['grid']}, species x{case['species_factor']}")
+        old, new = _metrics(base[key]), _metrics(case)
+        for name in sorted(set(old) & set(new)):
+            a, b = old[name], new[name]
+            if a < args.min_seconds and b < args.min_seconds:
+                continue  # too small to compare reliably
+            change = (b - a) / a if a else 0.0
+            flag = 'REGRESSION' if change > args.threshold else 'faster' if change < -args.threshold else ''
+            regressions += flag == 'REGRESSION'
+            print(f"  {name:32s} {a:10.4f}s → {b:10.4f}s  {change:+7.1%}  {flag}")
+        print(f"  {'peak_rss_mb':32s} {base[key]['peak_rss_mb']:10.1f}  → {case['peak_rss_mb']:10.1f}")
+
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='run the benchmarks and write a JSON report')
+    run.add_argument('--rules', default=os.path.join(ROOT, 'rules'), help='rules directory to scale from')
+    run.add_argument('--sizes', default=DEFAULT_SIZES,
+                     help=f"comma-separated COLSxROWS grids, or 'all' ({ALL_SIZES})")
+    run.add_argument('--species', default='1,2', help='comma-separated species multipliers (clones per species)')
+    run.add_argument('--radii', default='3,10,25', help='observe radii')
+    run.add_argument('--observations', type=int, default=200, help='observe calls per radius')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--out', default='benchmark.json')
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser('compare', help='compare two reports; exits 1 on regressions')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.10, help='relative slowdown that counts')
+    compare.add_argument('--min-seconds', type=float, default=0.0005, help='ignore metrics faster than this')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
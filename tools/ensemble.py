@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Star Carr Seed Ensembles
+Generates hundreds of seeds of one rules directory across a process pool and
+summarises how the rules behave: per-species presence rate, cell counts,
+coverage and damage-state mix, sign counts by type, predator presence rates
+and the terrain/corridor mix, each with mean, spread, percentiles and a
+histogram.
+
+Each seed is one line of JSON appended to the output as soon as it finishes,
+so an ensemble of any size runs in bounded memory and an interrupted run can
+be continued with --resume. Seeds are generated by the same pipeline as
+POST /api/regenerate?seed=N, so any outlier can be opened in the game.
+
+Usage:
+    python tools/ensemble.py run --seeds 1-500 --out elk.jsonl
+    python tools/ensemble.py run --seeds 1-500 --out elk.jsonl --resume
+    python tools/ensemble.py summarize elk.jsonl --json elk-summary.json
+    python tools/ensemble.py summarize elk.jsonl --filter species.elk
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from engine import GenerationPipeline, load_rules, parse_seeds
+from engine.species_generator import SpeciesGenerator
+from engine.terrain_generator import TerrainGenerator
+from engine.world import rules_digest
+from fingerprint import world_stats
+
+BINS = 20
+EXACT_VALUES = 256  # statistics with at most this many distinct values get exact percentiles
+SPARKS = ' ▁▂▃▄▅▆▇█'
+
+# Per worker process: the rules (sent once, read-only) and a pipeline
+_rules = None
+_pipeline = None
+_state_names: Dict[str, Dict[str, str]] = {}
+
+
+def _init_worker(rules: dict):
+    global _rules, _pipeline, _state_names
+    _rules = rules
+    _pipeline = GenerationPipeline()
+    _state_names = state_names(rules)
+
+
+def state_names(rules: dict) -> Dict[str, Dict[str, str]]:
+    """species id → {state value: state name} for species with damage states."""
+    tgen = TerrainGenerator(rules['terrain'])
+    sgen = SpeciesGenerator(rules['species'], tgen.terrain_ids)
+    names = {}
+    for sp_id, defs in sgen.effect_targets().items():
+        for d in defs:
+            for value, state in sgen.state_defs.get(d, {}).get('states', {}).items():
+                names.setdefault(sp_id, {})[str(value)] = state.get('name', str(value))
+    return names
+
+
+def run_seed(seed: int) -> dict:
+    """Generate one seed in this worker and reduce it to its statistics."""
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = _pipeline.run(_rules, seed)
+    stats = world_stats(result, _rules)
+    cells = result['terrain'].size
+    # only species with a presence roll; the rest are always present
+    species = _rules['species'].get('species', {})
+    stats['predators'] = {sp: v for sp, v in stats['predators'].items()
+                          if species.get(sp, {}).get('distribution', {}).get('presence_probability') is not None}
+    for sp_id, sp in stats['species'].items():
+        sp['present'] = sp['cells'] > 0
+        sp['coverage'] = round(sp['cells'] / cells, 6)
+        names = _state_names.get(sp_id)
+        if names:
+            sp['states'] = {names.get(k, k): n for k, n in sp['states'].items()}
+        else:
+            sp.pop('states')  # presence only: every cell is state 1
+    return {'seed': seed, 'seconds': round(time.perf_counter() - t0, 3), 'cells': cells, **stats}
+
+
+# Streaming statistics
+
+def _flatten(record: dict, prefix: str = '') -> Dict[str, float]:
+    out = {}
+    for k, v in record.items():
+        key = f'{prefix}{k}'
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + '.'))
+        elif isinstance(v, (bool, int, float)):
+            out[key] = float(v)
+    return out
+
+
+def _records(path: str) -> Iterator[Dict[str, float]]:
+    """Flattened per-seed statistics, one line at a time."""
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith('{"meta"'):
+                record = json.loads(line)
+                record.pop('seed', None)
+                yield _flatten(record)
+
+
+def summarize(path: str, key_filter: str = None, bins: int = BINS) -> dict:
+    """Two passes over the file: moments and range, then histograms.
+
+    Memory is per statistic, not per seed. A statistic missing from a seed
+    (a species that was never placed, a sign type that didn't occur) counts
+    as 0. Percentiles are exact for statistics with few distinct values
+    (counts, flags) and interpolated within a histogram bin otherwise.
+    """
+    n = 0
+    sums: Dict[str, List[float]] = {}  # key → [count, sum, sum of squares, min, max]
+    exact: Dict[str, Optional[Counter]] = {}  # key → value counts, None once there are too many
+    for flat in _records(path):
+        n += 1
+        for k, v in flat.items():
+            if key_filter and not k.startswith(key_filter):
+                continue
+            s = sums.get(k)
+            if s is None:
+                s = sums[k] = [0, 0.0, 0.0, v, v]
+                exact[k] = Counter()
+            s[0] += 1
+            s[1] += v
+            s[2] += v * v
+            s[3] = min(s[3], v)
+            s[4] = max(s[4], v)
+            values = exact[k]
+            if values is not None:
+                values[v] += 1
+                if len(values) > EXACT_VALUES:
+                    exact[k] = None
+    if n == 0:
+        return {'seeds': 0, 'stats': {}}
+
+    stats = {}
+    for k, (count, total, squares, lo, hi) in sums.items():
+        if count < n:
+            lo, hi = min(lo, 0.0), max(hi, 0.0)
+            if exact[k] is not None:
+                exact[k][0.0] += n - count
+        mean = total / n
+        stats[k] = {'mean': mean, 'std': math.sqrt(max(0.0, squares / n - mean * mean)), 'min': lo, 'max': hi,
+                    'seen': count, 'counts': np.zeros(bins, dtype=np.int64)}
+
+    for flat in _records(path):
+        for k, st in stats.items():
+            v = flat.get(k, 0.0)
+            width = st['max'] - st['min']
+            i = min(bins - 1, int((v - st['min']) / width * bins)) if width else 0
+            st['counts'][i] += 1
+
+    for k, st in stats.items():
+        counts = st.pop('counts')
+        edges = np.linspace(st['min'], st['max'], bins + 1)
+        for q in (5, 50, 95):
+            st[f'p{q}'] = _percentile(q / 100 * n, exact[k], counts, edges)
+        st['histogram'] = {'edges': [round(float(e), 6) for e in edges], 'counts': counts.tolist()}
+        for field in ('mean', 'std', 'min', 'max'):
+            st[field] = round(st[field], 6)
+    return {'seeds': n, 'stats': dict(sorted(stats.items()))}
+
+
+def _percentile(rank: float, values: Optional[Counter], counts: np.ndarray, edges: np.ndarray) -> float:
+    """Value at a rank (0..n), from exact value counts if kept, else the histogram."""
+    if values is not None:
+        seen = 0
+        for v in sorted(values):
+            seen += values[v]
+            if seen >= rank:
+                return v
+        return max(values)
+    below = 0
+    for i, c in enumerate(counts):
+        if c and below + c >= rank:
+            return float(edges[i] + (rank - below) / c * (edges[i + 1] - edges[i]))
+        below += c
+    return float(edges[-1])
+
+
+def _spark(counts: List[int]) -> str:
+    top = max(counts) or 1
+    return ''.join(SPARKS[math.ceil(c / top * (len(SPARKS) - 1))] for c in counts)
+
+
+def print_summary(summary: dict):
+    print(f"{summary['seeds']} seeds")
+    print(f"  {'statistic':44s} {'mean':>10s} {'std':>10s} {'p5':>10s} {'p50':>10s} {'p95':>10s}  histogram (min..max)")
+    for k, st in summary['stats'].items():
+        print(f"  {k:44s} {st['mean']:10.4g} {st['std']:10.4g} {st['p5']:10.4g} {st['p50']:10.4g} {st['p95']:10.4g}"
+              f"  {_spark(st['histogram']['counts'])} ({st['min']:.4g}..{st['max']:.4g})")
+
+
+# Commands
+
+def _done_seeds(path: str) -> set:
+    done = set()
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if 'seed' in record:
+                    done.add(record['seed'])
+    return done
+
+
+def cmd_run(args):
+    rules = load_rules(args.rules)
+    seeds = parse_seeds(args.seeds)
+    if args.resume and os.path.exists(args.out):
+        done = _done_seeds(args.out)
+        seeds = [s for s in seeds if s not in done]
+        print(f"Resuming: {len(done)} seed(s) already in {args.out}")
+        mode = 'a'
+    else:
+        mode = 'w'
+
+    jobs = max(1, min(args.jobs, len(seeds) or 1))
+    print(f"Generating {len(seeds)} seed(s) of {args.rules} with {jobs} process(es) → {args.out}")
+    t0 = time.perf_counter()
+    with open(args.out, mode) as out:
+        if mode == 'w':
+            out.write(json.dumps({'meta': {'rules': args.rules, 'rules_digest': rules_digest(rules),
+                                           'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}}) + '\n')
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(rules,)) as pool:
+            for i, record in enumerate(pool.imap_unordered(run_seed, seeds), 1):
+                out.write(json.dumps(record, separators=(',', ':')) + '\n')
+                out.flush()
+                if i % args.progress == 0 or i == len(seeds):
+                    rate = i / (time.perf_counter() - t0)
+                    print(f"  {i}/{len(seeds)} seeds, {rate:.1f}/s")
+
+    if not args.no_summary:
+        print_summary(summarize(args.out, args.filter))
+
+
+def cmd_summarize(args):
+    summary = summarize(args.results, args.filter, args.bins)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=1)
+        print(f"Wrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='generate seeds and stream their statistics to a JSONL file')
+    run.add_argument('--rules', default=os.path.join(ROOT, 'rules'))
+    run.add_argument('--seeds', default='1-100', help="e.g. '1-500' or '3,7,42'")
+    run.add_argument('--out', default='ensemble.jsonl')
+    run.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    run.add_argument('--resume', action='store_true', help='skip seeds already in --out and append')
+    run.add_argument('--progress', type=int, default=25, help='report every N seeds')
+    run.add_argument('--filter', help='only summarise statistics starting with this, e.g. species.beaver')
+    run.add_argument('--no-summary', action='store_true')
+    run.set_defaults(func=cmd_run)
+
+    summ = sub.add_parser('summarize', help='summary statistics and histograms of a results file')
+    summ.add_argument('results')
+    summ.add_argument('--filter', help='only statistics starting with this, e.g. signs.')
+    summ.add_argument('--bins', type=int, default=BINS)
+    summ.add_argument('--json', help='also write the summary (with histograms) here')
+    summ.set_defaults(func=cmd_summarize)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
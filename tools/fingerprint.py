@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Star Carr Golden-World Fingerprints
+Records a hash of every generation stage and final layer (terrain, corridors,
+presence arrays, signs) plus distribution statistics for a set of seeds and
+rule directories, then checks other engines or later code against them.
+
+exact mode  - every stage must hash the same; the first diverging stage in
+              pipeline order is reported as the cause, the rest as downstream.
+stats mode  - for engines that are deliberately not bit-exact: per-rules means
+              over the seeds of terrain mix, corridor coverage, trail length,
+              species counts and states, sign densities and predator rates
+              must agree within tolerance.
+
+Usage:
+    python tools/fingerprint.py record --seeds 1-20 --rules rules --out golden.json
+    python tools/fingerprint.py check golden.json                     # current code, exact
+    python tools/fingerprint.py check golden.json --pipeline mymod:FastPipeline --mode stats
+    python tools/fingerprint.py compare golden.json other.json --mode stats --rel-tol 0.05
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from scipy.ndimage import label
+
+from engine import load_rules, parse_seeds
+from engine.world import rules_digest
+
+DEFAULT_PIPELINE = 'engine.pipeline:GenerationPipeline'
+
+
+def _update(h, obj):
+    """Feed obj into hash h canonically (dict order, numpy vs Python scalars don't matter)."""
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        h.update(f'nd{arr.dtype.str}{arr.shape}'.encode())
+        h.update(arr.tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for k in sorted(obj, key=str):
+            h.update(repr(str(k)).encode())
+            _update(h, obj[k])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[')
+        for v in obj:
+            _update(h, v)
+        h.update(b']')
+    else:
+        h.update(repr(obj.item() if isinstance(obj, np.generic) else obj).encode())
+
+
+def digest(obj) -> str:
+    h = hashlib.sha1()
+    _update(h, obj)
+    return h.hexdigest()[:16]
+
+
+def world_stats(result: dict, rules: dict) -> dict:
+    """Distribution-level statistics of a pipeline result."""
+    terrain = result['terrain']
+    cells = terrain.size
+    names = {int(k): v['name'] for k, v in rules['terrain'].get('terrain_types', {}).items()}
+    ids, counts = np.unique(terrain, return_counts=True)
+
+    stats = {
+        'terrain': {names.get(int(t), str(t)): round(int(n) / cells, 6) for t, n in zip(ids, counts)},
+        'corridors': {name: round(int(m.sum()) / cells, 6) for name, m in result['corridors'].items()},
+        'species': {},
+        'signs': {},
+        'predators': {sp: bool(v) for sp, v in result['predator_presence'].items() if not sp.startswith('_')},
+    }
+
+    trail = result['corridors'].get('game_trail')
+    if trail is not None:
+        _, components = label(trail, structure=np.ones((3, 3), dtype=bool))
+        stats['trails'] = {'cells': int(trail.sum()), 'components': int(components)}
+
+    for sp_id, arr in result['presence'].items():
+        states, n = np.unique(arr[arr > 0], return_counts=True)
+        stats['species'][sp_id] = {
+            'cells': int(arr.astype(bool).sum()),
+            'states': {str(int(s)): int(c) for s, c in zip(states, n)},
+        }
+
+    by_type: Dict[str, int] = {}
+    for s in result['signs']:
+        by_type[s['type']] = by_type.get(s['type'], 0) + 1
+    stats['signs'] = {'total': len(result['signs']), 'per_1000_cells': round(len(result['signs']) * 1000 / cells, 4),
+                      'by_type': by_type}
+    return stats
+
+
+def _load_pipeline(spec: str):
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def fingerprint(rules_dir: str, seed: int, pipeline: str = DEFAULT_PIPELINE) -> dict:
+    """Generate one world with a fresh pipeline and fingerprint it."""
+    rules = load_rules(rules_dir)
+    pipe = _load_pipeline(pipeline)()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = pipe.run(rules, seed)
+    seconds = time.perf_counter() - t0
+
+    stages = pipe.stage_outputs() if hasattr(pipe, 'stage_outputs') else {}
+    layers = {'terrain': digest(result['terrain'])}
+    layers.update({f'corridor:{k}': digest(v) for k, v in sorted(result['corridors'].items())})
+    layers.update({f'presence:{k}': digest(v) for k, v in sorted(result['presence'].items())})
+    layers['signs'] = digest(result['signs'])
+    layers['predator_presence'] = digest(result['predator_presence'])
+
+    return {
+        'rules': rules_dir,
+        'rules_digest': rules_digest(rules),
+        'seed': seed,
+        'seconds': round(seconds, 3),
+        'stages': [[name, digest(out)] for name, out in stages.items()],
+        'layers': layers,
+        'stats': world_stats(result, rules),
+    }
+
+
+def _run_all(jobs: List[tuple], pipeline: str, workers: int) -> List[dict]:
+    if workers <= 1:
+        return [fingerprint(r, s, pipeline) for r, s in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fingerprint, [r for r, _ in jobs], [s for _, s in jobs], [pipeline] * len(jobs)))
+
+
+def _report(worlds: List[dict], pipeline: str) -> dict:
+    return {'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pipeline': pipeline}, 'worlds': worlds}
+
+
+# Comparison
+
+def compare_exact(golden: List[dict], current: List[dict]) -> int:
+    """Print per-world divergences; returns the number of diverging worlds."""
+    cur = {(w['rules'], w['seed']): w for w in current}
+    diverged = 0
+    for g in golden:
+        c = cur.get((g['rules'], g['seed']))
+        where = f"{g['rules']} seed {g['seed']}"
+        if c is None:
+            print(f"  {where}: missing")
+            continue
+        if g['rules_digest'] != c['rules_digest']:
+            print(f"  {where}: note: rules changed since recording ({g['rules_digest']} → {c['rules_digest']})")
+
+        bad_stages = [n for n, h in g['stages'] if dict(c['stages']).get(n, h) != h]
+        bad_layers = [n for n, h in g['layers'].items() if c['layers'].get(n) != h]
+        if not bad_stages and not bad_layers:
+            print(f"  {where}: identical")
+            continue
+
+        diverged += 1
+        if bad_stages:
+            first = bad_stages[0]
+            downstream = bad_stages[1:]
+            print(f"  {where}: DIVERGED at stage {first}"
+                  + (f" (+{len(downstream)} downstream: {', '.join(downstream[:8])}{' ...' if len(downstream) > 8 else ''})"
+                     if downstream else ''))
+        else:
+            print(f"  {where}: DIVERGED in final layers")
+        if bad_layers:
+            print(f"    layers: {', '.join(bad_layers)}")
+    return diverged
+
+
+def _flatten(stats: dict, prefix: str = '') -> Dict[str, float]:
+    out = {}
+    for k, v in stats.items():
+        key = f'{prefix}{k}'
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + '.'))
+        elif isinstance(v, (bool, int, float)):
+            out[key] = float(v)
+    return out
+
+
+def _means(worlds: List[dict]) -> Dict[str, Dict[str, float]]:
+    """rules dir → {stat path: mean over seeds}; absent entries count as 0."""
+    grouped: Dict[str, List[Dict[str, float]]] = {}
+    for w in worlds:
+        grouped.setdefault(w['rules'], []).append(_flatten(w['stats']))
+    means = {}
+    for rules, flats in grouped.items():
+        keys = set().union(*flats)
+        means[rules] = {k: sum(f.get(k, 0.0) for f in flats) / len(flats) for k in keys}
+    return means
+
+
+def compare_stats(golden: List[dict], current: List[dict], rel_tol: float, abs_tol: float) -> int:
+    """Print statistics outside tolerance per rules dir; returns how many there are."""
+    g_means, c_means = _means(golden), _means(current)
+    off = 0
+    for rules, g in g_means.items():
+        c = c_means.get(rules)
+        if c is None:
+            print(f"  {rules}: missing")
+            continue
+        bad = []
+        for key in sorted(set(g) | set(c)):
+            a, b = g.get(key, 0.0), c.get(key, 0.0)
+            if abs(a - b) > max(rel_tol * abs(a), abs_tol):
+                bad.append((key, a, b))
+        off += len(bad)
+        n = sum(1 for w in golden if w['rules'] == rules)
+        print(f"  {rules} ({n} seeds): {'within tolerance' if not bad else f'{len(bad)} statistic(s) off'}")
+        for key, a, b in bad:
+            print(f"    {key:48s} {a:12.4f} → {b:12.4f}")
+    return off
+
+
+def _compare(golden: List[dict], current: List[dict], args) -> int:
+    if args.mode == 'exact':
+        return compare_exact(golden, current)
+    return compare_stats(golden, current, args.rel_tol, args.abs_tol)
+
+
+def cmd_record(args):
+    jobs = [(r, s) for r in args.rules for s in parse_seeds(args.seeds)]
+    worlds = _run_all(jobs, args.pipeline, args.jobs)
+    with open(args.out, 'w') as f:
+        json.dump(_report(worlds, args.pipeline), f, indent=1)
+    print(f"Recorded {len(worlds)} world(s) to {args.out}")
+
+
+def cmd_check(args):
+    with open(args.golden) as f:
+        golden = json.load(f)['worlds']
+    jobs = [(w['rules'], w['seed']) for w in golden]
+    print(f"Regenerating {len(jobs)} world(s) with {args.pipeline} ...")
+    current = _run_all(jobs, args.pipeline, args.jobs)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(_report(current, args.pipeline), f, indent=1)
+    sys.exit(1 if _compare(golden, current, args) else 0)
+
+
+def cmd_compare(args):
+    with open(args.golden) as f:
+        golden = json.load(f)['worlds']
+    with open(args.current) as f:
+        current = json.load(f)['worlds']
+    sys.exit(1 if _compare(golden, current, args) else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_compare_args(p):
+        p.add_argument('--mode', choices=('exact', 'stats'), default='exact')
+        p.add_argument('--rel-tol', type=float, default=0.10, help='stats mode: allowed relative difference')
+        p.add_argument('--abs-tol', type=float, default=0.002, help='stats mode: differences below this always pass')
+
+    def add_run_args(p):
+        p.add_argument('--pipeline', default=DEFAULT_PIPELINE,
+                       help='module:Class with run(rules, seed) returning the GenerationPipeline result')
+        p.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+
+    record = sub.add_parser('record', help='generate and store fingerprints')
+    record.add_argument('--rules', action='append', help='rules directory (repeatable; default rules)')
+    record.add_argument('--seeds', default='1-10', help="e.g. '1-20' or '3,7,42'")
+    record.add_argument('--out', default='golden.json')
+    add_run_args(record)
+    record.set_defaults(func=cmd_record)
+
+    check = sub.add_parser('check', help='regenerate the recorded worlds and compare; exits 1 on divergence')
+    check.add_argument('golden')
+    check.add_argument('--out', help='also write the new fingerprints here')
+    add_run_args(check)
+    add_compare_args(check)
+    check.set_defaults(func=cmd_check)
+
+    compare = sub.add_parser('compare', help='compare two fingerprint files; exits 1 on divergence')
+    compare.add_argument('golden')
+    compare.add_argument('current')
+    add_compare_args(compare)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    if getattr(args, 'rules', None) is None and args.command == 'record':
+        args.rules = ['rules']
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Star Carr Load Test
+Replays player-like sessions against the API with N concurrent simulated
+players and reports throughput, latency percentiles and error rates per
+endpoint. By default the app is started in-process (uvicorn on a free port)
+against the in-memory Redis stand-in, in a scratch directory, so nothing in
+the checkout is touched; --url targets a running server instead (e.g. one
+started with several workers).
+
+Each player spawns (config, species, the game-trail mask), fetches its
+viewport and then walks, preferring trail cells: every step observes the new
+cell, refetches terrain when the viewport has shifted, and occasionally
+changes the time of day, which invalidates every per-version cache.
+
+Usage:
+    python tools/loadtest.py --players 16 --duration 30
+    python tools/loadtest.py --players 32 --format gzip --time-rate 0 --out run.json
+    python tools/loadtest.py --url http://127.0.0.1:8000 --players 64 --transport ws
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+TIMES = ('dawn', 'morning', 'midday', 'afternoon', 'dusk', 'night')
+MOVES = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+class Recorder:
+    """Latencies and failures per endpoint label, shared by all players."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.examples: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, label: str, seconds: float, error: str = None):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if error:
+                self.errors[label] = self.errors.get(label, 0) + 1
+                self.examples.setdefault(label, error)
+
+    def report(self, wall: float) -> dict:
+        endpoints = {}
+        with self._lock:
+            for label, values in sorted(self.latencies.items()):
+                ms = np.asarray(values) * 1000
+                errors = self.errors.get(label, 0)
+                endpoints[label] = {
+                    'requests': len(values),
+                    'errors': errors,
+                    'error_rate': round(errors / len(values), 4),
+                    'rps': round(len(values) / wall, 1),
+                    'p50_ms': round(float(np.percentile(ms, 50)), 2),
+                    'p95_ms': round(float(np.percentile(ms, 95)), 2),
+                    'p99_ms': round(float(np.percentile(ms, 99)), 2),
+                    'max_ms': round(float(ms.max()), 2),
+                    **({'example_error': self.examples[label]} if label in self.examples else {}),
+                }
+        total = sum(e['requests'] for e in endpoints.values())
+        errors = sum(e['errors'] for e in endpoints.values())
+        return {'seconds': round(wall, 2), 'requests': total, 'errors': errors,
+                'rps': round(total / wall, 1) if wall else 0.0, 'endpoints': endpoints}
+
+
+class Player:
+    """One simulated player with its own keep-alive connection."""
+
+    def __init__(self, base: str, rec: Recorder, rng: random.Random, args):
+        url = urlsplit(base)
+        self.host, self.port = url.hostname, url.port or 80
+        self.prefix = url.path.rstrip('/')
+        self.rec = rec
+        self.rng = rng
+        self.args = args
+        self.conn = None
+        self.view = None  # (min_x, min_y, max_x, max_y) last fetched
+
+    def request(self, label: str, method: str, path: str, body: dict = None):
+        """Timed request; returns the decoded JSON body (or raw bytes), None on failure."""
+        headers = {'Accept-Encoding': 'gzip'} if label == 'terrain_batch' else {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        t0 = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.args.timeout)
+            self.conn.request(method, self.prefix + path, body=data, headers=headers)
+            resp = self.conn.getresponse()
+            payload = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.rec.add(label, time.perf_counter() - t0, f'{type(e).__name__}: {e}')
+            self.conn.close()
+            self.conn = None
+            return None
+        seconds = time.perf_counter() - t0
+        if resp.status >= 400:
+            self.rec.add(label, seconds, f'HTTP {resp.status}: {payload[:120].decode("utf-8", "replace")}')
+            return None
+        self.rec.add(label, seconds)
+        if resp.getheader('Content-Type', '').startswith('application/json'):
+            return json.loads(payload)
+        return payload
+
+    def spawn(self):
+        config = self.request('config', 'GET', '/api/config')
+        self.request('species', 'GET', '/api/species')
+        corridors = self.request('corridors', 'GET', '/api/god_mode/corridors?format=bitmask')
+        if config is None:
+            return False
+        self.cols, self.rows = config['grid_cols'], config['grid_rows']
+        self.x, self.y = config.get('spawn_x', self.cols // 2), config.get('spawn_y', self.rows // 2)
+        self.trail = None
+        trail = (corridors or {}).get('game_trail')
+        if trail and trail.get('encoding') == 'bitmask':
+            bits = np.unpackbits(np.frombuffer(base64.b64decode(trail['data']), dtype=np.uint8),
+                                 count=trail['width'] * trail['height'])
+            self.trail = bits.reshape(trail['height'], trail['width']).astype(bool)
+        return True
+
+    def step(self):
+        """Move one cell, preferring game trails; wander off them now and then."""
+        options = [(self.x + dx, self.y + dy) for dx, dy in MOVES
+                   if 0 <= self.x + dx < self.cols and 0 <= self.y + dy < self.rows]
+        if self.trail is not None and self.rng.random() > self.args.wander:
+            on_trail = [(x, y) for x, y in options if self.trail[y, x]]
+            options = on_trail or options
+        self.x, self.y = self.rng.choice(options)
+
+    def viewport(self):
+        r = self.args.view_radius
+        view = (max(0, self.x - r), max(0, self.y - r),
+                min(self.cols, self.x + r + 1), min(self.rows, self.y + r + 1))
+        old = self.view
+        # refetch once the view has drifted a quarter radius from the last fetch
+        if old and abs(view[0] - old[0]) < r // 4 and abs(view[1] - old[1]) < r // 4:
+            return
+        self.view = view
+        fmt = '' if self.args.format == 'json' else f'&format={self.args.format}'
+        self.request('terrain_batch', 'GET', f'/api/terrain_batch?min_x={view[0]}&min_y={view[1]}'
+                                             f'&max_x={view[2]}&max_y={view[3]}{fmt}')
+
+    def run_http(self, deadline: float):
+        if not self.spawn():
+            return
+        self.viewport()
+        self.request('observe', 'GET', f'/api/observe/{self.x}/{self.y}')
+        while time.monotonic() < deadline:
+            self.step()
+            self.request('observe', 'GET', f'/api/observe/{self.x}/{self.y}')
+            self.viewport()
+            if self.rng.random() < self.args.time_rate:
+                self.request('time', 'POST', '/api/time', {'time_of_day': self.rng.choice(TIMES)})
+            self._think()
+        if self.conn:
+            self.conn.close()
+
+    def run_ws(self, deadline: float):
+        """Same walk over the /api/session websocket: one 'move' round trip per step."""
+        from websockets.sync.client import connect
+
+        if not self.spawn():
+            return
+        url = f'ws://{self.host}:{self.port}{self.prefix}/api/session'
+        seq = 0
+
+        def call(label: str, msg: dict):
+            nonlocal seq
+            seq += 1
+            t0 = time.perf_counter()
+            ws.send(json.dumps({**msg, 'seq': seq}))
+            # pushed world updates (someone changed the time) arrive without our seq
+            while True:
+                reply = json.loads(ws.recv(timeout=self.args.timeout))
+                if reply.get('seq') == seq:
+                    break
+            self.rec.add(label, time.perf_counter() - t0,
+                         reply.get('detail') if reply.get('type') == 'error' else None)
+
+        t0 = time.perf_counter()
+        try:
+            with connect(url, open_timeout=self.args.timeout) as ws:
+                self.rec.add('ws_connect', time.perf_counter() - t0)
+                call('ws_start', {'type': 'start', 'x': self.x, 'y': self.y, 'view_radius': self.args.view_radius})
+                while time.monotonic() < deadline:
+                    x, y = self.x, self.y
+                    self.step()
+                    call('ws_move', {'type': 'move', 'dx': self.x - x, 'dy': self.y - y})
+                    if self.rng.random() < self.args.time_rate:
+                        t1 = time.perf_counter()
+                        ws.send(json.dumps({'type': 'time', 'time_of_day': self.rng.choice(TIMES)}))
+                        self.rec.add('ws_time', time.perf_counter() - t1)
+                    self._think()
+        except Exception as e:
+            self.rec.add('ws_session', time.perf_counter() - t0, f'{type(e).__name__}: {e}')
+
+    def _think(self):
+        if self.args.think > 0:
+            time.sleep(self.rng.uniform(0, 2 * self.args.think))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_in_process(args):
+    """Import the app in a scratch directory and serve it on a background thread; returns (url, server)."""
+    os.environ.setdefault('REDIS_URL', 'memory://')
+    os.environ.setdefault('RULES_WATCH', '0')
+    os.environ['RULES_DIR'] = os.path.abspath(args.rules)
+    if args.inline:
+        os.environ['GENERATION_PROCESSES'] = '0'
+    os.chdir(tempfile.mkdtemp(prefix='star-carr-loadtest-'))
+    sys.path.insert(0, ROOT)
+
+    import uvicorn
+    import main as app_module
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host='127.0.0.1', port=port,
+                                           log_level='warning', access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    wait_ready(f'http://127.0.0.1:{port}', args.timeout * 10)
+    return f'http://127.0.0.1:{port}', server
+
+
+def wait_ready(base: str, timeout: float):
+    """Poll /readyz until the world has loaded."""
+    url = urlsplit(base)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=5)
+            conn.request('GET', url.path.rstrip('/') + '/readyz')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    sys.exit(f"{base} not ready after {timeout:.0f}s")
+
+
+def print_report(report: dict, args):
+    print(f"\n{args.players} players, {args.transport}, {report['seconds']}s: "
+          f"{report['requests']} requests, {report['rps']} req/s, {report['errors']} errors")
+    print(f"  {'endpoint':16s} {'count':>8s} {'req/s':>8s} {'err%':>6s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for label, e in report['endpoints'].items():
+        print(f"  {label:16s} {e['requests']:8d} {e['rps']:8.1f} {e['error_rate'] * 100:6.2f} "
+              f"{e['p50_ms']:8.2f} {e['p95_ms']:8.2f} {e['p99_ms']:8.2f} {e['max_ms']:8.2f}")
+    for label, e in report['endpoints'].items():
+        if 'example_error' in e:
+            print(f"  {label}: {e['example_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--url', help='target a running server instead of starting one in-process')
+    parser.add_argument('--players', type=int, default=16, help='concurrent simulated players')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--transport', choices=('http', 'ws'), default='http',
+                        help='ws walks over the /api/session websocket instead of observe/terrain_batch')
+    parser.add_argument('--format', choices=('json', 'raw', 'rle', 'gzip'), default='gzip',
+                        help='terrain_batch encoding')
+    parser.add_argument('--view-radius', type=int, default=25)
+    parser.add_argument('--think', type=float, default=0.0, help='mean pause between steps in seconds')
+    parser.add_argument('--time-rate', type=float, default=0.002, help='chance per step of changing the time of day')
+    parser.add_argument('--wander', type=float, default=0.2, help='chance per step of ignoring trails')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0, help='seeds the players\' walks')
+    parser.add_argument('--rules', default=os.path.join(ROOT, 'rules'), help='in-process only')
+    parser.add_argument('--inline', action='store_true', help='in-process only: generate without a worker process')
+    parser.add_argument('--out', help='also write the report as JSON')
+    args = parser.parse_args()
+    if args.out:
+        args.out = os.path.abspath(args.out)  # the in-process app runs in a scratch directory
+
+    server = None
+    if args.url:
+        base = args.url
+        wait_ready(base, args.timeout)
+    else:
+        print("Starting the app in-process (memory:// Redis) ...")
+        base, server = start_in_process(args)
+    print(f"Load testing {base} with {args.players} players for {args.duration:.0f}s ...")
+
+    rec = Recorder()
+    deadline = time.monotonic() + args.duration
+    players = [Player(base, rec, random.Random(args.seed * 10007 + i), args) for i in range(args.players)]
+    run = 'run_ws' if args.transport == 'ws' else 'run_http'
+    threads = [threading.Thread(target=getattr(p, run), args=(deadline,), daemon=True) for p in players]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report = rec.report(time.perf_counter() - t0)
+    report['config'] = {k: v for k, v in vars(args).items() if k not in ('out',)}
+
+    if server is not None:
+        server.should_exit = True
+    print_report(report, args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {args.out}")
+    sys.exit(1 if report['requests'] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()